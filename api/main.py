@@ -2,8 +2,17 @@ from fastapi import FastAPI, HTTPException
 from sim.simulation import Simulation
 from sim.init_simulation import SimulationInitializer
 from reports.report_generator import ReportGenerator
-from fastapi.responses import FileResponse
+from model.contraction_hierarchy import ContractionHierarchy
+from model.graph import Graph
+from model.distance_matrix import distance_matrix
+from sim.checkpoint import Checkpointer
+from fastapi.responses import FileResponse, Response
+from pydantic import BaseModel
+from typing import List, Optional
+import json
+import math
 import os
+import struct
 
 app = FastAPI(title="API Sistema Drones")
 
@@ -14,13 +23,38 @@ init_db()
 
 # Instancia global de simulación (para demo, en producción usar base de datos o inyección de dependencias)
 sim = None
+# Jerarquía de contracción para consultas de camino mínimo (se guarda en disco y se reutiliza al reiniciar)
+hierarchy = None
+CH_FILE = os.environ.get("DRONES_CH_FILE", "contraction_hierarchy.bin")
+# Red persistida en formato binario (model.snapshot): cada worker la carga al iniciar
+GRAPH_FILE = os.environ.get("DRONES_GRAPH_FILE", "red_drones.graph")
+# Checkpoint del estado completo de la simulación (instantánea + registro de cambios en .delta)
+CHECKPOINT_FILE = os.environ.get("DRONES_CHECKPOINT_FILE", "simulacion.ckpt")
+checkpointer = None
+
+def load_or_create_graph():
+    # Carga la red guardada; si no existe (o está dañada) genera una nueva y la guarda.
+    if os.path.exists(GRAPH_FILE):
+        try:
+            return Graph.load(GRAPH_FILE, verify=True)
+        except ValueError as e:
+            print(f"Archivo de red inválido, se genera uno nuevo: {e}")
+    graph = SimulationInitializer(15, 20).generate_connected_graph()
+    graph.save(GRAPH_FILE)
+    return graph
 
 def get_sim():
-    global sim
+    global sim, checkpointer
+    if sim is None and os.path.exists(CHECKPOINT_FILE):
+        # Restaura el estado guardado (red, órdenes, clientes y rutas) del último checkpoint.
+        try:
+            checkpointer = Checkpointer.restore(CHECKPOINT_FILE)
+            sim = checkpointer.sim
+        except (OSError, ValueError) as e:
+            print(f"Checkpoint inválido, se crea una simulación nueva: {e}")
     if sim is None:
         try:
-            initializer = SimulationInitializer(15, 20)
-            graph = initializer.generate_connected_graph()
+            graph = load_or_create_graph()
             sim = Simulation(graph)
             
             # Cargar datos existentes de la base de datos
@@ -34,6 +68,45 @@ def get_sim():
             raise HTTPException(status_code=500, detail="Error al inicializar la simulación")
     return sim
 
+def get_hierarchy():
+    global hierarchy
+    sim = get_sim()
+    if hierarchy is None:
+        try:
+            hierarchy = ContractionHierarchy.load_or_build(sim.graph, CH_FILE)
+        except Exception as e:
+            print(f"Error al preparar la jerarquía de contracción: {e}")
+            raise HTTPException(status_code=500, detail="Error al preparar la jerarquía de contracción")
+    return hierarchy
+
+@app.on_event("startup")
+def load_hierarchy():
+    # Carga (o construye) la jerarquía al iniciar para no pagarla en la primera consulta.
+    get_hierarchy()
+
+def get_checkpointer():
+    global checkpointer
+    if checkpointer is None:
+        checkpointer = Checkpointer(get_sim(), CHECKPOINT_FILE)
+    return checkpointer
+
+@app.post("/checkpoint")
+def post_checkpoint(full: bool = False):
+    # Guarda el estado de la simulación: los cambios desde el último checkpoint, o todo si full=True.
+    ckpt = get_checkpointer()
+    if full:
+        ckpt.snapshot()
+        kind = "snapshot"
+    else:
+        kind = ckpt.checkpoint()
+    return {"kind": kind, "file": CHECKPOINT_FILE, "orders": ckpt.sim.order_id}
+
+@app.on_event("shutdown")
+def save_checkpoint():
+    # Guarda los últimos cambios al detener el servidor.
+    if sim is not None:
+        get_checkpointer().checkpoint()
+
 @app.get("/clients/")
 def get_clients():
     sim = get_sim()
@@ -84,10 +157,140 @@ def complete_order(order_id: int):
     order.complete_order()
     return {"message": "Orden completada"}
 
+class ConsolidationRequest(BaseModel):
+    order_ids: Optional[List[int]] = None
+    capacity: int = 5
+    battery_limit: int = 50
+
+@app.post("/orders/consolidate")
+def consolidate_orders(request: ConsolidationRequest):
+    # Recorridos de varias paradas para las órdenes pendientes (todas si no se indican ids).
+    sim = get_sim()
+    orders = None
+    if request.order_ids is not None:
+        orders = [sim.get_order(order_id) for order_id in request.order_ids]
+        if any(order is None or order.status != "In Progress" for order in orders):
+            raise HTTPException(status_code=400, detail="Solo se pueden consolidar órdenes pendientes")
+    return sim.consolidate_orders(orders, request.battery_limit, request.capacity)
+
 @app.get("/routes/")
-def get_routes():
+def get_routes(top: int = None, min_frequency: int = None):
+    # Sin parámetros: todas las rutas en orden. Con top o min_frequency: las más
+    # frecuentes primero, leídas del índice por frecuencia (sin ordenar todo).
+    sim = get_sim()
+    if top is None and min_frequency is None:
+        routes = sim.get_route_frequencies()
+    elif min_frequency is None:
+        routes = sim.get_top_routes(top)
+    else:
+        routes = sim.get_routes_with_min_frequency(min_frequency)[:top]
+    return [{"route": route, "frequency": freq} for route, freq in routes]
+
+@app.get("/routes/range")
+def get_routes_range(start: str = None, end: str = None, offset: int = 0, limit: int = 100):
+    # Rutas con start <= ruta <= end (secuencias de nodos "A,B,C", ordenadas nodo a nodo),
+    # paginadas, y su frecuencia total. Cantidad y frecuencia salen en O(log n).
+    sim = get_sim()
+    total, frequency, routes = sim.get_routes_between(start.split(",") if start else None,
+                                                      end.split(",") if end else None, offset, limit)
+    return {
+        "total_routes": total,
+        "total_frequency": frequency,
+        "routes": [{"route": route, "frequency": freq} for route, freq in routes],
+    }
+
+@app.get("/routes/prefix")
+def get_routes_with_prefix(path: str, offset: int = 0, limit: int = 100):
+    # Rutas registradas que empiezan con la secuencia de nodos path ("A,B,C"), paginadas.
+    sim = get_sim()
+    total, frequency, routes = sim.get_routes_with_prefix(path.split(","), offset, limit)
+    return {
+        "total_routes": total,
+        "total_frequency": frequency,
+        "routes": [{"route": route, "frequency": freq} for route, freq in routes],
+    }
+
+@app.get("/routes/through/{node_id}")
+def get_routes_through(node_id: str):
+    # Rutas registradas que pasan por el nodo (índice invertido del RouteStore).
+    sim = get_sim()
+    return [{"route": route, "frequency": freq} for route, freq in sim.get_routes_through(node_id)]
+
+@app.get("/routes/shortest")
+def get_shortest_route(origin: str, destination: str):
+    ch = get_hierarchy()
+    path, cost = ch.query(origin, destination)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No existe ruta entre los nodos indicados")
+    return {"origin": origin, "destination": destination, "path": path, "cost": cost}
+
+@app.get("/nodes/nearest")
+def get_nearest_nodes(lat: float, lon: float, k: int = 1, role: str = None):
+    # Ajusta un punto GPS a los k nodos más cercanos de la red (opcionalmente de un rol).
+    sim = get_sim()
+    return [
+        {"node": node, "role": sim.graph.vertices[node].role, "distance_km": dist}
+        for node, dist in sim.graph.spatial_index().nearest(lat, lon, k, role)
+    ]
+
+@app.get("/nodes/within")
+def get_nodes_within(lat: float, lon: float, radius_km: float, role: str = None):
+    # Nodos a menos de radius_km del punto (por ejemplo, estaciones de recarga cercanas a un dron).
+    sim = get_sim()
+    return [
+        {"node": node, "role": sim.graph.vertices[node].role, "distance_km": dist}
+        for node, dist in sim.graph.spatial_index().within_radius(lat, lon, radius_km, role)
+    ]
+
+class DistanceMatrixRequest(BaseModel):
+    sources: List[str]
+    targets: List[str]
+    battery_limit: Optional[int] = None
+    next_hop: bool = False
+    format: str = "json"
+
+@app.post("/distance-matrix")
+def post_distance_matrix(request: DistanceMatrixRequest):
+    # Costos de todos los orígenes a todos los destinos (un árbol de caminos mínimos por origen).
+    # format="binary" devuelve en el cuerpo: largo del preámbulo (uint32 little-endian),
+    # preámbulo JSON {"rows", "cols", "sources", "targets", "next_hop"} completado con espacios
+    # hasta múltiplo de 4 bytes, y la matriz en float32 little-endian por filas (inf = sin ruta).
+    # Con next_hop=true el preámbulo trae además "hop_ids" y después de la matriz va la tabla
+    # de primeros saltos en int32 little-endian por filas: índice en hop_ids, -1 = sin ruta.
+    # Los ids van en el cuerpo y no en cabeceras HTTP, que tienen límites de tamaño.
+    if request.format not in ("json", "binary"):
+        raise HTTPException(status_code=400, detail="format debe ser 'json' o 'binary'")
+    sim = get_sim()
+    matrix = distance_matrix(sim.graph, request.sources, request.targets,
+                             request.battery_limit, request.next_hop)
+    if request.format == "binary":
+        header = {"rows": len(matrix.sources), "cols": len(matrix.targets),
+                  "sources": matrix.sources, "targets": matrix.targets, "next_hop": request.next_hop}
+        blocks = [matrix.dist.astype("<f4").tobytes()]
+        if request.next_hop:
+            header["hop_ids"], table = matrix.hop_table()
+            blocks.append(table.astype("<i4").tobytes())
+        preamble = json.dumps(header).encode()
+        preamble += b" " * (-len(preamble) % 4)
+        body = struct.pack("<I", len(preamble)) + preamble + b"".join(blocks)
+        return Response(body, media_type="application/octet-stream")
+    # JSON columnar: una lista por destino (None = sin ruta).
+    result = {
+        "sources": matrix.sources,
+        "targets": matrix.targets,
+        "columns": [[None if math.isinf(d) else d for d in matrix.dist[:, j].tolist()]
+                    for j in range(len(matrix.targets))],
+    }
+    if request.next_hop:
+        result["next_hop"] = [[matrix.next_hop_id(i, j) for i in range(len(matrix.sources))]
+                              for j in range(len(matrix.targets))]
+    return result
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    # Aciertos, fallos y expulsiones de la caché de rutas (para dimensionarla).
     sim = get_sim()
-    return [{"route": route, "frequency": freq} for route, freq in sim.get_route_frequencies()]
+    return sim.route_cache.stats()
 
 @app.get("/stats/")
 def get_stats():
@@ -150,6 +353,6 @@ def get_summary():
         "cliente": roles.count('client'),
         "total_ordenes": len(list(sim.get_orders())),
         "clientes": len(list(sim.get_clients())),
-        "rutas_registradas": len(sim.get_route_frequencies()),
+        "rutas_registradas": len(sim.route_log),
     }
     return summary
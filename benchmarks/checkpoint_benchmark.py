@@ -0,0 +1,54 @@
+"""
+Mide los checkpoints de Simulation: instantánea completa, registro de
+cambios después de unas pocas órdenes nuevas y modificadas, y restauración
+(con el costo de armar una orden y de armar todas).
+
+Uso: python -m benchmarks.checkpoint_benchmark [n_ordenes] [n_nodos] [n_aristas] [archivo]
+"""
+import os
+import sys
+import time
+
+from sim.batch_runner import BatchRunner
+from sim.checkpoint import Checkpointer
+from sim.init_simulation import SimulationInitializer
+from sim.simulation import Simulation
+
+
+def run(n_orders=1_000_000, n_nodes=10000, m_edges=30000, path="checkpoint_benchmark.bin"):
+    graph = SimulationInitializer(n_nodes, m_edges, seed=42).generate_large_graph()
+    sim = Simulation(graph, load_clients=False)
+    t0 = time.perf_counter()
+    BatchRunner(sim, seed=42).run(n_orders)
+    print(f"{sim.order_id} órdenes generadas en {time.perf_counter() - t0:.1f}s")
+
+    checkpointer = Checkpointer(sim, path)
+    t0 = time.perf_counter()
+    checkpointer.snapshot()
+    print(f"instantánea: {time.perf_counter() - t0:.2f}s, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+    BatchRunner(sim, seed=7).run(1000)
+    for order_id in range(0, n_orders, n_orders // 1000):
+        sim.get_order(order_id).complete_order()
+    t0 = time.perf_counter()
+    kind = checkpointer.checkpoint()
+    print(f"checkpoint ({kind}, 1000 nuevas + 1000 entregadas): {(time.perf_counter() - t0) * 1000:.1f} ms, "
+          f"{os.path.getsize(checkpointer.delta_path) / 2**10:.1f} KiB")
+
+    t0 = time.perf_counter()
+    restored = Checkpointer.restore(path).sim
+    print(f"restauración: {time.perf_counter() - t0:.2f}s")
+    t0 = time.perf_counter()
+    order = restored.get_order(n_orders // 2)
+    print(f"primera get_order: {(time.perf_counter() - t0) * 1000:.2f} ms ({order.status}, costo {order.cost})")
+    t0 = time.perf_counter()
+    total = len(list(restored.get_orders()))
+    print(f"get_orders (arma las {total} órdenes): {time.perf_counter() - t0:.2f}s")
+
+    os.remove(path)
+    os.remove(checkpointer.delta_path)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(*(int(arg) for arg in args[:3]), *args[3:4])
@@ -0,0 +1,123 @@
+"""
+Compara, en el mismo día simulado, el despacho por depósito (cada orden espera
+un dron de su propio depósito) con el Dispatcher por prioridad y asignación
+por lotes. Los clientes reciben prioridades 1-5 al azar (20% de prioridad alta).
+Al final mide un tick aislado con miles de órdenes pendientes (por separado el
+cálculo de los traslados en set_dispatcher, el primer tick y un tick caliente)
+y comprueba que,
+con poca batería (depósitos que la flota deja fuera de alcance al trasladarse),
+ninguna orden queda esperando para siempre: cada una se entrega o falla con motivo.
+
+Uso: python -m benchmarks.dispatcher_benchmark [n_drones] [n_ordenes] [n_nodos] [n_aristas] [semilla]
+"""
+import gc
+import sys
+import time
+
+import numpy as np
+
+from sim.batch_runner import WorkloadModel
+from sim.dispatcher import Dispatcher
+from sim.fleet_simulation import FleetSimulation
+from sim.init_simulation import SimulationInitializer
+from sim.simulation import Simulation
+
+
+def simulate(graph, orders, priorities, n_drones, demand, dispatcher):
+    sim = Simulation(graph, load_clients=False)
+    sim.client_priority.update(priorities)
+    fleet = FleetSimulation(sim, speed=120.0, charge_rate=360.0)
+    fleet.add_fleet(n_drones, demand)
+    if dispatcher:
+        fleet.set_dispatcher(Dispatcher(fleet, interval=60))
+    fleet.schedule_orders(orders)
+    summary = fleet.run()
+    waits = {}
+    for _, order in sim.get_orders():
+        if order.delivery_date:
+            waits.setdefault(order.priority, []).append(
+                (order.delivery_date - order.creation_date).total_seconds() / 60)
+    summary["lead_time_by_priority_min"] = {p: round(float(np.mean(w)), 1) for p, w in sorted(waits.items())}
+    return summary
+
+
+def run(n_drones=1000, n_orders=100_000, n_nodes=2000, m_edges=6000, seed=42):
+    graph = SimulationInitializer(n_nodes, m_edges, seed=seed).generate_large_graph()
+    rng = np.random.default_rng(seed)
+    pairs = WorkloadModel(graph, seed=seed, zipf=0.6).sample(n_orders)
+    arrivals = np.sort(rng.uniform(0, 24 * 3600, n_orders)).tolist()
+    orders = [(at, origin, destination) for at, (origin, destination) in zip(arrivals, pairs)]
+    clients = sorted({destination for _, destination in pairs})
+    priorities = dict(zip(clients, rng.choice([1, 2, 3, 5], len(clients), p=[0.5, 0.2, 0.1, 0.2]).tolist()))
+    demand = {}
+    for origin, _ in pairs:
+        demand[origin] = demand.get(origin, 0) + 1
+
+    for label, dispatcher in (("por depósito", False), ("Dispatcher", True)):
+        summary = simulate(graph, orders, priorities, n_drones, demand, dispatcher)
+        print(f"{label}: {summary['elapsed_s']:.1f}s, {summary['sim_time_h']:.1f} h simuladas, "
+              f"{summary['orders_delivered']} entregadas")
+        print(f"  entrega (min): {summary['lead_time_min']}")
+        print(f"  entrega por prioridad (min): {summary['lead_time_by_priority_min']}")
+        if dispatcher:
+            stats = dict(summary["dispatcher"])
+            latency = stats.pop("latency_ms")
+            print(f"  dispatcher: {stats}")
+            if latency:
+                print(f"  latencia por tick (ms): primero {latency['cold']:.0f}, siguientes {latency['warm']}")
+
+    # Tick aislado: todos los drones libres y n_pending órdenes pendientes.
+    for n_pending in (2000, 5000):
+        sim = Simulation(graph, load_clients=False)
+        sim.client_priority.update(priorities)
+        fleet = FleetSimulation(sim, speed=120.0, charge_rate=360.0)
+        fleet.add_fleet(n_drones)
+        dispatcher = Dispatcher(fleet)
+        start = time.perf_counter()
+        fleet.set_dispatcher(dispatcher)            # filas de traslado de todos los depósitos
+        prepare = time.perf_counter() - start
+        fleet.schedule_orders([(0, origin, destination) for _, origin, destination in orders[:n_pending]])
+        fleet.run(until=0)                          # llegan las órdenes (el primer tick no tenía ninguna)
+        ticks = []
+        for _ in range(2):
+            idle = sum(len(drones) for drones in fleet.idle.values())
+            pending = len(dispatcher.queue)
+            gc.collect()   # que no se cuele una recolección de los objetos del día simulado
+            start = time.perf_counter()
+            assigned = dispatcher.tick(0)
+            ticks.append((time.perf_counter() - start, pending, idle, assigned))
+            # Para el tick caliente los drones vuelven a quedar libres en su nueva base.
+            for drone in fleet.drones:
+                if drone.order is not None:
+                    drone.order = None
+                    fleet.idle.setdefault(drone.home, []).append(drone)
+        print(f"{n_pending} pendientes, {n_drones} drones: set_dispatcher {prepare:.1f} s")
+        for label, (elapsed, pending, idle, assigned) in zip(("frío", "caliente"), ticks):
+            print(f"  tick {label} con {pending} pendientes y {idle} drones libres: "
+                  f"{assigned} asignadas en {elapsed * 1000:.0f} ms")
+
+    check_no_stranded_orders(seed=seed)
+
+
+def check_no_stranded_orders(n_drones=100, n_orders=5000, n_nodes=500, m_edges=1500, battery_limit=12, seed=42):
+    # Con battery_limit bajo los traslados de una sola carga dejan depósitos sin
+    # drones al alcance: esas órdenes deben terminar rechazadas, no en la cola.
+    graph = SimulationInitializer(n_nodes, m_edges, seed=seed).generate_large_graph()
+    sim = Simulation(graph, load_clients=False)
+    pairs = WorkloadModel(graph, seed=seed).sample(n_orders)
+    arrivals = np.sort(np.random.default_rng(seed).uniform(0, 24 * 3600, n_orders)).tolist()
+    fleet = FleetSimulation(sim, battery_limit=battery_limit)
+    fleet.add_fleet(n_drones)
+    fleet.set_dispatcher(Dispatcher(fleet))
+    fleet.schedule_orders([(at, origin, destination) for at, (origin, destination) in zip(arrivals, pairs)])
+    summary = fleet.run()
+    failed = sum(summary["orders_failed"].values())
+    print(f"batería {battery_limit}: {summary['orders_delivered']} entregadas, {failed} fallidas "
+          f"{summary['orders_failed']}, {summary['orders_waiting']} esperando")
+    assert summary["orders_waiting"] == 0 and summary["orders_in_flight"] == 0
+    assert summary["orders_delivered"] + failed == n_orders
+    assert all(order.status != "In Progress" for _, order in sim.get_orders())
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:]))
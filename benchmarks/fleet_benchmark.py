@@ -0,0 +1,84 @@
+"""
+Simula un día de operación con FleetSimulation: órdenes con llegadas
+uniformes en 24 h, demanda tipo Zipf (WorkloadModel) y la flota repartida
+entre depósitos según la demanda esperada. Con battery_limit 50 casi ninguna
+misión necesita recargar, así que después se corre el mismo día con poca
+batería y un cargador por estación (colas en las estaciones), y se comprueba
+la cola FIFO de cargadores en una red mínima con tiempos conocidos.
+
+Uso: python -m benchmarks.fleet_benchmark [n_drones] [n_ordenes] [n_nodos] [n_aristas] [semilla]
+(zipf 0.6: demanda menos concentrada que la de BatchRunner)
+"""
+import sys
+import time
+
+import numpy as np
+
+from model.graph import Graph
+from sim.batch_runner import WorkloadModel
+from sim.fleet_simulation import CHARGE, FleetSimulation
+from sim.init_simulation import SimulationInitializer
+from sim.simulation import Simulation
+
+
+def run(n_drones=1000, n_orders=100_000, n_nodes=2000, m_edges=6000, seed=42):
+    simulate(n_drones, n_orders, n_nodes, m_edges, seed)
+    print("\ncon recargas (battery_limit 20, 1 cargador por estación):")
+    summary = simulate(n_drones, n_orders, n_nodes, m_edges, seed, battery_limit=20, charging_slots=1)
+    assert summary["charges"] > 0 and summary["max_charging_queue"] > 0
+    check_charging_queue()
+
+
+def simulate(n_drones, n_orders, n_nodes, m_edges, seed, battery_limit=50, charging_slots=2):
+    t0 = time.perf_counter()
+    graph = SimulationInitializer(n_nodes, m_edges, seed=seed).generate_large_graph()
+    sim = Simulation(graph, load_clients=False)
+    pairs = WorkloadModel(graph, seed=seed, zipf=0.6).sample(n_orders)
+    arrivals = np.sort(np.random.default_rng(seed).uniform(0, 24 * 3600, n_orders)).tolist()
+    demand = {}
+    for origin, _ in pairs:
+        demand[origin] = demand.get(origin, 0) + 1
+    print(f"grafo y demanda: {time.perf_counter() - t0:.1f}s")
+
+    fleet = FleetSimulation(sim, battery_limit, speed=120.0, charge_rate=360.0, charging_slots=charging_slots)
+    fleet.add_fleet(n_drones, demand)
+    t0 = time.perf_counter()
+    fleet.schedule_orders((at, origin, destination) for at, (origin, destination) in zip(arrivals, pairs))
+    print(f"planes de misión: {time.perf_counter() - t0:.1f}s")
+    summary = fleet.run()
+    print(f"{summary['events']} eventos en {summary['elapsed_s']:.1f}s "
+          f"({summary['events'] / summary['elapsed_s']:.0f} eventos/s), "
+          f"{summary['sim_time_h']:.1f} h simuladas")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
+    return summary
+
+
+def check_charging_queue(n_drones=3, battery_limit=50, charge_rate=360.0):
+    # D -30- X -30- R -5- C y C -46- R2 -40- D, con R y R2 de recarga y un cargador
+    # cada una. Los n_drones salen juntos hacia C: llegan a R con 60 de consumo
+    # (batería agotada, carga completa) y se atienden en orden de llegada, así que
+    # esperan 0, T, 2T, ... con T = battery_limit / charge_rate horas.
+    graph = Graph()
+    for node, role in (("D", "storage"), ("X", "client"), ("R", "recharge"), ("C", "client"), ("R2", "recharge")):
+        graph.add_vertex(node, role)
+    for u, v, weight in (("D", "X", 30), ("X", "R", 30), ("R", "C", 5), ("C", "R2", 46), ("R2", "D", 40)):
+        graph.add_edge(u, v, weight)
+    sim = Simulation(graph, load_clients=False)
+    fleet = FleetSimulation(sim, battery_limit, speed=60.0, charge_rate=charge_rate, charging_slots=1)
+    fleet.add_fleet(n_drones, {"D": 1})
+    fleet.schedule_orders([(0, "D", "C")] * n_drones)
+    summary = fleet.run()
+    charge = battery_limit / charge_rate * 3600
+    waits = sorted(drone.charge_wait for drone in fleet.drones)
+    print(f"cola de carga: esperas {[round(w) for w in waits]} s (carga completa {charge:.0f} s), "
+          f"{summary['charges']} cargas, cola máxima {summary['max_charging_queue']}")
+    assert summary["orders_delivered"] == n_drones
+    assert summary["charges"] == 2 * n_drones and summary["max_charging_queue"] == n_drones - 1
+    assert np.allclose(waits, [i * charge for i in range(n_drones)])
+    plan = fleet._plan("D", "C")[2]
+    assert [step[3] for step in plan if step[2] == CHARGE] == [0, 0]
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,100 @@
+"""
+Compara tda.hash_map.HashMap (direccionamiento abierto) con la versión
+anterior de encadenamiento con capacidad fija y con el dict de Python.
+
+Uso: python -m benchmarks.hash_map_benchmark [n_elementos]
+"""
+import random
+import sys
+import time
+
+from tda.hash_map import HashMap
+
+
+class ChainedHashMap:
+    # Versión anterior: 100 listas de pares fijas, len recorre todas las listas.
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.map = [[] for _ in range(capacity)]
+
+    def insert(self, key, value):
+        bucket = self.map[hash(key) % self.capacity]
+        for pair in bucket:
+            if pair[0] == key:
+                pair[1] = value
+                return
+        bucket.append([key, value])
+
+    def get(self, key):
+        for pair in self.map[hash(key) % self.capacity]:
+            if pair[0] == key:
+                return pair[1]
+        return None
+
+    def delete(self, key):
+        bucket = self.map[hash(key) % self.capacity]
+        for i, pair in enumerate(bucket):
+            if pair[0] == key:
+                del bucket[i]
+                return True
+        return False
+
+    def items(self):
+        items = []
+        for bucket in self.map:
+            items.extend(bucket)
+        return items
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.map)
+
+
+class DictMap(dict):
+    # dict con la misma interfaz que HashMap.
+    insert = dict.__setitem__
+
+    def delete(self, key):
+        return self.pop(key, None) is not None
+
+
+def measure(factory, keys, lookups):
+    # Tiempos (s) de inserción, búsqueda, len, recorrido y borrado.
+    times = {}
+    table = factory()
+    t0 = time.perf_counter()
+    for key in keys:
+        table.insert(key, key)
+    times["insert"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for key in lookups:
+        table.get(key)
+    times["get"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(100):
+        len(table)
+    times["len x100"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in table.items():
+        pass
+    times["items"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for key in keys[::2]:
+        table.delete(key)
+    times["delete 1/2"] = time.perf_counter() - t0
+    return times
+
+
+def run(n=100_000, seed=42):
+    rng = random.Random(seed)
+    keys = list(range(n))
+    rng.shuffle(keys)
+    lookups = [rng.randrange(2 * n) for _ in range(n)]  # la mitad no existe
+    print(f"{n} claves enteras (órdenes)")
+    print(f"{'estructura':<18}" + "".join(f"{op:>12}" for op in ("insert", "get", "len x100", "items", "delete 1/2")))
+    for name, factory in (("ChainedHashMap", ChainedHashMap), ("HashMap", HashMap), ("dict", DictMap)):
+        times = measure(factory, keys, lookups)
+        print(f"{name:<18}" + "".join(f"{t * 1000:>10.1f}ms" for t in times.values()))
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""
+Mide el costo del índice por frecuencia de RouteTree: memoria adicional con
+muchas rutas distintas, tiempo del top-k frente a ordenar todas las rutas y
+tiempo de reconstruir el registro con bulk_load.
+
+Uso: python -m benchmarks.route_tree_benchmark [n_rutas_distintas] [n_inserciones_extra]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from tda.avl import AVLTree
+from tda.route_tree import RouteTree
+
+
+def build(tree_class, keys, extra):
+    # Construye el árbol midiendo memoria (tracemalloc) y tiempo de inserción.
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    tree = tree_class()
+    for key in keys:
+        tree.insert(key)
+    for key in extra:
+        tree.insert(key)
+    elapsed = time.perf_counter() - t0
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, elapsed, memory
+
+
+def run(n_routes=1_000_000, n_extra=1_000_000, seed=42):
+    rng = random.Random(seed)
+    keys = [f"{rng.randrange(10**6)} → {i} → {rng.randrange(10**6)}" for i in range(n_routes)]
+    # Inserciones repetidas con distribución sesgada (pocas rutas muy usadas).
+    extra = [keys[min(n_routes - 1, int(rng.paretovariate(1.1)) - 1)] for _ in range(n_extra)]
+    rng.shuffle(keys)
+
+    plain, plain_time, plain_memory = build(AVLTree, keys, extra)
+    indexed, indexed_time, indexed_memory = build(RouteTree, keys, extra)
+    print(f"{n_routes} rutas distintas, {n_extra} inserciones repetidas")
+    print(f"AVLTree:   {plain_memory / 2**20:8.1f} MiB  inserción {plain_time:6.2f} s")
+    print(f"RouteTree: {indexed_memory / 2**20:8.1f} MiB  inserción {indexed_time:6.2f} s")
+    print(f"Índice por frecuencia: +{(indexed_memory - plain_memory) / 2**20:.1f} MiB "
+          f"({(indexed_memory - plain_memory) / n_routes:.0f} bytes por ruta, "
+          f"{indexed.by_frequency.bucket_count()} frecuencias distintas)")
+
+    t0 = time.perf_counter()
+    expected = sorted(plain.inorder(), key=lambda x: x[1], reverse=True)[:10]
+    sort_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    top = indexed.get_most_frequent_routes(10)
+    index_time = time.perf_counter() - t0
+    assert [f for _, f in top] == [f for _, f in expected]
+    print(f"top-10 ordenando todo: {sort_time * 1000:9.1f} ms | con el índice: {index_time * 1000:.3f} ms")
+
+    items = indexed.inorder()
+    t0 = time.perf_counter()
+    restored = RouteTree.bulk_load(items)
+    bulk_time = time.perf_counter() - t0
+    assert len(restored) == len(indexed) and restored.total_frequency() == indexed.total_frequency()
+    print(f"reconstrucción con bulk_load: {bulk_time:.2f} s "
+          f"(inserción una a una: {indexed_time:.2f} s, altura {restored.root.height} vs {indexed.root.height})")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:]))
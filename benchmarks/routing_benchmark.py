@@ -0,0 +1,56 @@
+"""
+Compara Graph.dijkstra con las búsquedas dirigidas de GoalDirectedRouter
+(Dijkstra con predecesores, A* geográfico y ALT).
+
+Uso: python -m benchmarks.routing_benchmark [n_nodos] [n_aristas] [n_consultas]
+"""
+import random
+import sys
+import time
+
+from model.geo import haversine_km
+from model.goal_directed import GoalDirectedRouter
+from sim.init_simulation import SimulationInitializer
+
+
+def build_geometric_graph(n_nodes, m_edges, seed=42):
+    # Grafo conexo de Temuco con pesos proporcionales a la distancia (metros).
+    graph = SimulationInitializer(n_nodes, m_edges, seed=seed).generate_connected_graph()
+    for u, v, _ in list(graph.edges()):
+        a, b = graph.vertices[u], graph.vertices[v]
+        graph.add_edge(u, v, max(1, round(haversine_km(a.lat, a.lon, b.lat, b.lon) * 1000)))
+    return graph
+
+
+def run(n_nodes=2000, m_edges=6000, n_queries=100, seed=42):
+    graph = build_geometric_graph(n_nodes, m_edges, seed)
+    t0 = time.perf_counter()
+    router = GoalDirectedRouter(graph)
+    prep = time.perf_counter() - t0
+    rng = random.Random(seed)
+    nodes = list(graph.vertices)
+    queries = [tuple(rng.sample(nodes, 2)) for _ in range(n_queries)]
+
+    print(f"Grafo: {n_nodes} nodos, {graph.edge_count()} aristas | preprocesamiento ALT: {prep * 1000:.1f} ms")
+    print(f"{'algoritmo':<22}{'ms/consulta':>14}{'nodos expandidos':>20}")
+
+    t0 = time.perf_counter()
+    reference = [graph.dijkstra(u, v)[1] for u, v in queries]
+    elapsed = time.perf_counter() - t0
+    print(f"{'Graph.dijkstra':<22}{elapsed / n_queries * 1000:>14.3f}{'-':>20}")
+
+    for name, search in (("dijkstra (pred.)", router.dijkstra),
+                         ("A* geográfico", router.astar),
+                         ("ALT", router.alt)):
+        expanded = 0
+        t0 = time.perf_counter()
+        for (u, v), expected in zip(queries, reference):
+            _, cost = search(u, v)
+            expanded += router.last_expanded
+            assert cost == expected, f"{name}: costo {cost} != {expected} en {u}->{v}"
+        elapsed = time.perf_counter() - t0
+        print(f"{name:<22}{elapsed / n_queries * 1000:>14.3f}{expanded / n_queries:>20.1f}")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:]))
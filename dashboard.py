@@ -1,7 +1,10 @@
 import streamlit as st
 from sim.init_simulation import SimulationInitializer
 from sim.simulation import Simulation
+from sim.batch_runner import BatchRunner
+from sim.checkpoint import Checkpointer
 from visual.networkx_adapter import NetworkXAdapter
+from model.graph import Graph
 from visual.avl_visualizer import AVLVisualizer
 from visual.map_visualizer import show_graph_map
 from domain.client import Client
@@ -10,6 +13,11 @@ import pandas as pd
 from reports.report_generator import ReportGenerator
 from database import Session, Cliente, Orden, obtener_ordenes_db
 
+# Archivo donde se guarda la red generada
+GRAPH_FILE = "red_drones.graph"
+# Checkpoint de la simulación completa (red, órdenes, clientes y rutas)
+CHECKPOINT_FILE = "simulacion.ckpt"
+
 # Configuración de la página de Streamlit
 st.set_page_config(page_title="Sistema Logístico Autónomo con Drones", layout="wide")
 
@@ -31,6 +39,21 @@ def init_session_state():
 # Inicializar el estado
 init_session_state()
 
+# Muestra en la interfaz los eventos de la simulación (la simulación no depende de Streamlit)
+def streamlit_listener(event, *args):
+    if event == "order_created":
+        order = args[0]
+        st.success(f"ORDEN CREADA: {order.origin} → {order.destination} | Ruta: {' → '.join(order.path)} | Costo: {order.cost}")
+    elif event == "order_failed":
+        reason = args[-1]
+        st.error(f"No se pudo crear la orden: {reason}")
+
+def new_simulation(graph):
+    # Crea la simulación y la conecta con la interfaz.
+    sim = Simulation(graph)
+    sim.add_listener(streamlit_listener)
+    return sim
+
 # Función auxiliar para obtener los nodos más visitados por tipo
 def get_top_nodos_por_tipo(total_freq, roles_dict, n=5):
     tipos = ['storage', 'recharge', 'client']
@@ -63,18 +86,69 @@ def run():
             m_edges = st.slider("Número de aristas", n_nodes - 1, 300, max(n_nodes - 1, 20))
         with col3:
             n_orders = st.slider("Número de órdenes", 10, 300, 10)
+        seed = st.number_input("Semilla (0 = aleatoria)", min_value=0, value=0, step=1)
 
         # Botón para iniciar la simulación
         if st.button("🚀 Iniciar Simulación"):
             if m_edges < n_nodes - 1:
                 st.error("El número de aristas debe ser al menos n-1 para que el grafo sea conexo.")
             else:
-                initializer = SimulationInitializer(n_nodes, m_edges)
+                initializer = SimulationInitializer(n_nodes, m_edges, seed=int(seed) or None)
                 graph = initializer.generate_connected_graph()
-                st.session_state.sim = Simulation(graph)
+                st.session_state.sim = new_simulation(graph)
                 st.session_state.graph_adapter = NetworkXAdapter(graph)
                 st.success("¡Simulación iniciada correctamente!")
 
+                # Genera las órdenes iniciales sin interfaz (sin un mensaje por orden)
+                sim = st.session_state.sim
+                sim.remove_listener(streamlit_listener)
+                progress = st.progress(0.0)
+                runner = BatchRunner(sim, seed=int(seed) or None)
+                runner.add_listener(lambda event, *args: progress.progress(args[0] / args[1]) if event == "progress" else None)
+                summary = runner.run(n_orders)
+                sim.add_listener(streamlit_listener)
+                st.info(f"{summary['orders_created']} órdenes creadas, {summary['orders_failed']} sin ruta "
+                        f"({summary['orders_per_sec']:.0f} órdenes/s)")
+
+        # Guardar / cargar la red en formato binario para no regenerarla en cada ejecución
+        col_save, col_load = st.columns(2)
+        with col_save:
+            if st.button("💾 Guardar red", key="save_graph") and st.session_state.sim:
+                checksum = st.session_state.sim.graph.save(GRAPH_FILE)
+                st.success(f"Red guardada en {GRAPH_FILE} (checksum {checksum:08x})")
+        with col_load:
+            if st.button("📂 Cargar red guardada", key="load_graph"):
+                try:
+                    graph = Graph.load(GRAPH_FILE, verify=True)
+                    st.session_state.sim = new_simulation(graph)
+                    st.session_state.graph_adapter = NetworkXAdapter(graph)
+                    st.success(f"Red cargada desde {GRAPH_FILE}")
+                except (OSError, ValueError) as e:
+                    st.error(f"No se pudo cargar la red: {e}")
+
+        # Checkpoint de toda la simulación: sobrevive a reinicios de Streamlit
+        col_ckpt, col_restore = st.columns(2)
+        with col_ckpt:
+            if st.button("💾 Guardar simulación", key="save_checkpoint") and st.session_state.sim:
+                checkpointer = st.session_state.get("checkpointer")
+                if checkpointer is None or checkpointer.sim is not st.session_state.sim:
+                    checkpointer = Checkpointer(st.session_state.sim, CHECKPOINT_FILE)
+                    st.session_state.checkpointer = checkpointer
+                kind = checkpointer.checkpoint()
+                st.success(f"Simulación guardada en {CHECKPOINT_FILE} "
+                           f"({'instantánea completa' if kind == 'snapshot' else 'solo cambios'})")
+        with col_restore:
+            if st.button("📂 Restaurar simulación", key="load_checkpoint"):
+                try:
+                    checkpointer = Checkpointer.restore(CHECKPOINT_FILE)
+                    checkpointer.sim.add_listener(streamlit_listener)
+                    st.session_state.checkpointer = checkpointer
+                    st.session_state.sim = checkpointer.sim
+                    st.session_state.graph_adapter = NetworkXAdapter(checkpointer.sim.graph)
+                    st.success(f"Simulación restaurada desde {CHECKPOINT_FILE} ({checkpointer.sim.order_id} órdenes)")
+                except (OSError, ValueError) as e:
+                    st.error(f"No se pudo restaurar la simulación: {e}")
+
         # Mostrar información y visualización del grafo si ya existe una simulación
         if st.session_state.sim:
             st.markdown(f"**Nodos:** {len(st.session_state.sim.graph.vertices)}  \n**Aristas:** {st.session_state.sim.graph.edge_count()}")
@@ -88,10 +162,12 @@ def run():
         if st.session_state.sim:
             # Visualización sobre mapa real
             st.subheader("Visualización georreferenciada (Mapa real)")
+            show_zones = st.checkbox("Mostrar zonas de depósito", key="show_depot_zones")
             show_graph_map(
                 st.session_state.sim.graph,
                 path=st.session_state.get("calculated_path"),
-                mst_edges=st.session_state.get("mst_edges")
+                mst_edges=st.session_state.get("mst_edges"),
+                depot_partition=st.session_state.sim.graph.depot_partition() if show_zones else None
             )
 
             # Leyenda de colores para los tipos de nodos
@@ -189,12 +265,11 @@ def run():
                     st.session_state.calculated_destination = None
                 else:
                     try:
+                        # Las rutas quedan en caché hasta que cambia el grafo.
                         if algorithm == "Dijkstra":
-                            path, cost = st.session_state.sim.graph.dijkstra(origin, destination)
+                            path, cost = st.session_state.sim.find_route(origin, destination, "dijkstra")
                         elif algorithm == "Floyd-Warshall":
-                            dist, next_node = st.session_state.sim.graph.floyd_warshall()
-                            path = st.session_state.sim.graph.reconstruct_fw_path(origin, destination, next_node)
-                            cost = dist[origin][destination] if path else None
+                            path, cost = st.session_state.sim.find_route(origin, destination, "floyd_warshall")
                         else:
                             path, cost = st.session_state.sim.calculate_route(origin, destination)
                         
@@ -217,7 +292,8 @@ def run():
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("🌲 Mostrar MST (Kruskal)", key="show_mst"):
-                    st.session_state["mst_edges"] = st.session_state.sim.graph.kruskal_mst()
+                    # MST mantenido incrementalmente: no se recalcula si el grafo no cambió.
+                    st.session_state["mst_edges"] = list(st.session_state.sim.graph.minimum_spanning_tree().edges)
             with col2:
                 if st.button("❌ Ocultar MST", key="hide_mst"):
                     st.session_state["mst_edges"] = None
@@ -305,6 +381,8 @@ def run():
                     
                     # Obtener el nodo del cliente seleccionado
                     cliente_origen = next(c["node_id"] for c in clientes if c["id"] == selected_client)
+                    # Despachar desde el depósito más cercano al destino en vez del nodo del cliente
+                    desde_deposito = st.checkbox("Despachar desde el depósito más cercano")
                     
                     # Seleccionar destino
                     nodos_destino = [
@@ -317,7 +395,8 @@ def run():
                     
                     if submit_orden:
                         try:
-                            orden = st.session_state.sim.create_order(cliente_origen, destino)
+                            orden = st.session_state.sim.create_order(
+                                None if desde_deposito else cliente_origen, destino)
                             if orden:
                                 st.success(f"✅ Orden creada exitosamente: {orden.to_dict()}")
                             else:
@@ -404,22 +483,23 @@ def run():
     with tab4:
         st.header("📋 Analítica de Rutas")
         if st.session_state.sim:
-            frequencies = st.session_state.sim.get_route_frequencies()
-            st.write("Rutas más frecuentes:")
+            # Las rutas salen ya ordenadas por frecuencia del índice del RouteTree.
+            top_n = st.number_input("Cantidad de rutas a mostrar", min_value=1, max_value=100, value=10)
+            frequencies = st.session_state.sim.get_top_routes(int(top_n))
+            st.write(f"Rutas más frecuentes (de {len(st.session_state.sim.route_log)} registradas):")
 
             if frequencies:
-                sorted_freq = sorted(frequencies, key=lambda x: x[1], reverse=True)
-                for route, freq in sorted_freq:
+                for route, freq in frequencies:
                     st.write(f"{route} → {freq} veces")
 
-                ruta_mas_frecuente = sorted_freq[0]
+                ruta_mas_frecuente = frequencies[0]
                 st.info(f"Ruta más frecuente: {ruta_mas_frecuente[0]} ({ruta_mas_frecuente[1]} veces)")
             else:
                 st.write("No hay rutas registradas aún.")
 
             # Visualización del árbol AVL de rutas
             if st.button("🌳 Visualizar Árbol AVL de Rutas"):
-                visualizer = AVLVisualizer(st.session_state.sim.route_log)
+                visualizer = AVLVisualizer(st.session_state.sim.route_log, st.session_state.sim.routes.key)
                 fig = visualizer.draw()
                 st.pyplot(fig)
 
@@ -1,7 +1,10 @@
 import datetime
 
+from tda.route_store import RouteStore
+
 class Order:
-    def __init__(self, order_id, origin, destination, path, cost, priority=1):
+    def __init__(self, order_id, origin, destination, path, cost, priority=1, route_store=None,
+                 creation_date=None, changes=None):
         # Inicializa una orden de entrega.
         # order_id: identificador único de la orden.
         # origin: nodo de origen.
@@ -9,20 +12,93 @@ class Order:
         # path: lista de nodos que conforman la ruta.
         # cost: costo total de la ruta.
         # priority: prioridad de la orden (por defecto 1).
+        # route_store: RouteStore compartido donde se interna la ruta; la orden
+        # solo guarda el id de la ruta (sin store se usa uno propio).
+        # creation_date: fecha de creación; por defecto la hora actual (la
+        # simulación por eventos pasa la de su reloj simulado).
+        # changes: conjunto compartido (de la Simulation) donde se anota el id de
+        # la orden cada vez que cambia su estado, prioridad, fecha de entrega o ruta;
+        # lo usan los checkpoints incrementales.
         self.id = order_id
         self.origin = origin
         self.destination = destination
-        self.path = path
+        self.route_store = route_store if route_store is not None else RouteStore()
+        self.route_id = self.route_store.intern(path)
+        self.cost = cost
+        self._priority = priority
+        self._status = "In Progress"  # Estado inicial de la orden.
+        self.creation_date = creation_date or datetime.datetime.now()  # Fecha de creación.
+        self._delivery_date = None  # Fecha de entrega (se asigna al completar la orden).
+        self.changes = changes
+
+    @classmethod
+    def restore(cls, order_id, origin, destination, route_id, cost, priority, status, creation_date,
+                delivery_date, route_store, changes=None):
+        # Reconstruye una orden guardada: la ruta ya está internada en route_store (no se vuelve a internar).
+        order = cls.__new__(cls)
+        order.id = order_id
+        order.origin = origin
+        order.destination = destination
+        order.route_store = route_store
+        order.route_id = route_id
+        order.cost = cost
+        order._priority = priority
+        order._status = status
+        order.creation_date = creation_date
+        order._delivery_date = delivery_date
+        order.changes = changes
+        return order
+
+    # status, priority y delivery_date cambian después de crear la orden: cada
+    # cambio se anota en changes (si la orden tiene uno).
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        self._status = value
+        self._changed()
+
+    @property
+    def priority(self):
+        return self._priority
+
+    @priority.setter
+    def priority(self, value):
+        self._priority = value
+        self._changed()
+
+    @property
+    def delivery_date(self):
+        return self._delivery_date
+
+    @delivery_date.setter
+    def delivery_date(self, value):
+        self._delivery_date = value
+        self._changed()
+
+    def reroute(self, route_id, cost):
+        # Pasa la orden a otra ruta ya internada en route_store (por ejemplo el
+        # recorrido consolidado que la lleva) con su costo; se anota en changes.
+        self.route_id = route_id
         self.cost = cost
-        self.priority = priority
-        self.status = "In Progress"  # Estado inicial de la orden.
-        self.creation_date = datetime.datetime.now()  # Fecha de creación.
-        self.delivery_date = None  # Fecha de entrega (se asigna al completar la orden).
+        self._changed()
+
+    def _changed(self):
+        if self.changes is not None:
+            self.changes.add(self.id)
+
+    @property
+    def path(self):
+        # Lista de nodos de la ruta (se arma desde el RouteStore).
+        return self.route_store.path(self.route_id)
 
-    def complete_order(self):
-        # Marca la orden como entregada y registra la fecha de entrega.
+    def complete_order(self, delivery_date=None):
+        # Marca la orden como entregada y registra la fecha de entrega
+        # (por defecto la hora actual; la simulación por eventos pasa la simulada).
         self.status = "Delivered"
-        self.delivery_date = datetime.datetime.now()
+        self.delivery_date = delivery_date or datetime.datetime.now()
 
     def to_dict(self):
         # Devuelve un diccionario con los datos de la orden, útil para mostrar o serializar.
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+
+
+class AllPairsShortestPaths:
+    """
+    Caminos mínimos entre todos los pares (Floyd-Warshall vectorizado).
+
+    Las distancias se guardan en una matriz densa float32 y el siguiente salto
+    en una matriz int32 (-1 si no hay camino). Cada paso k relaja la matriz
+    completa con operaciones de NumPy en lugar de tres bucles de Python.
+    Memoria: 8 * n² bytes (unos 800 MB para 10.000 nodos).
+    """
+
+    def __init__(self, ids, dist, next_hop):
+        # ids: id original de cada fila/columna; dist y next_hop: matrices n x n.
+        self.ids = ids
+        self.index = {id: i for i, id in enumerate(ids)}
+        self.dist = dist
+        self.next_hop = next_hop
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Calcula las matrices a partir de un model.graph.Graph."""
+        ids = list(graph.vertices.keys())
+        index = {id: i for i, id in enumerate(ids)}
+        rows, cols, weights = [], [], []
+        for u, v, w in graph.edges():
+            rows.append(index[u])
+            cols.append(index[v])
+            weights.append(w)
+        return cls._solve(ids, np.array(rows, dtype=np.int64),
+                          np.array(cols, dtype=np.int64),
+                          np.array(weights, dtype=np.float32))
+
+    @classmethod
+    def from_csr(cls, csr):
+        """Calcula las matrices a partir de un model.csr_graph.CSRGraph."""
+        offsets = np.asarray(csr.offsets, dtype=np.int64)
+        rows = np.repeat(np.arange(len(csr), dtype=np.int64), np.diff(offsets))
+        return cls._solve(list(csr.ids), rows,
+                          np.asarray(csr.targets, dtype=np.int64),
+                          np.asarray(csr.weights, dtype=np.float32))
+
+    @classmethod
+    def _solve(cls, ids, rows, cols, weights):
+        # Inicializa las matrices con las aristas y aplica las n relajaciones.
+        n = len(ids)
+        dist = np.full((n, n), np.inf, dtype=np.float32)
+        next_hop = np.full((n, n), -1, dtype=np.int32)
+        if len(rows):
+            # Grafo no dirigido: se cargan ambos sentidos, sin lazos.
+            keep = rows != cols
+            rows, cols, weights = rows[keep], cols[keep], weights[keep]
+            dist[rows, cols] = weights
+            dist[cols, rows] = weights
+            next_hop[rows, cols] = cols
+            next_hop[cols, rows] = rows
+        diagonal = np.arange(n)
+        dist[diagonal, diagonal] = 0
+        next_hop[diagonal, diagonal] = diagonal
+
+        # Búferes reutilizados en cada paso para no reservar memoria n x n por iteración.
+        through_k = np.empty((n, n), dtype=np.float32)
+        improved = np.empty((n, n), dtype=bool)
+        for k in range(n):
+            np.add(dist[:, k, None], dist[None, k, :], out=through_k)
+            np.less(through_k, dist, out=improved)
+            np.copyto(dist, through_k, where=improved)
+            np.copyto(next_hop, next_hop[:, k, None], where=improved)
+        return cls(ids, dist, next_hop)
+
+    def distance(self, u, v):
+        # Distancia mínima entre dos ids en O(1) (inf si no hay camino).
+        i, j = self.index.get(u), self.index.get(v)
+        if i is None or j is None:
+            return math.inf
+        d = float(self.dist[i, j])
+        return int(d) if d.is_integer() else d
+
+    def path(self, u, v):
+        # Reconstruye la ruta entre dos ids siguiendo la matriz de siguiente salto.
+        i, j = self.index.get(u), self.index.get(v)
+        if i is None or j is None or self.next_hop[i, j] < 0:
+            return None
+        path = [u]
+        while i != j:
+            i = int(self.next_hop[i, j])
+            path.append(self.ids[i])
+        return path
@@ -0,0 +1,83 @@
+import numpy as np
+
+
+def linear_assignment(cost):
+    """
+    Asignación de costo mínimo (método húngaro con potenciales, O(n² m)).
+
+    cost es una matriz n x m con n <= m (filas: tareas, columnas: agentes);
+    devuelve un arreglo con la columna asignada a cada fila, todas distintas.
+    Si n > m se resuelve la traspuesta: el resultado indica, para cada
+    columna, la fila asignada. Los costos deben ser finitos: los pares
+    prohibidos se representan con un costo muy alto.
+
+    Cada fila toma primero una columna libre de costo mínimo; las demás se
+    agregan con una búsqueda de camino de aumento (Dijkstra sobre costos
+    reducidos). Las operaciones sobre las m columnas están vectorizadas con
+    numpy, de modo que el trabajo en Python es O(n x largo del camino).
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    n, m = cost.shape
+    if n > m:
+        return linear_assignment(cost.T)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    u = np.zeros(n + 1)                   # potencial de cada fila (1..n)
+    v = np.zeros(m + 1)                   # potencial de cada columna (1..m); 0 es ficticia
+    row_of = np.zeros(m + 1, dtype=np.int64)   # fila asignada a cada columna (0 = libre)
+    way = np.zeros(m + 1, dtype=np.int64)      # columna anterior en el camino de aumento
+    # Inicio: potencial de fila = su mínimo, y cada fila toma una columna libre
+    # de costo mínimo si la hay (con empates, que son comunes, casi todas la
+    # encuentran). Solo las filas que quedan sin columna buscan camino de aumento.
+    u[1:] = cost.min(axis=1)
+    pending = []
+    for i in range(1, n + 1):
+        ties = np.flatnonzero(cost[i - 1] == u[i]) + 1
+        free = ties[row_of[ties] == 0]
+        if len(free):
+            row_of[free[0]] = i
+        else:
+            pending.append(i)
+    for i in pending:
+        row_of[0] = i
+        scanned = np.zeros(1, dtype=np.int64)  # columnas que se agregan al árbol en este paso
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[scanned] = True
+            rows = row_of[scanned]
+            reduced = cost[rows - 1] - u[rows][:, None] - v[1:]
+            if len(scanned) == 1:
+                reduced, source = reduced[0], np.full(m, scanned[0])
+            else:
+                # Varias columnas a la vez (empatadas): cada columna libre se
+                # relaja desde la fila que le da menor costo reducido.
+                best = reduced.argmin(axis=0)
+                reduced, source = reduced[best, np.arange(m)], scanned[best]
+            free = ~used[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = source[better]
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            delta = candidates.min()
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_reduced[1:][free] -= delta
+            # Columnas empatadas en el mínimo: si alguna está libre el camino termina
+            # ahí; si no, todas entran juntas al árbol (con costos repetidos, que
+            # son comunes, ahorra muchos pasos).
+            ties = np.flatnonzero(candidates == delta) + 1
+            open_ties = ties[row_of[ties] == 0]
+            if len(open_ties):
+                j0 = int(open_ties[0])
+                break
+            scanned = ties
+        # Aumento: se invierte el camino desde la columna libre encontrada.
+        while j0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+    assignment = np.empty(n, dtype=np.int64)
+    columns = np.nonzero(row_of[1:])[0]
+    assignment[row_of[1:][columns] - 1] = columns
+    return assignment
@@ -0,0 +1,222 @@
+import heapq
+
+
+class BatteryRouter:
+    """
+    Buscador de rutas con restricción de batería (label-setting).
+
+    Cada etiqueta es un estado (nodo, batería_restante). Los estados se expanden
+    en orden de costo con una cola de prioridad, por lo que el primer estado que
+    llega al destino corresponde a la ruta de menor costo. En lugar de copiar la
+    ruta en cada expansión se guardan punteros al estado predecesor.
+
+    Regla de batería (la misma de Simulation.calculate_route): al recorrer una
+    arista se descuenta su peso; si la batería queda negativa y el nodo de
+    llegada es de recarga, el dron recarga por completo.
+
+    Dominancia: un estado ya asentado con el mismo (nodo, batería) y menor costo
+    descarta a los demás. No se descartan estados con distinta batería porque,
+    con la regla de recarga por déficit, tener menos batería puede permitir una
+    recarga completa que un estado con más batería no obtiene.
+
+    Las rutas son simples, como las de calculate_route (que no vuelve a un nodo
+    de la ruta). La búsqueda por estados puede encontrar una ruta más barata
+    que vuelve a un nodo después de desviarse a recargar (por ejemplo O, X, R,
+    X, D con R de recarga); sin recarga entre medio una vuelta nunca mejora el
+    costo. Solo en ese caso se repite la búsqueda con etiquetas que recuerdan
+    los nodos de su ruta (_simple_route), que es exacta pero más cara: casi
+    todas las consultas se resuelven con la búsqueda por estados.
+    """
+
+    def __init__(self, graph):
+        # Guarda una referencia al grafo sobre el que se calculan las rutas.
+        # Sirve cualquier grafo con get_neighbors(nodo) y get_role(nodo), por
+        # ejemplo model.graph.Graph (ids) o model.csr_graph.CSRGraph (índices).
+        self.graph = graph
+
+    def route(self, origin, destination, battery_limit=50, battery=None, heuristic=None):
+        """
+        Devuelve (ruta, costo) de la mejor ruta factible entre origen y destino,
+        o (None, None) si no existe ninguna.
+        battery: batería con la que sale el dron (por defecto llena, battery_limit).
+        heuristic: ver routes_from.
+        """
+        found = self.routes_from(origin, [destination], battery_limit, battery, heuristic)
+        return found.get(destination, (None, None))
+
+    def tree(self, origin, battery_limit=50, targets=None):
+        """
+        Árbol de rutas desde origin con la misma regla de batería que route().
+        Devuelve {nodo: (costo, primer_salto)} con el costo mínimo a cada nodo
+        alcanzable y el primer nodo después de origin en esa ruta (origin para
+        sí mismo). Si se indican
+        targets, la búsqueda termina cuando todos quedan asentados.
+        """
+        if self.graph.get_role(origin) is None:
+            return {}
+        pending = set(targets) if targets is not None else None
+        result = {}
+        parent = {}
+        first = {}      # estado -> primer salto de su ruta
+        recharged = {}  # estado -> si su ruta recargó (solo esas pueden repetir nodos)
+        states = {}     # nodo -> estado con el que quedó asentado
+        for cost, state in self._search(origin, battery_limit, battery_limit, parent):
+            previous = parent[state]
+            if previous is None:
+                first[state] = origin
+                recharged[state] = False
+            else:
+                first[state] = state[0] if parent[previous] is None else first[previous]
+                # Sin recarga la batería siempre baja: si no bajó, el dron recargó.
+                recharged[state] = recharged[previous] or state[1] >= previous[1]
+            node = state[0]
+            if node not in result:
+                result[node] = (cost, first[state])
+                states[node] = state
+                if pending is not None:
+                    pending.discard(node)
+                    if not pending:
+                        break
+        for node, state in states.items():
+            if recharged[state] and not self._is_simple(self._build_path(parent, state)):
+                path, cost = self._simple_route(origin, node, battery_limit, battery_limit)
+                if path is None:
+                    del result[node]
+                else:
+                    result[node] = (cost, path[1] if len(path) > 1 else origin)
+        return result
+
+    def routes_from(self, origin, targets, battery_limit=50, battery=None, heuristic=None):
+        """
+        Mejores rutas desde origin a varios destinos con una sola búsqueda.
+        Devuelve {destino: (ruta, costo)} solo para los destinos alcanzables; la
+        búsqueda termina cuando todos los destinos quedan asentados (el primer
+        estado asentado en un destino es óptimo).
+        battery: batería con la que sale el dron (por defecto llena, battery_limit).
+        heuristic: función nodo -> cota inferior consistente de la distancia al
+        destino más cercano (por ejemplo el camino mínimo sin batería); con
+        ella la búsqueda es un A* y asienta muchos menos estados.
+        """
+        graph = self.graph
+        if graph.get_role(origin) is None:
+            return {}
+        pending = {target for target in targets if graph.get_role(target) is not None}
+        found = {}
+        if not pending:
+            return found
+        battery = battery_limit if battery is None else battery
+        parent = {}
+        for cost, state in self._search(origin, battery_limit, battery, parent, heuristic):
+            node = state[0]
+            if node in pending:
+                pending.discard(node)
+                found[node] = (self._build_path(parent, state), cost)
+                if not pending:
+                    break
+        for node, (path, _) in list(found.items()):
+            if not self._is_simple(path):
+                path, cost = self._simple_route(origin, node, battery_limit, battery, heuristic)
+                if path is None:
+                    del found[node]
+                else:
+                    found[node] = (path, cost)
+        return found
+
+    def _search(self, origin, battery_limit, battery, parent, heuristic=None):
+        # Núcleo común de route, routes_from y tree: entrega (costo, estado) por
+        # cada estado (nodo, batería) en el orden en que se asienta, y completa
+        # parent con el estado predecesor (None para el de partida). Con
+        # heuristic el orden es costo + cota (A*).
+        graph = self.graph
+        start = (origin, battery)
+        best = {start: 0}        # (nodo, batería) -> menor costo conocido
+        parent[start] = None
+        settled = set()
+        # (prioridad, -batería, nodo, batería): a igual prioridad se prefiere más batería.
+        heap = [(heuristic(origin) if heuristic else 0, -battery, origin, battery)]
+        while heap:
+            _, _, node, battery = heapq.heappop(heap)
+            state = (node, battery)
+            if state in settled:
+                continue
+            settled.add(state)
+            # Con una cota consistente la primera salida de un estado es la de menor costo.
+            cost = best[state]
+            yield cost, state
+
+            for next_node, edge_cost in graph.get_neighbors(node):
+                new_battery = battery - edge_cost
+                if new_battery < 0:
+                    if graph.get_role(next_node) != "recharge":
+                        continue
+                    new_battery = battery_limit  # Recargar completamente
+
+                next_state = (next_node, new_battery)
+                if next_state in settled:
+                    continue
+                new_cost = cost + edge_cost
+                if new_cost < best.get(next_state, float('inf')):
+                    best[next_state] = new_cost
+                    parent[next_state] = state
+                    priority = new_cost + heuristic(next_node) if heuristic else new_cost
+                    heapq.heappush(heap, (priority, -new_battery, next_node, new_battery))
+
+    def _simple_route(self, origin, destination, battery_limit, battery, heuristic=None):
+        # Mejor ruta simple (sin repetir nodos) de origin a destination: (ruta, costo)
+        # o (None, None). Cada etiqueta guarda los nodos de su ruta como máscara de
+        # bits; una etiqueta queda descartada si otra ya asentada en el mismo
+        # (nodo, batería), con costo menor o igual, visitó un subconjunto de sus
+        # nodos (todo lo que la primera puede hacer después, la segunda también).
+        graph = self.graph
+        bits = {}
+
+        def bit(node):
+            if node not in bits:
+                bits[node] = 1 << len(bits)
+            return bits[node]
+
+        labels = [(origin, battery, 0, bit(origin), None)]   # (nodo, batería, costo, máscara, etiqueta anterior)
+        heap = [(heuristic(origin) if heuristic else 0, -battery, 0)]
+        settled = {}  # (nodo, batería) -> máscaras de las etiquetas asentadas
+        while heap:
+            _, _, label = heapq.heappop(heap)
+            node, battery, cost, mask, _ = labels[label]
+            masks = settled.setdefault((node, battery), [])
+            if any(other & ~mask == 0 for other in masks):
+                continue
+            masks.append(mask)
+            if node == destination:
+                path = []
+                while label is not None:
+                    path.append(labels[label][0])
+                    label = labels[label][4]
+                path.reverse()
+                return path, cost
+
+            for next_node, edge_cost in graph.get_neighbors(node):
+                next_bit = bit(next_node)
+                if mask & next_bit:
+                    continue
+                new_battery = battery - edge_cost
+                if new_battery < 0:
+                    if graph.get_role(next_node) != "recharge":
+                        continue
+                    new_battery = battery_limit
+                new_cost = cost + edge_cost
+                labels.append((next_node, new_battery, new_cost, mask | next_bit, label))
+                priority = new_cost + heuristic(next_node) if heuristic else new_cost
+                heapq.heappush(heap, (priority, -new_battery, len(labels) - 1))
+        return None, None
+
+    @staticmethod
+    def _is_simple(path):
+        return len(set(path)) == len(path)
+
+    def _build_path(self, parent, state):
+        # Reconstruye la ruta siguiendo los punteros a los estados predecesores.
+        path = []
+        while state is not None:
+            path.append(state[0])
+            state = parent[state]
+        path.reverse()
+        return path
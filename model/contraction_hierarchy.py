@@ -0,0 +1,332 @@
+import heapq
+import math
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b"DRCHIER\0"
+FORMAT_VERSION = 2
+# magic, versión, n, entradas de up, atajos, tipo de peso, largo de ids, firma del grafo, crc32
+HEADER_FORMAT = "<8sIQQQcxxxQII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+class ContractionHierarchy:
+    """
+    Jerarquía de contracción (CH) para consultas repetidas de camino mínimo.
+
+    El preprocesamiento contrae los nodos de a uno, en el orden dado por una
+    prioridad (diferencia de aristas + vecinos ya contraídos), y agrega aristas
+    atajo (shortcuts) cuando la búsqueda de testigos no encuentra un camino
+    alternativo igual o más corto. Cada nodo conserva solo las aristas hacia
+    nodos de mayor rango (grafo de búsqueda ascendente).
+
+    Una consulta es una búsqueda bidireccional sobre el grafo ascendente desde
+    el origen y desde el destino (el grafo es no dirigido, así que la parte
+    descendente coincide con la ascendente). Los atajos de la ruta encontrada se
+    desempaquetan de vuelta a los ids originales.
+
+    La estructura es serializable (save/load) para que la API la cargue al
+    iniciar en lugar de reconstruirla. El archivo sigue el estilo de
+    model.snapshot (little-endian, secciones alineadas a 8 bytes, CRC32 del
+    contenido) y no ejecuta nada al cargarse:
+
+        cabecera   HEADER_FORMAT
+        rank       int32[n]
+        offsets    int64[n + 1]    inicio de las aristas ascendentes de cada nodo
+        targets    int32[e]
+        weights    int64[e] o float64[e]
+        via        int32[3 * atajos]   (a, b, intermedio) de cada atajo
+        ids        int64[n + 1] + bytes UTF-8   (los ids se guardan como str)
+    """
+
+    def __init__(self, ids, rank, up, via, signature):
+        # ids: id original de cada índice; rank: orden de contracción de cada nodo.
+        # up: por nodo, lista de (vecino_de_mayor_rango, peso).
+        # via: {(a, b) con a < b: nodo intermedio} para cada atajo.
+        # signature: firma del grafo del que se construyó la jerarquía.
+        self.ids = ids
+        self.index = {id: i for i, id in enumerate(ids)}
+        self.rank = rank
+        self.up = up
+        self.via = via
+        self.signature = signature
+
+    @staticmethod
+    def graph_signature(graph):
+        # Firma (CRC32) de los nodos y aristas, para detectar jerarquías desactualizadas.
+        crc = 0
+        for id in sorted(graph.vertices):
+            crc = zlib.crc32(f"{id};".encode(), crc)
+        for u, v, w in sorted((min(u, v), max(u, v), w) for u, v, w in graph.edges()):
+            crc = zlib.crc32(f"{u},{v},{w};".encode(), crc)
+        return crc
+
+    def matches(self, graph):
+        # Indica si la jerarquía corresponde al estado actual del grafo.
+        return self.signature == self.graph_signature(graph)
+
+    # ------------------------------------------------------------------
+    # Preprocesamiento
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(cls, graph, witness_limit=60):
+        """
+        Construye la jerarquía para un model.graph.Graph.
+        witness_limit acota los nodos asentados en cada búsqueda de testigos;
+        si se agota se agrega el atajo (más atajos, pero siempre correcto).
+        """
+        ids = list(graph.vertices.keys())
+        index = {id: i for i, id in enumerate(ids)}
+        n = len(ids)
+        # Grafo remanente (sin nodos contraídos), incluyendo atajos.
+        adj = [dict() for _ in range(n)]
+        for u, v, w in graph.edges():
+            a, b = index[u], index[v]
+            if a != b and w < adj[a].get(b, math.inf):
+                adj[a][b] = w
+                adj[b][a] = w
+
+        via = {}
+        rank = [-1] * n
+        up = [None] * n
+        contracted_neighbors = [0] * n
+
+        def shortcuts_for(v):
+            # Atajos necesarios para contraer v: lista de (u, w, costo).
+            needed = []
+            neighbors = list(adj[v].items())
+            for i, (u, wu) in enumerate(neighbors):
+                targets = {w: wu + ww for w, ww in neighbors[i + 1:]}
+                if not targets:
+                    continue
+                witness = cls._witness_search(adj, u, v, max(targets.values()), targets, witness_limit)
+                for w, cost in targets.items():
+                    if witness.get(w, math.inf) > cost:
+                        needed.append((u, w, cost))
+            return needed
+
+        def priority(v):
+            return len(shortcuts_for(v)) - len(adj[v]) + contracted_neighbors[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if rank[v] != -1:
+                continue
+            # Actualización perezosa: si la prioridad empeoró, se reinserta.
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+            for u, w, cost in shortcuts_for(v):
+                if cost < adj[u].get(w, math.inf):
+                    adj[u][w] = cost
+                    adj[w][u] = cost
+                    via[(min(u, w), max(u, w))] = v
+            rank[v] = order
+            order += 1
+            up[v] = list(adj[v].items())
+            for u in adj[v]:
+                del adj[u][v]
+                contracted_neighbors[u] += 1
+            adj[v] = {}
+
+        return cls(ids, rank, up, via, cls.graph_signature(graph))
+
+    @staticmethod
+    def _witness_search(adj, source, skip, max_cost, targets, limit):
+        # Dijkstra acotado desde source que ignora el nodo skip.
+        dist = {source: 0}
+        heap = [(0, source)]
+        settled = 0
+        pending = len(targets)
+        while heap and settled < limit:
+            cost, node = heapq.heappop(heap)
+            if cost > dist[node]:
+                continue
+            if cost > max_cost:
+                break
+            settled += 1
+            if node in targets:
+                pending -= 1
+                if pending == 0:
+                    break
+            for next_node, weight in adj[node].items():
+                if next_node == skip:
+                    continue
+                new_cost = cost + weight
+                if new_cost <= max_cost and new_cost < dist.get(next_node, math.inf):
+                    dist[next_node] = new_cost
+                    heapq.heappush(heap, (new_cost, next_node))
+        return dist
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def query(self, origin, destination):
+        """Camino mínimo entre dos ids. Devuelve (ruta, costo) o (None, None)."""
+        s, t = self.index.get(origin), self.index.get(destination)
+        if s is None or t is None:
+            return None, None
+        if s == t:
+            return [origin], 0
+
+        up = self.up
+        dist = ({s: 0}, {t: 0})
+        parent = ({s: None}, {t: None})
+        heaps = ([(0, s)], [(0, t)])
+        best, meet = math.inf, None
+        while heaps[0] or heaps[1]:
+            for side in (0, 1):
+                heap = heaps[side]
+                if not heap:
+                    continue
+                if heap[0][0] >= best:
+                    heap.clear()
+                    continue
+                cost, node = heapq.heappop(heap)
+                if cost > dist[side][node]:
+                    continue
+                other = dist[1 - side].get(node)
+                if other is not None and cost + other < best:
+                    best, meet = cost + other, node
+                for next_node, weight in up[node]:
+                    new_cost = cost + weight
+                    if new_cost < dist[side].get(next_node, math.inf):
+                        dist[side][next_node] = new_cost
+                        parent[side][next_node] = node
+                        heapq.heappush(heap, (new_cost, next_node))
+
+        if meet is None:
+            return None, None
+        forward = []
+        node = meet
+        while node is not None:
+            forward.append(node)
+            node = parent[0][node]
+        forward.reverse()
+        node = parent[1][meet]
+        while node is not None:
+            forward.append(node)
+            node = parent[1][node]
+        return [self.ids[i] for i in self._unpack(forward)], best
+
+    def _unpack(self, path):
+        # Reemplaza cada atajo (a, b) por (a, via) + (via, b) de forma iterativa.
+        result = [path[0]]
+        stack = [(a, b) for a, b in zip(reversed(path[:-1]), reversed(path[1:]))]
+        while stack:
+            a, b = stack.pop()
+            middle = self.via.get((min(a, b), max(a, b)))
+            if middle is None:
+                result.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+        return result
+
+    # ------------------------------------------------------------------
+    # Serialización
+    # ------------------------------------------------------------------
+    def save(self, filename):
+        # Guarda la jerarquía en un archivo binario (ver el formato en la clase).
+        offsets, targets, weights = array('q', [0]), array('i'), []
+        for edges in self.up:
+            for node, weight in edges:
+                targets.append(node)
+                weights.append(weight)
+            offsets.append(len(targets))
+        weight_code = 'q' if all(isinstance(weight, int) for weight in weights) else 'd'
+        via = array('i')
+        for (a, b), middle in self.via.items():
+            via.extend((a, b, middle))
+        blobs = [str(id).encode("utf-8") for id in self.ids]
+        string_offsets = array('q', [0])
+        for blob in blobs:
+            string_offsets.append(string_offsets[-1] + len(blob))
+        sections = [_to_bytes(array('i', self.rank)), _to_bytes(offsets), _to_bytes(targets),
+                    _to_bytes(array(weight_code, weights)), _to_bytes(via), _to_bytes(string_offsets),
+                    b"".join(blobs)]
+        payload = b"".join(section + b"\0" * _pad(len(section)) for section in sections)
+        header = struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, len(self.ids), len(targets), len(self.via),
+                             weight_code.encode(), len(sections[-1]), self.signature, zlib.crc32(payload))
+        with open(filename, "wb") as f:
+            f.write(header + payload)
+
+    @classmethod
+    def load(cls, filename):
+        # Carga una jerarquía guardada con save(). Lanza ValueError si el archivo no
+        # es una jerarquía, es de otra versión o está dañado.
+        with open(filename, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER_SIZE:
+            raise ValueError("Archivo de jerarquía truncado")
+        magic, version, n, entries, shortcuts, weight_code, ids_size, signature, checksum = struct.unpack(
+            HEADER_FORMAT, data[:HEADER_SIZE])
+        if magic != MAGIC:
+            raise ValueError("El archivo no es una jerarquía guardada por ContractionHierarchy")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versión de jerarquía no soportada: {version}")
+        if zlib.crc32(data[HEADER_SIZE:]) != checksum:
+            raise ValueError("Checksum inválido: el archivo de jerarquía está dañado")
+
+        layout = [('i', n), ('q', n + 1), ('i', entries), (weight_code.decode(), entries),
+                  ('i', 3 * shortcuts), ('q', n + 1), ('B', ids_size)]
+        position = HEADER_SIZE
+        sections = []
+        for typecode, count in layout:
+            size = struct.calcsize(typecode) * count
+            if position + size > len(data):
+                raise ValueError("Archivo de jerarquía truncado")
+            sections.append(_from_bytes(data[position:position + size], typecode))
+            position += size + _pad(size)
+        rank, offsets, targets, weights, via_triples, string_offsets, blob = sections
+
+        pairs = list(zip(targets.tolist(), weights.tolist()))
+        up = [pairs[offsets[i]:offsets[i + 1]] for i in range(n)]
+        triples = via_triples.tolist()
+        via = {(triples[k], triples[k + 1]): triples[k + 2] for k in range(0, len(triples), 3)}
+        raw = blob.tobytes()
+        ids = [raw[string_offsets[i]:string_offsets[i + 1]].decode("utf-8") for i in range(n)]
+        return cls(ids, rank.tolist(), up, via, signature)
+
+    @classmethod
+    def load_or_build(cls, graph, filename):
+        """
+        Carga la jerarquía desde filename si corresponde al grafo; si no existe o
+        está desactualizada, la construye y la guarda.
+        """
+        try:
+            hierarchy = cls.load(filename)
+            if hierarchy.matches(graph):
+                return hierarchy
+        except (OSError, ValueError):
+            pass
+        hierarchy = cls.build(graph)
+        hierarchy.save(filename)
+        return hierarchy
+
+
+def _pad(size):
+    return (-size) % 8
+
+
+def _to_bytes(values):
+    # Bytes little-endian de un array.
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(data, typecode):
+    # array con el typecode indicado a partir de bytes little-endian.
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
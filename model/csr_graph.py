@@ -0,0 +1,260 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+from model.all_pairs import AllPairsShortestPaths
+from model.battery_router import BatteryRouter
+from model.graph import Graph
+
+# Códigos compactos para el rol de cada nodo.
+ROLES = ("client", "storage", "recharge")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+
+class CSRGraph:
+    """
+    Representación compacta e inmutable de un grafo no dirigido en formato CSR
+    (compressed sparse row).
+
+    Los nodos se identifican por índices enteros 0..n-1. Los vecinos del nodo i
+    ocupan targets[offsets[i]:offsets[i + 1]] y sus pesos el mismo tramo de
+    weights. El rol y las coordenadas se guardan en arreglos paralelos, de modo
+    que el grafo completo vive en unos pocos bloques de memoria contigua.
+
+    Los métodos públicos de consulta (dijkstra, kruskal_mst, battery_route, ...)
+    reciben y devuelven los ids originales, igual que model.graph.Graph.
+    """
+
+    __slots__ = ("ids", "offsets", "targets", "weights", "roles", "lats", "lons",
+                 "_index", "_edge_count", "_all_pairs")
+
+    def __init__(self, ids, offsets, targets, weights, roles, lats, lons, edge_count=None):
+        # ids: lista con el id original de cada índice.
+        # offsets: arreglo de n + 1 posiciones con el inicio de cada lista de adyacencia.
+        # targets/weights: vecinos y pesos de todas las listas de adyacencia.
+        # roles: código de rol por nodo (ver ROLES); lats/lons: coordenadas (NaN si no hay).
+        self.ids = ids
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.roles = roles
+        self.lats = lats
+        self.lons = lons
+        self._index = {id: i for i, id in enumerate(ids)}
+        if edge_count is None:
+            # Cada arista aparece dos veces salvo los lazos (u, u).
+            loops = sum(1 for i in range(len(ids))
+                        for k in range(offsets[i], offsets[i + 1]) if targets[k] == i)
+            edge_count = (len(targets) - loops) // 2 + loops
+        self._edge_count = edge_count
+        self._all_pairs = None
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Construye la representación CSR a partir de un model.graph.Graph."""
+        ids = list(graph.vertices.keys())
+        index = {id: i for i, id in enumerate(ids)}
+        offsets = array('q', [0])
+        targets = array('i')
+        weights = []
+        roles = array('b')
+        lats = array('d')
+        lons = array('d')
+        loops = 0
+        for id in ids:
+            vertex = graph.vertices[id]
+            for neighbor, weight in vertex.neighbors.items():
+                j = index[neighbor]
+                targets.append(j)
+                weights.append(weight)
+                if neighbor == id:
+                    loops += 1
+            offsets.append(len(targets))
+            roles.append(ROLE_CODES.get(vertex.role, 0))
+            lats.append(vertex.lat if vertex.lat is not None else math.nan)
+            lons.append(vertex.lon if vertex.lon is not None else math.nan)
+        # Pesos enteros en un arreglo de enteros (se conservan como int al
+        # volver a Graph); cualquier otro caso en punto flotante.
+        integral = all(type(w) is int and -2**31 <= w < 2**31 for w in weights)
+        weights = array('i' if integral else 'd', weights)
+        return cls(ids, offsets, targets, weights, roles, lats, lons,
+                   edge_count=(len(targets) - loops) // 2 + loops)
+
+    @classmethod
+    def from_edge_arrays(cls, ids, src, dst, weights, roles, lats, lons):
+        """
+        Construye el grafo a partir de arreglos NumPy de aristas no dirigidas
+        (src[k], dst[k], weights[k]), sin duplicados ni lazos, y de arreglos
+        paralelos de roles (códigos de ROLES) y coordenadas.
+        """
+        n = len(ids)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        weights = np.asarray(weights)
+        # Cada arista se guarda en ambos sentidos, ordenada por nodo de origen.
+        heads = np.concatenate([src, dst])
+        tails = np.concatenate([dst, src])
+        order = np.argsort(heads, kind="stable")
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=n), out=offsets[1:])
+        integral = np.issubdtype(weights.dtype, np.integer)
+        both = np.concatenate([weights, weights])[order]
+        return cls(list(ids),
+                   cls._typed(offsets, 'q', np.int64),
+                   cls._typed(tails[order], 'i', np.int32),
+                   cls._typed(both, 'i' if integral else 'd', np.int32 if integral else np.float64),
+                   cls._typed(roles, 'b', np.int8),
+                   cls._typed(lats, 'd', np.float64),
+                   cls._typed(lons, 'd', np.float64),
+                   edge_count=len(src))
+
+    @staticmethod
+    def _typed(values, typecode, dtype):
+        # Copia un arreglo NumPy a un array.array del tipo indicado.
+        result = array(typecode)
+        result.frombytes(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        return result
+
+    def to_graph(self):
+        """Reconstruye un model.graph.Graph equivalente."""
+        graph = Graph()
+        for i, id in enumerate(self.ids):
+            lat, lon = self.lats[i], self.lons[i]
+            graph.add_vertex(id, ROLES[self.roles[i]],
+                             None if math.isnan(lat) else lat,
+                             None if math.isnan(lon) else lon)
+        # Las listas de adyacencia se copian directo del CSR: el grafo recién creado
+        # no tiene suscriptores ni cachés que avisar arista por arista.
+        ids = self.ids
+        offsets = list(self.offsets)
+        neighbor_ids = [ids[t] for t in self.targets]
+        weights = list(self.weights)
+        for i, id in enumerate(ids):
+            start, end = offsets[i], offsets[i + 1]
+            graph.vertices[id].neighbors = dict(zip(neighbor_ids[start:end], weights[start:end]))
+        graph._edge_count = self.edge_count()
+        graph.version += graph._edge_count
+        return graph
+
+    def __reduce__(self):
+        # Permite enviar el grafo a otros procesos (las vistas de mmap se copian a arreglos).
+        def as_array(values):
+            if isinstance(values, memoryview):
+                return array(values.format, values.tobytes())
+            return values
+        return (CSRGraph, (self.ids, as_array(self.offsets), as_array(self.targets),
+                           as_array(self.weights), as_array(self.roles),
+                           as_array(self.lats), as_array(self.lons), self._edge_count))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, i):
+        # Permite usar 'in' con índices enteros, igual que con Graph.vertices.
+        return isinstance(i, int) and 0 <= i < len(self.ids)
+
+    def index_of(self, id):
+        # Devuelve el índice entero de un id original (None si no existe).
+        return self._index.get(id)
+
+    def edge_count(self):
+        return self._edge_count
+
+    def get_neighbors(self, i):
+        # Devuelve los pares (índice_vecino, peso) del nodo i.
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def get_role(self, i):
+        # Devuelve el rol del nodo i (None si el índice no existe).
+        return ROLES[self.roles[i]] if i in self else None
+
+    def edges(self):
+        """Generador de aristas (u, v, peso) en índices, cada una una sola vez."""
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        for i in range(len(self.ids)):
+            for k in range(offsets[i], offsets[i + 1]):
+                if targets[k] >= i:
+                    yield i, targets[k], weights[k]
+
+    def dijkstra(self, start, end):
+        """Camino mínimo entre dos ids. Devuelve (ruta, costo) o (None, None)."""
+        s, t = self._index.get(start), self._index.get(end)
+        if s is None or t is None:
+            return None, None
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        dist = [math.inf] * len(self.ids)
+        pred = [-1] * len(self.ids)
+        done = bytearray(len(self.ids))
+        dist[s] = 0
+        heap = [(0, s)]
+        while heap:
+            cost, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = 1
+            if u == t:
+                path = [t]
+                while path[-1] != s:
+                    path.append(pred[path[-1]])
+                path.reverse()
+                return [self.ids[i] for i in path], cost
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = cost + weights[k]
+                if new_cost < dist[v]:
+                    dist[v] = new_cost
+                    pred[v] = u
+                    heapq.heappush(heap, (new_cost, v))
+        return None, None
+
+    def kruskal_mst(self):
+        """Árbol de expansión mínima (Kruskal). Devuelve aristas (u, v, peso) con ids."""
+        parent = list(range(len(self.ids)))
+
+        def find(u):
+            while parent[u] != u:
+                parent[u] = parent[parent[u]]
+                u = parent[u]
+            return u
+
+        mst = []
+        for u, v, w in sorted(self.edges(), key=lambda e: e[2]):
+            pu, pv = find(u), find(v)
+            if pu != pv:
+                parent[pu] = pv
+                mst.append((self.ids[u], self.ids[v], w))
+                if len(mst) == len(self.ids) - 1:
+                    break
+        return mst
+
+    def floyd_warshall(self):
+        """
+        Devuelve los caminos mínimos entre todos los pares (AllPairsShortestPaths).
+        Como el grafo es inmutable, el resultado se calcula una sola vez.
+        """
+        if self._all_pairs is None:
+            self._all_pairs = AllPairsShortestPaths.from_csr(self)
+        return self._all_pairs
+
+    def distance(self, start, end):
+        # Distancia mínima entre dos ids en O(1) usando la caché de todos los pares.
+        return self.floyd_warshall().distance(start, end)
+
+    def reconstruct_fw_path(self, start, end, all_pairs=None):
+        # Reconstruye la ruta (con ids); por defecto usa la caché de todos los pares.
+        if all_pairs is None:
+            all_pairs = self.floyd_warshall()
+        return all_pairs.path(start, end)
+
+    def battery_route(self, origin, destination, battery_limit=50):
+        """Ruta con restricción de batería (ver BatteryRouter) entre dos ids."""
+        s, t = self._index.get(origin), self._index.get(destination)
+        if s is None or t is None:
+            return None, None
+        path, cost = BatteryRouter(self).route(s, t, battery_limit)
+        if path is None:
+            return None, None
+        return [self.ids[i] for i in path], cost
@@ -0,0 +1,159 @@
+import heapq
+import math
+
+
+class DepotPartition:
+    """
+    Partición de la red en zonas de depósito (diagrama de Voronoi sobre el grafo).
+
+    Un Dijkstra multi-origen que parte de todos los vértices con el rol dado
+    (por defecto "storage") calcula en una sola pasada, para cada nodo:
+    - owner[nodo]: depósito más cercano,
+    - dist[nodo]: distancia a ese depósito,
+    - pred[nodo]: nodo anterior en el camino desde el depósito.
+
+    La partición se mantiene con Graph.add_listener: al agregar o cambiar una
+    arista solo se recalcula la parte afectada (el subárbol que colgaba de la
+    arista si era parte del árbol, y los nodos que mejoran con ella). Los
+    cambios de rol hechos directamente sobre Vertex.role no generan eventos:
+    en ese caso hay que llamar a rebuild().
+    """
+
+    def __init__(self, graph, role="storage"):
+        self.graph = graph
+        self.role = role
+        self.owner = {}
+        self.dist = {}
+        self.pred = {}
+        self.children = {}  # nodo -> hijos en el árbol de caminos mínimos
+        self.rebuild()
+        graph.add_listener(self._on_graph_change)
+
+    def rebuild(self):
+        # Recalcula la partición completa con un Dijkstra multi-origen.
+        self.owner = {id: None for id in self.graph.vertices}
+        self.dist = {id: math.inf for id in self.graph.vertices}
+        self.pred = {id: None for id in self.graph.vertices}
+        self.children = {id: set() for id in self.graph.vertices}
+        heap = []
+        for id, vertex in self.graph.vertices.items():
+            if vertex.role == self.role:
+                self.owner[id] = id
+                self.dist[id] = 0
+                heap.append((0, id))
+        heapq.heapify(heap)
+        self._propagate(heap)
+
+    def detach(self):
+        # Deja de seguir los cambios del grafo.
+        self.graph.remove_listener(self._on_graph_change)
+
+    def depot_of(self, node):
+        # Depósito más cercano a node (None si no hay ninguno alcanzable), en O(1).
+        return self.owner.get(node)
+
+    def distance_to_depot(self, node):
+        # Distancia de node a su depósito (inf si no hay ninguno alcanzable).
+        return self.dist.get(node, math.inf)
+
+    def path_from_depot(self, node):
+        # Camino desde el depósito de node hasta node (None si no hay depósito alcanzable).
+        if self.owner.get(node) is None:
+            return None
+        path = []
+        while node is not None:
+            path.append(node)
+            node = self.pred[node]
+        path.reverse()
+        return path
+
+    def depots(self):
+        # Lista de depósitos (vértices con el rol de la partición).
+        return [id for id, owner in self.owner.items() if owner == id]
+
+    def regions(self):
+        # Diccionario depósito -> lista de nodos de su zona.
+        regions = {depot: [] for depot in self.depots()}
+        for node, owner in self.owner.items():
+            if owner is not None:
+                regions[owner].append(node)
+        return regions
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _propagate(self, heap):
+        # Dijkstra desde las entradas del heap (cuyos nodos ya tienen dist/owner/pred asignados).
+        graph, dist = self.graph, self.dist
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for neighbor, weight in graph.get_neighbors(node):
+                new_dist = d + weight
+                if new_dist < dist[neighbor]:
+                    self._attach(neighbor, node, new_dist)
+                    heapq.heappush(heap, (new_dist, neighbor))
+
+    def _attach(self, node, parent, d):
+        # Cuelga node de parent en el árbol con distancia d.
+        old = self.pred[node]
+        if old is not None:
+            self.children[old].discard(node)
+        self.pred[node] = parent
+        self.children[parent].add(node)
+        self.dist[node] = d
+        self.owner[node] = self.owner[parent]
+
+    def _on_graph_change(self, event, *args):
+        if event == "vertex":
+            id = args[0]
+            self.children[id] = set()
+            self.pred[id] = None
+            is_depot = self.graph.vertices[id].role == self.role
+            self.owner[id] = id if is_depot else None
+            self.dist[id] = 0 if is_depot else math.inf
+        elif event == "edge":
+            self._update_edge(*args)
+
+    def _update_edge(self, u, v, weight):
+        # Si la arista era parte del árbol, su peso pudo subir: se invalida el
+        # subtree que colgaba de ella y se vuelve a conectar desde sus vecinos.
+        heap = []
+        for parent, child in ((u, v), (v, u)):
+            if self.pred[child] == parent:
+                heap.extend(self._detach_subtree(child))
+        # Luego se relaja la arista en ambos sentidos (sirve para aristas nuevas o más baratas).
+        for a, b in ((u, v), (v, u)):
+            new_dist = self.dist[a] + weight
+            if new_dist < self.dist[b]:
+                self._attach(b, a, new_dist)
+                heap.append((new_dist, b))
+        heapq.heapify(heap)
+        self._propagate(heap)
+
+    def _detach_subtree(self, root):
+        # Deja sin depósito todo el subárbol de root y devuelve las mejores
+        # entradas para reconectarlo desde los nodos que siguen asignados.
+        graph = self.graph
+        self.children[self.pred[root]].discard(root)
+        self.pred[root] = None
+        subtree = [root]
+        for node in subtree:
+            subtree.extend(self.children[node])
+        removed = set(subtree)
+        for node in subtree:
+            self.children[node] = set()
+            self.pred[node] = None
+            self.owner[node] = None
+            self.dist[node] = math.inf
+        entries = []
+        for node in subtree:
+            for neighbor, weight in graph.get_neighbors(node):
+                if neighbor not in removed and self.owner[neighbor] is not None:
+                    new_dist = self.dist[neighbor] + weight
+                    if new_dist < self.dist[node]:
+                        self._attach(node, neighbor, new_dist)
+            if self.owner[node] is not None:
+                entries.append((self.dist[node], node))
+        return entries
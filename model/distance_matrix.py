@@ -0,0 +1,142 @@
+import heapq
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model.battery_router import BatteryRouter
+from model.csr_graph import CSRGraph
+
+# A partir de este tamaño (orígenes x nodos) conviene repartir los orígenes entre procesos.
+PARALLEL_THRESHOLD = 2_000_000
+
+
+class DistanceMatrix:
+    """
+    Resultado de distance_matrix.
+
+    dist[i, j] es el costo mínimo de sources[i] a targets[j] (inf si no hay
+    ruta). next_hop[i, j], si se pidió, es el índice (en node_ids) del primer
+    nodo después de sources[i] en esa ruta, o -1 si no hay ruta.
+    """
+
+    def __init__(self, sources, targets, dist, next_hop, node_ids):
+        self.sources = sources
+        self.targets = targets
+        self.dist = dist
+        self.next_hop = next_hop
+        self.node_ids = node_ids
+
+    def next_hop_id(self, i, j):
+        # Id del primer salto de sources[i] hacia targets[j] (None si no hay ruta).
+        if self.next_hop is None or self.next_hop[i, j] < 0:
+            return None
+        return self.node_ids[self.next_hop[i, j]]
+
+    def hop_table(self):
+        # Primeros saltos compactos: (ids, tabla int32) con tabla[i, j] índice en ids o -1.
+        # Solo lista los nodos que aparecen como primer salto, no todo node_ids.
+        used = np.unique(self.next_hop[self.next_hop >= 0])
+        table = np.where(self.next_hop >= 0, np.searchsorted(used, self.next_hop), -1).astype(np.int32)
+        return [self.node_ids[k] for k in used.tolist()], table
+
+
+def distance_matrix(graph, sources, targets, battery_limit=None, next_hop=False, workers=None):
+    """
+    Matriz de costos de cada origen a cada destino.
+
+    Se calcula un árbol de caminos mínimos por origen (Dijkstra, o la búsqueda
+    con batería de BatteryRouter si se indica battery_limit) que se detiene
+    cuando todos los destinos quedan asentados. En grafos grandes los orígenes
+    se reparten en un pool de procesos (workers=None usa os.cpu_count();
+    workers=1 fuerza el cálculo secuencial).
+
+    graph puede ser un model.graph.Graph (se usa su CSR en caché, Graph.csr)
+    o un CSRGraph. Los ids desconocidos quedan con costo inf.
+    """
+    csr = graph if isinstance(graph, CSRGraph) else graph.csr()
+    source_idx = [csr.index_of(s) for s in sources]
+    target_idx = [csr.index_of(t) for t in targets]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = [source_idx]
+    if workers > 1 and len(source_idx) > 1 and len(source_idx) * len(csr) >= PARALLEL_THRESHOLD:
+        size = math.ceil(len(source_idx) / workers)
+        chunks = [source_idx[i:i + size] for i in range(0, len(source_idx), size)]
+
+    if len(chunks) == 1:
+        rows = _rows(csr, source_idx, target_idx, battery_limit, next_hop)
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_worker,
+                                 initargs=(csr, target_idx, battery_limit, next_hop)) as pool:
+            parts = list(pool.map(_worker_rows, chunks))
+        rows = (np.concatenate([p[0] for p in parts]),
+                np.concatenate([p[1] for p in parts]) if next_hop else None)
+
+    dist, hops = rows
+    return DistanceMatrix(list(sources), list(targets), dist, hops, csr.ids)
+
+
+def _rows(csr, source_idx, target_idx, battery_limit, next_hop):
+    # Calcula las filas de la matriz para una lista de orígenes (índices CSR).
+    dist = np.full((len(source_idx), len(target_idx)), np.inf)
+    hops = np.full((len(source_idx), len(target_idx)), -1, dtype=np.int32) if next_hop else None
+    wanted = {t for t in target_idx if t is not None}
+    router = BatteryRouter(csr) if battery_limit is not None else None
+    for i, s in enumerate(source_idx):
+        if s is None:
+            continue
+        if router is not None:
+            tree = router.tree(s, battery_limit, wanted)
+        else:
+            tree = _dijkstra_tree(csr, s, wanted)
+        for j, t in enumerate(target_idx):
+            entry = tree.get(t)
+            if entry is not None:
+                dist[i, j] = entry[0]
+                if hops is not None:
+                    hops[i, j] = entry[1]
+    return dist, hops
+
+
+def _dijkstra_tree(csr, source, targets):
+    # Dijkstra desde source sobre el CSR. Devuelve {nodo: (costo, primer_salto)}
+    # y se detiene cuando todos los targets quedan asentados.
+    offsets, nodes, weights = csr.offsets, csr.targets, csr.weights
+    pending = set(targets)
+    best = {source: 0}
+    first = {source: source}
+    result = {}
+    heap = [(0, source)]
+    while heap:
+        cost, u = heapq.heappop(heap)
+        if u in result:
+            continue
+        result[u] = (cost, first[u])
+        pending.discard(u)
+        if not pending:
+            break
+        for k in range(offsets[u], offsets[u + 1]):
+            v = nodes[k]
+            new_cost = cost + weights[k]
+            if new_cost < best.get(v, math.inf):
+                best[v] = new_cost
+                first[v] = v if u == source else first[u]
+                heapq.heappush(heap, (new_cost, v))
+    return result
+
+
+# Estado de cada proceso del pool (se inicializa una sola vez por proceso).
+_worker_state = None
+
+
+def _init_worker(csr, target_idx, battery_limit, next_hop):
+    global _worker_state
+    _worker_state = (csr, target_idx, battery_limit, next_hop)
+
+
+def _worker_rows(source_idx):
+    csr, target_idx, battery_limit, next_hop = _worker_state
+    return _rows(csr, source_idx, target_idx, battery_limit, next_hop)
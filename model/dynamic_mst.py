@@ -0,0 +1,129 @@
+from collections import deque
+
+
+class DynamicMST:
+    """
+    Árbol (bosque) de expansión mínima mantenido de forma incremental.
+
+    Se construye una vez con Kruskal y luego se actualiza con cada cambio del
+    grafo (se suscribe con Graph.add_listener):
+    - arista nueva o que baja de peso fuera del árbol: reemplazo del máximo del
+      ciclo (si la arista es más liviana que la arista más pesada del camino
+      entre sus extremos en el árbol, la reemplaza);
+    - arista del árbol que baja de peso: solo se actualiza el peso;
+    - arista del árbol que sube de peso: se corta y se reconecta con la arista
+      más liviana que cruza el corte.
+
+    El conjunto de aristas (edges) y el peso total (total_weight) se consultan
+    en O(1). Kruskal sigue disponible con rebuild() para cargas masivas y con
+    verify() para comprobar el resultado.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.tree = {}            # nodo -> {vecino: peso} (aristas del árbol)
+        self._edges = {}          # frozenset({u, v}) -> (u, v, peso)
+        self.total_weight = 0
+        self.rebuild()
+        graph.add_listener(self._on_graph_change)
+
+    @property
+    def edges(self):
+        # Vista (sin copiar) de las aristas (u, v, peso) del árbol.
+        return self._edges.values()
+
+    def rebuild(self):
+        # Recalcula el árbol completo con Kruskal.
+        self.tree = {id: {} for id in self.graph.vertices}
+        self._edges = {}
+        self.total_weight = 0
+        for u, v, w in self.graph.kruskal_mst():
+            self._link(u, v, w)
+
+    def verify(self):
+        # Comprueba que el peso total coincide con el de Kruskal.
+        return self.total_weight == sum(w for _, _, w in self.graph.kruskal_mst())
+
+    def detach(self):
+        # Deja de seguir los cambios del grafo.
+        self.graph.remove_listener(self._on_graph_change)
+
+    def _link(self, u, v, w):
+        self.tree[u][v] = w
+        self.tree[v][u] = w
+        self._edges[frozenset((u, v))] = (u, v, w)
+        self.total_weight += w
+
+    def _cut(self, u, v):
+        w = self.tree[u].pop(v)
+        del self.tree[v][u]
+        del self._edges[frozenset((u, v))]
+        self.total_weight -= w
+        return w
+
+    def _on_graph_change(self, event, *args):
+        if event == "vertex":
+            self.tree.setdefault(args[0], {})
+        elif event == "edge":
+            self._update_edge(*args)
+
+    def _update_edge(self, u, v, w):
+        if u == v:
+            return
+        if v in self.tree[u]:
+            old = self.tree[u][v]
+            if w <= old:
+                # Una arista del árbol que se abarata sigue en el árbol.
+                self._cut(u, v)
+                self._link(u, v, w)
+            else:
+                self._cut(u, v)
+                self._reconnect(u)
+            return
+        path = self._tree_path(u, v)
+        if path is None:
+            # Une dos componentes distintas del bosque.
+            self._link(u, v, w)
+            return
+        # Reemplazo del máximo del ciclo que cierra la nueva arista.
+        heaviest = max(zip(path, path[1:]), key=lambda e: self.tree[e[0]][e[1]])
+        if w < self.tree[heaviest[0]][heaviest[1]]:
+            self._cut(*heaviest)
+            self._link(u, v, w)
+
+    def _tree_path(self, u, v):
+        # Camino entre u y v dentro del árbol (BFS), o None si están en componentes distintas.
+        parent = {u: None}
+        queue = deque([u])
+        while queue:
+            node = queue.popleft()
+            if node == v:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                return path
+            for next_node in self.tree[node]:
+                if next_node not in parent:
+                    parent[next_node] = node
+                    queue.append(next_node)
+        return None
+
+    def _reconnect(self, u):
+        # Tras cortar una arista, une la componente de u con el resto usando la
+        # arista más liviana del grafo que cruza el corte.
+        component = {u}
+        queue = deque([u])
+        while queue:
+            node = queue.popleft()
+            for next_node in self.tree[node]:
+                if next_node not in component:
+                    component.add(next_node)
+                    queue.append(next_node)
+        best = None
+        for node in component:
+            for next_node, weight in self.graph.get_neighbors(node):
+                if next_node not in component and (best is None or weight < best[2]):
+                    best = (node, next_node, weight)
+        if best is not None:
+            self._link(*best)
@@ -0,0 +1,172 @@
+import heapq
+import math
+
+from model.geo import haversine_km
+
+
+class GoalDirectedRouter:
+    """
+    Búsqueda punto a punto dirigida hacia el destino sobre un model.graph.Graph.
+
+    - astar: A* con una cota geográfica. La distancia haversine se escala por la
+      menor razón peso/kilómetro de las aristas del grafo, de modo que la cota
+      nunca sobreestima el costo real (es admisible aunque los pesos no sean
+      exactamente distancias; solo es informativa cuando los pesos se derivan de
+      la distancia).
+    - alt: A* con landmarks y desigualdad triangular (ALT). Las tablas de
+      distancia a cada landmark se precalculan y la cota es admisible para
+      cualquier peso no negativo.
+
+    Ambas búsquedas guardan un mapa de predecesores en lugar de copiar la ruta
+    en cada entrada del heap. Tras cada consulta, last_expanded indica cuántos
+    nodos se expandieron.
+
+    Las tablas y la escala se calculan al construir el objeto: si el grafo
+    cambia hay que volver a llamar a prepare().
+    """
+
+    def __init__(self, graph, n_landmarks=8):
+        # graph: grafo sobre el que se consulta; n_landmarks: cantidad de landmarks para ALT.
+        self.graph = graph
+        self.n_landmarks = n_landmarks
+        self.landmarks = []
+        self.landmark_dist = []  # Una tabla {nodo: distancia} por landmark.
+        self.geo_scale = 0.0
+        self.last_expanded = 0
+        self.prepare()
+
+    def prepare(self):
+        # Calcula la escala geográfica y las tablas de landmarks.
+        self.geo_scale = self._compute_geo_scale()
+        self._select_landmarks()
+
+    def astar(self, start, end):
+        """A* con cota geográfica. Devuelve (ruta, costo) o (None, None)."""
+        vertices = self.graph.vertices
+        if start not in vertices or end not in vertices:
+            return None, None
+        target = vertices[end]
+        scale = self.geo_scale
+        if scale <= 0 or target.lat is None or target.lon is None:
+            return self._search(start, end, lambda node: 0)
+        t_lat, t_lon = target.lat, target.lon
+
+        def heuristic(node):
+            vertex = vertices[node]
+            if vertex.lat is None or vertex.lon is None:
+                return 0
+            return scale * haversine_km(vertex.lat, vertex.lon, t_lat, t_lon)
+
+        return self._search(start, end, heuristic)
+
+    def alt(self, start, end):
+        """A* con landmarks (ALT). Devuelve (ruta, costo) o (None, None)."""
+        vertices = self.graph.vertices
+        if start not in vertices or end not in vertices:
+            return None, None
+        # Solo sirven los landmarks que alcanzan al destino.
+        tables = [(table, table[end]) for table in self.landmark_dist if end in table]
+
+        def heuristic(node):
+            best = 0
+            for table, to_end in tables:
+                d = table.get(node)
+                if d is not None:
+                    d = abs(d - to_end)
+                    if d > best:
+                        best = d
+            return best
+
+        return self._search(start, end, heuristic)
+
+    def dijkstra(self, start, end):
+        """Dijkstra con mapa de predecesores (A* con cota nula), como referencia."""
+        if start not in self.graph.vertices or end not in self.graph.vertices:
+            return None, None
+        return self._search(start, end, lambda node: 0)
+
+    def _search(self, start, end, heuristic):
+        # Búsqueda A* genérica: el heap guarda (f, g, nodo) y la ruta se
+        # reconstruye al final con el mapa de predecesores.
+        graph = self.graph
+        h_cache = {}  # La cota de cada nodo se calcula una sola vez.
+        g_cost = {start: 0}
+        parent = {start: None}
+        closed = set()
+        heap = [(heuristic(start), 0, start)]
+        expanded = 0
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node in closed:
+                continue
+            closed.add(node)
+            expanded += 1
+            if node == end:
+                self.last_expanded = expanded
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                path.reverse()
+                return path, cost
+            for next_node, weight in graph.get_neighbors(node):
+                if next_node in closed:
+                    continue
+                new_cost = cost + weight
+                if new_cost < g_cost.get(next_node, math.inf):
+                    g_cost[next_node] = new_cost
+                    parent[next_node] = node
+                    h = h_cache.get(next_node)
+                    if h is None:
+                        h = h_cache[next_node] = heuristic(next_node)
+                    heapq.heappush(heap, (new_cost + h, new_cost, next_node))
+        self.last_expanded = expanded
+        return None, None
+
+    def _compute_geo_scale(self):
+        # Menor razón peso / distancia geográfica entre todas las aristas.
+        vertices = self.graph.vertices
+        scale = math.inf
+        for u, v, weight in self.graph.edges():
+            a, b = vertices[u], vertices[v]
+            if None in (a.lat, a.lon, b.lat, b.lon):
+                return 0.0
+            km = haversine_km(a.lat, a.lon, b.lat, b.lon)
+            if km > 0:
+                scale = min(scale, weight / km)
+        return 0.0 if scale == math.inf else scale
+
+    def _select_landmarks(self):
+        # Selección por el punto más lejano: cada nuevo landmark es el nodo más
+        # alejado (en costo) de los landmarks ya elegidos.
+        self.landmarks = []
+        self.landmark_dist = []
+        if not self.graph.vertices or self.n_landmarks <= 0:
+            return
+        closest = {}
+        candidate = next(iter(self.graph.vertices))
+        for _ in range(min(self.n_landmarks, len(self.graph.vertices))):
+            table = self._one_to_all(candidate)
+            self.landmarks.append(candidate)
+            self.landmark_dist.append(table)
+            for node, d in table.items():
+                if d < closest.get(node, math.inf):
+                    closest[node] = d
+            candidate = max(closest, key=closest.get)
+            if closest[candidate] == 0:
+                break
+
+    def _one_to_all(self, source):
+        # Distancias mínimas desde un nodo a todos los alcanzables.
+        dist = {source: 0}
+        heap = [(0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if cost > dist[node]:
+                continue
+            for next_node, weight in self.graph.get_neighbors(node):
+                new_cost = cost + weight
+                if new_cost < dist.get(next_node, math.inf):
+                    dist[next_node] = new_cost
+                    heapq.heappush(heap, (new_cost, next_node))
+        return dist
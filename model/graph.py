@@ -1,20 +1,63 @@
 from model.vertex import Vertex
+from model.all_pairs import AllPairsShortestPaths
+from model.dynamic_mst import DynamicMST
+from model.spatial_index import SpatialIndex
+from model.depot_partition import DepotPartition
 
 class Graph:
     def __init__(self):
         # Inicializa el grafo con un diccionario vacío de vértices.
         self.vertices = {}
+        # Cantidad de aristas, mantenida en cada add_edge para consultarla en O(1).
+        self._edge_count = 0
+        # Versión del grafo: aumenta con cada cambio (sirve para invalidar cachés).
+        self.version = 0
+        # Caché de caminos mínimos entre todos los pares (se invalida al cambiar la topología).
+        self._all_pairs = None
+        # Funciones que se llaman con (evento, *datos) cada vez que cambia el grafo.
+        self._listeners = []
+        # Árbol de expansión mínima mantenido incrementalmente (se crea al pedirlo).
+        self._mst = None
+        # Índice espacial sobre lat/lon (se crea al pedirlo y sigue a add_vertex).
+        self._spatial_index = None
+        # Zonas de depósito (Dijkstra multi-origen desde los nodos storage), creadas al pedirlas.
+        self._depot_partition = None
+        # (versión, CSRGraph) de la última conversión a CSR (ver csr()).
+        self._csr = None
 
     def add_vertex(self, id, role="client", lat=None, lon=None):
         # Agrega un nuevo vértice al grafo si no existe, con soporte para lat/lon.
         if id not in self.vertices:
             self.vertices[id] = Vertex(id, role, lat, lon)
+            self.version += 1
+            self._all_pairs = None
+            self._notify("vertex", id)
 
     def add_edge(self, from_id, to_id, weight):
         # Agrega una arista entre dos nodos con un peso dado (grafo no dirigido).
         if self._valid_vertex(from_id) and self._valid_vertex(to_id):
+            if to_id not in self.vertices[from_id].neighbors:
+                self._edge_count += 1
             self.vertices[from_id].add_neighbor(to_id, weight)
             self.vertices[to_id].add_neighbor(from_id, weight)
+            self.version += 1
+            self._all_pairs = None
+            self._notify("edge", from_id, to_id, weight)
+
+    def add_listener(self, callback):
+        # Registra una función que se llama con ("vertex", id) al agregar un nodo
+        # y con ("edge", from_id, to_id, weight) al agregar o cambiar una arista.
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        # Deja de notificar a una función registrada con add_listener.
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, *args):
+        # Avisa a los suscriptores que el grafo cambió.
+        for callback in self._listeners:
+            callback(event, *args)
 
     def get_neighbors(self, id):
         # Devuelve los vecinos (id y peso) de un nodo dado.
@@ -22,34 +65,33 @@ class Graph:
             return self.vertices[id].get_neighbors()
         return []
 
+    def get_role(self, id):
+        # Devuelve el rol de un nodo, o None si no existe.
+        if self._valid_vertex(id):
+            return self.vertices[id].role
+        return None
+
     def has_edge(self, from_id, to_id):
         # Verifica si existe una arista entre dos nodos.
         return self._valid_vertex(from_id) and to_id in self.vertices[from_id].neighbors
 
     def edge_count(self):
-        # Cuenta el número de aristas en el grafo (sin duplicar aristas).
-        counted = set()
-        count = 0
-        for vertex in self.vertices.values():
-            for neighbor in vertex.neighbors:
-                pair = tuple(sorted([vertex.id, neighbor]))
-                if pair not in counted:
-                    counted.add(pair)
-                    count += 1
-        return count
+        # Número de aristas en el grafo (sin duplicar aristas), en O(1).
+        return self._edge_count
 
     def edges(self):
         """
         Devuelve un generador de todas las aristas del grafo como (from_id, to_id, weight).
         Cada arista aparece solo una vez (grafo no dirigido).
         """
-        seen = set()
+        # Una arista (u, v) se emite al recorrer el primero de sus extremos:
+        # basta con recordar qué vértices ya se recorrieron.
+        done = set()
         for from_id, vertex in self.vertices.items():
             for to_id, weight in vertex.neighbors.items():
-                edge = tuple(sorted([from_id, to_id]))
-                if edge not in seen:
-                    seen.add(edge)
+                if to_id not in done:
                     yield (from_id, to_id, weight)
+            done.add(from_id)
 
     def _valid_vertex(self, id):
         # Verifica si un id corresponde a un vértice existente en el grafo.
@@ -83,6 +125,46 @@ class Graph:
                 break
         return mst
 
+    def minimum_spanning_tree(self):
+        """
+        Devuelve el DynamicMST del grafo: se construye con Kruskal la primera vez
+        y luego se actualiza solo con cada add_edge. Sus aristas (edges) y su
+        peso total (total_weight) se consultan en O(1).
+        """
+        if self._mst is None:
+            self._mst = DynamicMST(self)
+        return self._mst
+
+    def save(self, filename):
+        # Guarda el grafo en el formato binario de model.snapshot. Devuelve el checksum.
+        from model.snapshot import save_graph  # import local: snapshot depende de Graph
+        return save_graph(self, filename)
+
+    @classmethod
+    def load(cls, filename, verify=False):
+        # Carga un grafo guardado con save() (se lee con mmap, se copia y el mmap se cierra).
+        from model.snapshot import load_graph  # import local: snapshot depende de Graph
+        return load_graph(filename, verify)
+
+    def csr(self):
+        # Devuelve el grafo en formato CSRGraph; la conversión queda en caché mientras no cambie version.
+        from model.csr_graph import CSRGraph  # import local: csr_graph depende de Graph
+        if self._csr is None or self._csr[0] != self.version:
+            self._csr = (self.version, CSRGraph.from_graph(self))
+        return self._csr[1]
+
+    def spatial_index(self):
+        # Devuelve el SpatialIndex del grafo para consultas de cercanía por lat/lon.
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self)
+        return self._spatial_index
+
+    def depot_partition(self):
+        # Devuelve la DepotPartition del grafo: depósito más cercano, distancia y predecesor de cada nodo.
+        if self._depot_partition is None:
+            self._depot_partition = DepotPartition(self)
+        return self._depot_partition
+
     def dijkstra(self, start, end):
         import heapq
         heap = [(0, start, [start])]
@@ -100,31 +182,20 @@ class Graph:
         return None, None
 
     def floyd_warshall(self):
-        # Devuelve distancias y predecesores para todos los pares
-        nodes = list(self.vertices.keys())
-        n = len(nodes)
-        dist = {u: {v: float('inf') for v in nodes} for u in nodes}
-        next_node = {u: {v: None for v in nodes} for u in nodes}
-        for u in nodes:
-            dist[u][u] = 0
-        for u, v, w in self.edges():
-            dist[u][v] = w
-            dist[v][u] = w
-            next_node[u][v] = v
-            next_node[v][u] = u
-        for k in nodes:
-            for i in nodes:
-                for j in nodes:
-                    if dist[i][k] + dist[k][j] < dist[i][j]:
-                        dist[i][j] = dist[i][k] + dist[k][j]
-                        next_node[i][j] = next_node[i][k]
-        return dist, next_node
-
-    def reconstruct_fw_path(self, start, end, next_node):
-        if next_node[start][end] is None:
-            return None
-        path = [start]
-        while start != end:
-            start = next_node[start][end]
-            path.append(start)
-        return path
+        """
+        Devuelve los caminos mínimos entre todos los pares (AllPairsShortestPaths).
+        El resultado queda en caché hasta que add_vertex/add_edge cambian el grafo.
+        """
+        if self._all_pairs is None:
+            self._all_pairs = AllPairsShortestPaths.from_graph(self)
+        return self._all_pairs
+
+    def distance(self, start, end):
+        # Distancia mínima entre dos nodos en O(1) usando la caché de todos los pares.
+        return self.floyd_warshall().distance(start, end)
+
+    def reconstruct_fw_path(self, start, end, all_pairs=None):
+        # Reconstruye la ruta entre dos nodos; por defecto usa la caché de todos los pares.
+        if all_pairs is None:
+            all_pairs = self.floyd_warshall()
+        return all_pairs.path(start, end)
@@ -0,0 +1,208 @@
+import heapq
+import math
+
+from model.battery_router import BatteryRouter
+
+
+class KShortestRoutes:
+    """
+    k rutas alternativas más cortas (algoritmo de Yen) con la regla de batería
+    de BatteryRouter.
+
+    Cada ruta nueva se arma con una ruta raíz (prefijo de una ruta ya aceptada)
+    y una ruta de desvío desde el último nodo de la raíz, buscada sin los nodos
+    de la raíz y sin las aristas que repetirían una ruta ya aceptada.
+
+    Ninguna ruta repite nodos. La primera es la óptima de BatteryRouter (que
+    también es simple). En las alternativas se prohíben todos los nodos de la
+    raíz y el desvío se busca sobre estados (nodo, batería) descartando los
+    nodos que ya están en la ruta del estado. Con la regla de batería esa
+    búsqueda es una aproximación (la ruta simple más corta con batería es un
+    problema NP-difícil), así que la lista final se ordena por costo.
+
+    Por consulta se calcula un único árbol de caminos mínimos hacia el destino
+    (sin batería) que se reutiliza en todas las iteraciones:
+    - como heurística admisible del A* de cada desvío,
+    - como atajo: si la rama del árbol desde el nodo de desvío no toca nodos ni
+      aristas prohibidos y es factible con la batería disponible, ya es el
+      desvío óptimo y no se busca,
+    - como cota: un desvío cuyo costo mínimo posible no mejora a los
+      candidatos pendientes que ya alcanzan para completar k se descarta.
+    """
+
+    def __init__(self, graph):
+        # graph: model.graph.Graph (los pesos de las rutas se leen de vertices[u].neighbors).
+        self.graph = graph
+        self.router = BatteryRouter(graph)
+
+    def routes(self, origin, destination, k=5, battery_limit=50, first=None):
+        """
+        Devuelve hasta k pares (ruta, costo) ordenados por costo, de menor a mayor.
+        La primera es la misma ruta óptima de BatteryRouter.route.
+        first: (ruta, costo) óptima ya calculada (por ejemplo con la caché o el
+        RechargeOverlay de Simulation.find_route); si se indica no se busca.
+        """
+        graph = self.graph
+        if k <= 0 or graph.get_role(origin) is None or graph.get_role(destination) is None:
+            return []
+        if first is not None and first[0] is None:
+            return []
+        to_dest, next_hop = self._tree_to(destination)
+        if first is None:
+            first = self.router.route(origin, destination, battery_limit,
+                                      heuristic=lambda node: to_dest.get(node, math.inf))
+            if first[0] is None:
+                return []
+
+        accepted = [first]
+        seen = {tuple(first[0])}
+        candidates = []  # heap (costo, ruta)
+        while len(accepted) < k:
+            prev_path, _ = accepted[-1]
+            batteries = self._batteries(prev_path, battery_limit)
+            needed = k - len(accepted)
+            bound = heapq.nsmallest(needed, candidates)[-1][0] if len(candidates) >= needed else math.inf
+            root_cost = 0
+            for i in range(len(prev_path) - 1):
+                spur = prev_path[i]
+                root = prev_path[:i + 1]
+                if i > 0:
+                    root_cost += self._edge_cost(prev_path[i - 1], spur)
+                if root_cost + to_dest.get(spur, math.inf) > bound:
+                    continue
+                banned_edges = {(spur, path[i + 1]) for path, _ in accepted
+                                if len(path) > i + 1 and path[:i + 1] == root}
+                spur_route = self._spur_route(spur, batteries[i], battery_limit, destination,
+                                              to_dest, next_hop, set(root[:-1]), banned_edges)
+                if spur_route is None:
+                    continue
+                path = root[:-1] + spur_route[0]
+                if tuple(path) not in seen:
+                    seen.add(tuple(path))
+                    heapq.heappush(candidates, (root_cost + spur_route[1], path))
+            if not candidates:
+                break
+            cost, path = heapq.heappop(candidates)
+            accepted.append((path, cost))
+        accepted.sort(key=lambda route: route[1])
+        return accepted
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _tree_to(self, destination):
+        # Dijkstra desde el destino (grafo no dirigido): distancia y siguiente salto hacia él.
+        graph = self.graph
+        dist = {destination: 0}
+        next_hop = {destination: None}
+        done = set()
+        heap = [(0, destination)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for neighbor, weight in graph.get_neighbors(node):
+                if d + weight < dist.get(neighbor, math.inf):
+                    dist[neighbor] = d + weight
+                    next_hop[neighbor] = node
+                    heapq.heappush(heap, (d + weight, neighbor))
+        return dist, next_hop
+
+    def _edge_cost(self, u, v):
+        # Peso de la arista u-v de una ruta (lectura directa del diccionario de vecinos).
+        return self.graph.vertices[u].neighbors[v]
+
+    def _step(self, battery, weight, node, battery_limit):
+        # Batería al llegar a node por una arista de peso weight (None si no es factible).
+        battery -= weight
+        if battery < 0:
+            if self.graph.get_role(node) != "recharge":
+                return None
+            battery = battery_limit
+        return battery
+
+    def _batteries(self, path, battery_limit):
+        # Batería al llegar a cada nodo de la ruta.
+        batteries = [battery_limit]
+        for u, v in zip(path, path[1:]):
+            batteries.append(self._step(batteries[-1], self._edge_cost(u, v), v, battery_limit))
+        return batteries
+
+    def _tree_branch(self, spur, battery, battery_limit, next_hop, banned_nodes, banned_edges):
+        # Rama del árbol desde spur hasta el destino, si es válida y factible.
+        if spur not in next_hop:
+            return None
+        path = [spur]
+        node = spur
+        cost = 0
+        while next_hop[node] is not None:
+            nxt = next_hop[node]
+            if nxt in banned_nodes or (node, nxt) in banned_edges:
+                return None
+            weight = self._edge_cost(node, nxt)
+            battery = self._step(battery, weight, nxt, battery_limit)
+            if battery is None:
+                return None
+            cost += weight
+            path.append(nxt)
+            node = nxt
+        return path, cost
+
+    def _spur_route(self, spur, battery, battery_limit, destination, to_dest, next_hop,
+                    banned_nodes, banned_edges):
+        # Mejor ruta simple desde spur (con la batería dada) al destino evitando lo
+        # prohibido: ningún estado vuelve a un nodo que ya está en su ruta.
+        branch = self._tree_branch(spur, battery, battery_limit, next_hop, banned_nodes, banned_edges)
+        if branch is not None:
+            return branch
+
+        # A* sobre estados (nodo, batería) con la distancia sin batería como heurística.
+        graph = self.graph
+        start = (spur, battery)
+        best = {start: 0}
+        parent = {start: None}
+        settled = set()
+        heap = [(to_dest.get(spur, math.inf), -battery, 0, spur, battery)]
+        while heap:
+            _, _, cost, node, node_battery = heapq.heappop(heap)
+            state = (node, node_battery)
+            if state in settled:
+                continue
+            settled.add(state)
+            if node == destination:
+                path = []
+                while state is not None:
+                    path.append(state[0])
+                    state = parent[state]
+                path.reverse()
+                return path, cost
+            on_path = self._path_nodes(parent, state)
+            for next_node, weight in graph.get_neighbors(node):
+                if next_node in banned_nodes or (node, next_node) in banned_edges:
+                    continue
+                if next_node in on_path:
+                    continue
+                h = to_dest.get(next_node)
+                if h is None:
+                    continue
+                new_battery = self._step(node_battery, weight, next_node, battery_limit)
+                if new_battery is None:
+                    continue
+                next_state = (next_node, new_battery)
+                if next_state in settled:
+                    continue
+                new_cost = cost + weight
+                if new_cost < best.get(next_state, math.inf):
+                    best[next_state] = new_cost
+                    parent[next_state] = state
+                    heapq.heappush(heap, (new_cost + h, -new_battery, new_cost, next_node, new_battery))
+        return None
+
+    def _path_nodes(self, parent, state):
+        # Nodos de la ruta que lleva al estado (se arma una vez por estado expandido).
+        nodes = set()
+        while state is not None:
+            nodes.add(state[0])
+            state = parent[state]
+        return nodes
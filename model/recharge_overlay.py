@@ -0,0 +1,196 @@
+import heapq
+import math
+
+
+class RechargeOverlay:
+    """
+    Grafo superpuesto (overlay) de estaciones para rutas largas con batería.
+
+    Con la regla de Simulation.calculate_route el dron solo queda con batería
+    completa en el origen y al llegar con déficit a un nodo de recarga. Esos
+    puntos de "reinicio" son las únicas decisiones relevantes: entre dos de
+    ellos el dron recorre un tramo sin recargas de costo a lo sumo igual al
+    límite de batería.
+
+    Para cada límite de batería y cada estación (nodos 'recharge' y 'storage')
+    se precalculan, con una búsqueda acotada por la batería, los tramos más
+    cortos hasta cada nodo de recarga alcanzado con déficit. Una consulta larga
+    se resuelve como un Dijkstra pequeño sobre esos tramos, unido a una
+    búsqueda local desde el origen (si no es estación) y a un Dijkstra acotado
+    desde el destino. El resultado tiene el mismo costo que la búsqueda por
+    estados de BatteryRouter, pero la ruta puede repetir nodos (ir a una
+    estación y volver); Simulation.find_route la cambia entonces por la ruta
+    simple de BatteryRouter.route.
+
+    El overlay se suscribe a los cambios del grafo: al agregar o modificar una
+    arista solo se recalculan las estaciones cuya búsqueda tocó alguno de sus
+    extremos.
+    """
+
+    STATION_ROLES = ("recharge", "storage")
+
+    def __init__(self, graph, battery_limits=(50,)):
+        # graph: model.graph.Graph; battery_limits: límites de batería a precalcular.
+        self.graph = graph
+        self.legs = {}     # límite -> estación -> {recarga: (costo, ruta)}
+        self.reach = {}    # límite -> estación -> nodos tocados por su búsqueda
+        self.stations = set()
+        self._refresh_stations()
+        for limit in battery_limits:
+            self.add_battery_limit(limit)
+        graph.add_listener(self._on_graph_change)
+
+    @property
+    def battery_limits(self):
+        return tuple(self.legs)
+
+    def add_battery_limit(self, battery_limit):
+        # Precalcula los tramos de todas las estaciones para un nuevo límite.
+        if battery_limit in self.legs:
+            return
+        self.legs[battery_limit] = {}
+        self.reach[battery_limit] = {}
+        for station in self.stations:
+            self._build_station(station, battery_limit)
+
+    def detach(self):
+        # Deja de seguir los cambios del grafo.
+        self.graph.remove_listener(self._on_graph_change)
+
+    def route(self, origin, destination, battery_limit=50):
+        """
+        Devuelve (ruta, costo) usando el overlay, o (None, None) si no hay ruta.
+        El límite debe haber sido precalculado (ver add_battery_limit).
+        """
+        vertices = self.graph.vertices
+        if origin not in vertices or destination not in vertices:
+            return None, None
+        if origin == destination:
+            return [origin], 0
+        legs = self.legs[battery_limit]
+
+        # Tramos finales: distancia (acotada por la batería) de cada nodo al destino.
+        to_dest, dest_parent = self._bounded_dijkstra(destination, battery_limit)
+
+        best, best_reset = math.inf, None
+        dist = {origin: 0}
+        parent = {origin: None}   # reinicio -> (reinicio anterior, ruta del tramo)
+        heap = [(0, origin)]
+        while heap:
+            cost, reset = heapq.heappop(heap)
+            if cost >= best:
+                break
+            if cost > dist[reset]:
+                continue
+            if reset in to_dest and cost + to_dest[reset] < best:
+                best, best_reset = cost + to_dest[reset], reset
+            if reset in legs:
+                reset_legs = legs[reset]
+            else:
+                reset_legs, _ = self._search_legs(reset, battery_limit)
+            for target, (leg_cost, leg_path) in reset_legs.items():
+                new_cost = cost + leg_cost
+                if new_cost < dist.get(target, math.inf):
+                    dist[target] = new_cost
+                    parent[target] = (reset, leg_path)
+                    heapq.heappush(heap, (new_cost, target))
+
+        if best_reset is None:
+            return None, None
+        # Tramo final siguiendo los predecesores del Dijkstra desde el destino.
+        tail = [best_reset]
+        while tail[-1] != destination:
+            tail.append(dest_parent[tail[-1]])
+        pieces = [tail]
+        reset = best_reset
+        while parent[reset] is not None:
+            reset, leg_path = parent[reset]
+            pieces.append(leg_path)
+        path = [origin]
+        for piece in reversed(pieces):
+            path.extend(piece[1:])
+        return path, best
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+    def _refresh_stations(self):
+        self.stations = {id for id, vertex in self.graph.vertices.items()
+                         if vertex.role in self.STATION_ROLES}
+
+    def _build_station(self, station, battery_limit):
+        legs, reach = self._search_legs(station, battery_limit)
+        self.legs[battery_limit][station] = legs
+        self.reach[battery_limit][station] = reach
+
+    def _search_legs(self, start, battery_limit):
+        """
+        Búsqueda acotada desde start con batería llena, sin recargas intermedias.
+        Los estados son (nodo, costo acumulado): la batería restante es
+        battery_limit - costo. Cada arista que deja la batería negativa y llega a
+        un nodo de recarga termina un tramo (recarga completa).
+        Devuelve ({recarga: (costo, ruta)}, nodos_tocados).
+        """
+        graph = self.graph
+        start_state = (start, 0)
+        parent = {start_state: None}
+        heap = [(0, start)]
+        legs = {}
+        reach = {start}
+        while heap:
+            cost, node = heapq.heappop(heap)
+            for next_node, weight in graph.get_neighbors(node):
+                reach.add(next_node)
+                new_cost = cost + weight
+                if new_cost <= battery_limit:
+                    state = (next_node, new_cost)
+                    if state not in parent:
+                        parent[state] = (node, cost)
+                        heapq.heappush(heap, (new_cost, next_node))
+                elif graph.get_role(next_node) == "recharge":
+                    if next_node != start and new_cost < legs.get(next_node, (math.inf,))[0]:
+                        legs[next_node] = (new_cost, self._state_path((node, cost), parent) + [next_node])
+        return legs, reach
+
+    @staticmethod
+    def _state_path(state, parent):
+        path = []
+        while state is not None:
+            path.append(state[0])
+            state = parent[state]
+        path.reverse()
+        return path
+
+    def _bounded_dijkstra(self, source, radius):
+        # Dijkstra desde source limitado a costo <= radius. Devuelve (dist, predecesor).
+        dist = {source: 0}
+        parent = {source: None}
+        heap = [(0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if cost > dist[node]:
+                continue
+            for next_node, weight in self.graph.get_neighbors(node):
+                new_cost = cost + weight
+                if new_cost <= radius and new_cost < dist.get(next_node, math.inf):
+                    dist[next_node] = new_cost
+                    parent[next_node] = node
+                    heapq.heappush(heap, (new_cost, next_node))
+        return dist, parent
+
+    # ------------------------------------------------------------------
+    # Mantenimiento incremental
+    # ------------------------------------------------------------------
+    def _on_graph_change(self, event, *args):
+        if event == "vertex":
+            id = args[0]
+            if self.graph.get_role(id) in self.STATION_ROLES:
+                self.stations.add(id)
+                for limit in self.legs:
+                    self._build_station(id, limit)
+        elif event == "edge":
+            from_id, to_id = args[0], args[1]
+            for limit, reaches in self.reach.items():
+                for station, reach in list(reaches.items()):
+                    if from_id in reach or to_id in reach:
+                        self._build_station(station, limit)
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+
+class RouteCache:
+    """
+    Caché LRU acotada de resultados de rutas.
+
+    Las claves son (origen, destino, límite_de_batería, algoritmo) y los valores
+    (ruta, costo). Cada consulta indica la versión actual del grafo: si cambió
+    desde la última vez, todas las entradas quedan obsoletas y se descartan.
+    Los contadores de aciertos, fallos, expulsiones e invalidaciones sirven
+    para dimensionar maxsize.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.version = None
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version):
+        # Devuelve el valor guardado para key, o None si no está (o el grafo cambió).
+        self._check_version(version)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, version):
+        # Guarda un valor y expulsa la entrada menos usada si se supera maxsize.
+        self._check_version(version)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        # Contadores de uso de la caché.
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "graph_version": self.version,
+        }
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self.version = version
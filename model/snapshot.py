@@ -0,0 +1,188 @@
+"""
+Formato binario versionado para guardar y cargar grafos.
+
+Estructura del archivo (little-endian, secciones alineadas a 8 bytes):
+
+    cabecera   HEADER (ver HEADER_FORMAT)
+    offsets    int64[n + 1]   inicio de la lista de adyacencia de cada nodo
+    targets    int32[2m]      vecinos
+    weights    int32[2m] o float64[2m]
+    roles      int8[n]        código de rol (ver model.csr_graph.ROLES)
+    lats/lons  float64[n]     coordenadas (NaN si no hay)
+    ids        int64[n + 1] + bytes UTF-8   tabla de strings de los ids (se guardan como str)
+
+La cabecera incluye un CRC32 de todo el contenido que sigue, útil para
+detectar cachés desactualizadas. load_csr abre el archivo con mmap y arma el
+CSRGraph sobre vistas de memoria de solo lectura (los ids sí se decodifican),
+así varios procesos que consultan el CSR comparten una única copia en la caché
+de páginas del sistema. load_graph, en cambio, copia todo a un Graph (dicts
+por vértice) y cierra el mmap al terminar.
+"""
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from model.csr_graph import CSRGraph
+
+MAGIC = b"DRGRAPH\0"
+FORMAT_VERSION = 1
+# magic, versión, n, entradas de adyacencia, aristas, tipo de peso, largo de ids, crc32
+HEADER_FORMAT = "<8sIQQQcxxxQI4x"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+def _pad(size):
+    return (-size) % 8
+
+
+def _to_bytes(values, typecode):
+    # Bytes little-endian de una secuencia con el typecode indicado.
+    if isinstance(values, memoryview) and values.format == typecode:
+        return values.tobytes()  # Vista de un archivo ya cargado (little-endian).
+    data = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+    if sys.byteorder != "little":
+        data = array(typecode, data)
+        data.byteswap()
+    return data.tobytes()
+
+
+def _sections(csr):
+    # Secciones del contenido en el orden del archivo.
+    blobs = [item.encode("utf-8") for item in map(str, csr.ids)]
+    string_offsets = array('q', [0])
+    for blob in blobs:
+        string_offsets.append(string_offsets[-1] + len(blob))
+    code = getattr(csr.weights, "typecode", None) or csr.weights.format
+    weight_code = 'i' if code == 'i' else 'd'
+    return weight_code, [
+        _to_bytes(csr.offsets, 'q'),
+        _to_bytes(csr.targets, 'i'),
+        _to_bytes(csr.weights, weight_code),
+        _to_bytes(csr.roles, 'b'),
+        _to_bytes(csr.lats, 'd'),
+        _to_bytes(csr.lons, 'd'),
+        _to_bytes(string_offsets, 'q'),
+        b"".join(blobs),
+    ]
+
+
+def _payload(sections):
+    parts = []
+    for section in sections:
+        parts.append(section)
+        parts.append(b"\0" * _pad(len(section)))
+    return b"".join(parts)
+
+
+def dump_csr(csr):
+    """Bytes del archivo de un CSRGraph (cabecera + contenido)."""
+    weight_code, sections = _sections(csr)
+    payload = _payload(sections)
+    header = struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, len(csr.ids), len(csr.targets),
+                         csr.edge_count(), weight_code.encode(), len(sections[-1]), zlib.crc32(payload))
+    return header + payload
+
+
+def save_csr(csr, filename):
+    """Guarda un CSRGraph en filename y devuelve el checksum (CRC32) del contenido."""
+    data = dump_csr(csr)
+    with open(filename, "wb") as f:
+        f.write(data)
+    return _parse_header(data)["checksum"]
+
+
+def save_graph(graph, filename):
+    """Guarda un model.graph.Graph (vía su representación CSR)."""
+    return save_csr(CSRGraph.from_graph(graph), filename)
+
+
+def read_header(filename):
+    """Lee solo la cabecera: dict con version, nodes, edges, weights y checksum."""
+    with open(filename, "rb") as f:
+        return _parse_header(f.read(HEADER_SIZE))
+
+
+def _parse_header(data):
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Archivo de grafo truncado")
+    magic, version, n, entries, edges, weight_code, ids_size, checksum = struct.unpack(HEADER_FORMAT, data[:HEADER_SIZE])
+    if magic != MAGIC:
+        raise ValueError("El archivo no es un grafo guardado por model.snapshot")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Versión de archivo de grafo no soportada: {version}")
+    return {"version": version, "nodes": n, "entries": entries, "edges": edges,
+            "weights": weight_code.decode(), "ids_size": ids_size, "checksum": checksum}
+
+
+def graph_checksum(graph):
+    """Checksum que tendría el grafo al guardarlo (para comparar con read_header)."""
+    _, sections = _sections(CSRGraph.from_graph(graph))
+    return zlib.crc32(_payload(sections))
+
+
+def load_csr(filename, verify=False):
+    """
+    Carga un CSRGraph cuyos arreglos son vistas sobre un mmap de solo lectura
+    del archivo. El mapeo queda abierto mientras vivan el CSRGraph o sus
+    arreglos y se libera cuando se descartan (para un Graph usar load_graph).
+    verify: si es True recalcula el CRC32 y lanza ValueError si no coincide.
+    """
+    with open(filename, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return load_csr_buffer(mm, verify)
+
+
+def load_csr_buffer(buffer, verify=False):
+    """
+    Arma un CSRGraph sobre un buffer con el formato de dump_csr (por ejemplo
+    un mmap o una sección de otro archivo), sin copiar los arreglos.
+    """
+    if sys.byteorder != "little":
+        raise ValueError("La carga con mmap requiere una plataforma little-endian")
+    # La validación usa una vista que se libera al salir (también si falla), así
+    # un error no deja el buffer exportado y quien lo abrió puede cerrarlo.
+    with memoryview(buffer) as view:
+        header = _parse_header(view[:HEADER_SIZE])
+        if verify and zlib.crc32(view[HEADER_SIZE:]) != header["checksum"]:
+            raise ValueError("Checksum inválido: el archivo de grafo está dañado")
+
+    view = memoryview(buffer)
+    n, entries = header["nodes"], header["entries"]
+    weight_code = header["weights"]
+    layout = [('q', n + 1), ('i', entries), (weight_code, entries), ('b', n),
+              ('d', n), ('d', n), ('q', n + 1), ('B', header["ids_size"])]
+    position = HEADER_SIZE
+    sections = []
+    for typecode, count in layout:
+        size = struct.calcsize(typecode) * count
+        sections.append(view[position:position + size].cast(typecode))
+        position += size + _pad(size)
+    offsets, targets, weights, roles, lats, lons, string_offsets, blob = sections
+
+    raw = bytes(blob)
+    ids = [raw[string_offsets[i]:string_offsets[i + 1]].decode("utf-8") for i in range(n)]
+    return CSRGraph(ids, offsets, targets, weights, roles, lats, lons, edge_count=header["edges"])
+
+
+def load_graph(filename, verify=False):
+    """
+    Carga un archivo guardado y lo convierte en un model.graph.Graph. Los datos
+    se copian al Graph, así que el mmap se cierra antes de devolverlo.
+    """
+    with open(filename, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    csr = None
+    try:
+        csr = load_csr_buffer(mm, verify)
+        graph = csr.to_graph()
+    finally:
+        csr = None  # Suelta las vistas del CSR: mmap.close() falla si quedan vistas exportadas.
+        try:
+            mm.close()
+        except BufferError:
+            # Solo si la carga falló a mitad de armar el CSR: el traceback todavía
+            # referencia sus vistas y el mmap se libera junto con la excepción.
+            pass
+    return graph
@@ -0,0 +1,194 @@
+import math
+
+import numpy as np
+
+from model.geo import EARTH_RADIUS_KM, haversine_km_array
+
+
+class SpatialIndex:
+    """
+    Índice espacial de grilla uniforme sobre las coordenadas de los vértices.
+
+    Cada celda cubre cell_lat grados de latitud (cell_km) por _cell_lon grados
+    de longitud, y guarda los ids de los vértices que caen en ella. El ancho en
+    longitud se elige para que mida cell_km a la mayor latitud absoluta
+    indexada (más al sur o al norte las celdas son más angostas en km); si un
+    punto nuevo la hace más del doble de angosta, la grilla se rearma. Las
+    consultas revisan anillos de celdas alrededor del punto y calculan las
+    distancias exactas con haversine vectorizado; los anillos se cortan con una
+    cota inferior de la distancia a lo no revisado que usa esa latitud máxima.
+
+    - nearest(lat, lon, k, role): los k vértices más cercanos (opcionalmente de un rol).
+    - within_radius(lat, lon, radius_km, role): vértices a menos de radius_km.
+
+    El índice se mantiene sincronizado con Graph.add_vertex mediante
+    Graph.add_listener. Los vértices sin coordenadas no se indexan.
+    """
+
+    def __init__(self, graph, cell_km=0.5):
+        # graph: model.graph.Graph; cell_km: tamaño de la celda en kilómetros.
+        self.graph = graph
+        self.cell_km = cell_km
+        self.cell_lat = math.degrees(cell_km / EARTH_RADIUS_KM)
+        self.cells = {}     # (fila, columna) -> lista de ids
+        self._cell_lon = None
+        self._grid_cos = None   # cos de la latitud para la que se eligió _cell_lon
+        self._max_cos = None    # cos de la mayor latitud absoluta indexada (la mínima de los cos)
+        self._bounds = None
+        for id in graph.vertices:
+            self._insert(id)
+        graph.add_listener(self._on_graph_change)
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.cells.values())
+
+    def detach(self):
+        # Deja de seguir los cambios del grafo.
+        self.graph.remove_listener(self._on_graph_change)
+
+    def nearest(self, lat, lon, k=1, role=None):
+        """
+        Devuelve hasta k pares (id, distancia_km) ordenados por distancia.
+        Recorre anillos de celdas crecientes (ver _rings) hasta que ninguna celda
+        no visitada puede contener algo más cercano que el k-ésimo candidato.
+        """
+        if not self.cells or k <= 0:
+            return []
+        ids, dists = [], np.empty(0)
+        for ring, ring_ids in self._rings(lat, lon, role):
+            if ring_ids:
+                ids.extend(ring_ids)
+                dists = np.concatenate([dists, self._distances(ring_ids, lat, lon)])
+            if len(ids) >= k and np.partition(dists, k - 1)[k - 1] <= self._ring_km(lat, ring):
+                break
+        order = np.argsort(dists, kind="stable")[:k]
+        return [(ids[i], float(dists[i])) for i in order]
+
+    def within_radius(self, lat, lon, radius_km, role=None):
+        """Devuelve los pares (id, distancia_km) a menos de radius_km, ordenados."""
+        if not self.cells:
+            return []
+        ids = []
+        for ring, ring_ids in self._rings(lat, lon, role):
+            ids.extend(ring_ids)
+            if self._ring_km(lat, ring) > radius_km:
+                break
+        if not ids:
+            return []
+        dists = self._distances(ids, lat, lon)
+        inside = np.nonzero(dists <= radius_km)[0]
+        inside = inside[np.argsort(dists[inside], kind="stable")]
+        return [(ids[i], float(dists[i])) for i in inside]
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _on_graph_change(self, event, *args):
+        if event == "vertex":
+            self._insert(args[0])
+
+    def _insert(self, id):
+        vertex = self.graph.vertices[id]
+        if vertex.lat is None or vertex.lon is None:
+            return
+        cos_lat = math.cos(math.radians(vertex.lat))
+        if self._max_cos is None or cos_lat < self._max_cos:
+            self._max_cos = cos_lat
+            if self._grid_cos is None or cos_lat < 0.5 * self._grid_cos:
+                self._regrid(cos_lat)
+        self._add(id, vertex)
+
+    def _regrid(self, cos_lat):
+        # Elige el ancho en longitud para la latitud de cos_lat y vuelve a repartir
+        # los puntos ya indexados.
+        self._grid_cos = cos_lat
+        self._cell_lon = self.cell_lat / max(cos_lat, 1e-6)
+        ids = [id for bucket in self.cells.values() for id in bucket]
+        self.cells, self._bounds = {}, None
+        vertices = self.graph.vertices
+        for id in ids:
+            self._add(id, vertices[id])
+
+    def _add(self, id, vertex):
+        # Agrega el vértice a su celda y actualiza el rectángulo de celdas ocupadas.
+        cell = self._cell(vertex.lat, vertex.lon)
+        self.cells.setdefault(cell, []).append(id)
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[0], cell[1], cell[1]]
+        else:
+            b = self._bounds
+            b[0], b[1] = min(b[0], cell[0]), max(b[1], cell[0])
+            b[2], b[3] = min(b[2], cell[1]), max(b[3], cell[1])
+
+    def _cell(self, lat, lon):
+        return (int(math.floor(lat / self.cell_lat)),
+                int(math.floor(lon / (self._cell_lon or self.cell_lat))))
+
+    def _ring_km(self, lat, ring):
+        # Cota inferior de la distancia desde la latitud lat (dentro de la celda central)
+        # a todo punto indexado fuera del anillo ring: está a más de ring filas (ring *
+        # cell_km hacia el norte o el sur) o a más de ring columnas de longitud. Por
+        # haversine, hav(d) >= cos(lat) * cos(lat_punto) * hav(dlon), y cos(lat_punto)
+        # es al menos el de la mayor latitud absoluta indexada.
+        north_south = ring * self.cell_km
+        dlon = min(math.radians(ring * self._cell_lon), math.pi)
+        scale = math.sqrt(max(math.cos(math.radians(lat)), 0.0) * self._max_cos)
+        east_west = 2 * EARTH_RADIUS_KM * math.asin(min(scale * math.sin(dlon / 2), 1.0))
+        return min(north_south, east_west)
+
+    def _max_ring(self, row, col):
+        # Anillo más lejano que todavía toca una celda ocupada.
+        r0, r1, c0, c1 = self._bounds
+        return max(abs(row - r0), abs(row - r1), abs(col - c0), abs(col - c1))
+
+    def _rings(self, lat, lon, role):
+        # Genera (anillo, ids) en orden creciente de anillo alrededor de la celda del
+        # punto. Empieza en el primer anillo que toca el rectángulo de celdas ocupadas
+        # (los anteriores están vacíos) y termina en el último que lo toca. Recorrer el
+        # borde de un anillo cuesta su perímetro (8 * anillo celdas): cuando supera la
+        # cantidad de celdas ocupadas, las que faltan se agrupan por anillo de una vez,
+        # así un punto lejos de la red no recorre anillos vacíos.
+        row, col = self._cell(lat, lon)
+        r0, r1, c0, c1 = self._bounds
+        ring = max(0, r0 - row, row - r1, c0 - col, col - c1)
+        max_ring = self._max_ring(row, col)
+        while ring <= max_ring and 8 * ring <= len(self.cells):
+            yield ring, self._ring_ids(row, col, ring, role)
+            ring += 1
+        if ring > max_ring:
+            return
+        groups = {}
+        for (r, c), bucket in self.cells.items():
+            cell_ring = max(abs(r - row), abs(c - col))
+            if cell_ring >= ring:
+                groups.setdefault(cell_ring, []).append(bucket)
+        vertices = self.graph.vertices
+        for cell_ring in sorted(groups):
+            ids = [id for bucket in groups[cell_ring] for id in bucket
+                   if role is None or vertices[id].role == role]
+            yield cell_ring, ids
+
+    def _ring_ids(self, row, col, ring, role):
+        # Ids de las celdas en el borde del cuadrado de radio ring alrededor de (row, col).
+        cells = self.cells
+        vertices = self.graph.vertices
+        ids = []
+        for r in range(row - ring, row + ring + 1):
+            if ring and r not in (row - ring, row + ring):
+                candidates = ((r, col - ring), (r, col + ring))
+            else:
+                candidates = ((r, c) for c in range(col - ring, col + ring + 1))
+            for cell in candidates:
+                bucket = cells.get(cell)
+                if bucket:
+                    if role is None:
+                        ids.extend(bucket)
+                    else:
+                        ids.extend(id for id in bucket if vertices[id].role == role)
+        return ids
+
+    def _distances(self, ids, lat, lon):
+        vertices = self.graph.vertices
+        lats = np.fromiter((vertices[id].lat for id in ids), dtype=np.float64, count=len(ids))
+        lons = np.fromiter((vertices[id].lon for id in ids), dtype=np.float64, count=len(ids))
+        return haversine_km_array(lat, lon, lats, lons)
@@ -0,0 +1,299 @@
+import heapq
+import math
+
+from model.battery_router import BatteryRouter
+
+
+class Tour:
+    # Recorrido de un dron: sale del depósito, visita las paradas en orden y vuelve.
+    __slots__ = ("depot", "stops", "path", "distance")
+
+    def __init__(self, depot, stops, path, distance):
+        self.depot = depot
+        self.stops = stops          # índices (en la lista de destinos del lote) en orden de visita
+        self.path = path            # nodos del recorrido completo, de depósito a depósito
+        self.distance = distance
+
+
+class TourPlan:
+    # Resultado de TourPlanner.plan para un depósito.
+    def __init__(self, depot, tours, unserved, single_distance):
+        self.depot = depot
+        self.tours = tours
+        self.unserved = unserved                  # índices sin viaje de ida y vuelta factible
+        self.single_distance = single_distance    # ida y vuelta de cada orden por separado
+        self.distance = sum(tour.distance for tour in tours)
+
+    @property
+    def saved(self):
+        return self.single_distance - self.distance
+
+
+class TourPlanner:
+    """
+    Consolidación de entregas: arma recorridos de varias paradas desde un
+    depósito (problema de ruteo de vehículos con capacidad).
+
+    1. Matriz de distancias entre el depósito y los destinos del lote: un
+       Dijkstra por nodo distinto (con predecesores para armar los caminos),
+       que se detiene cuando todas las paradas quedan asentadas.
+    2. Construcción por ahorros (Clarke-Wright): se parte de un viaje por
+       orden y se unen los recorridos i...-> y ->j... de mayor ahorro
+       d(0,i) + d(j,0) - d(i,j), respetando la capacidad.
+    3. Mejora local hasta que no haya cambios: 2-opt (invertir un tramo) y
+       or-opt (mover un tramo de 1 a 3 paradas a otra posición del mismo
+       recorrido o de otro con capacidad libre).
+
+    Cada recorrido se vuela tramo a tramo con la regla de batería de
+    Simulation.calculate_route (en cada arista se descuenta su peso y, si la
+    batería queda negativa, solo se puede seguir si el nodo de llegada es de
+    recarga): cada tramo entre paradas es el camino mínimo si alcanza con la
+    batería que queda y, si no, se repara con BatteryRouter desde esa batería
+    (desvío por estaciones de recarga). Un recorrido es infactible si algún
+    tramo no tiene reparación. Las distancias mínimas de la matriz sirven
+    para elegir movimientos; un movimiento se aplica solo si el recorrido
+    resultante es factible y su distancia real (con desvíos) mejora.
+    """
+
+    def __init__(self, graph, battery_limit=50, capacity=5):
+        self.graph = graph
+        self.battery_limit = battery_limit
+        self.capacity = capacity    # Órdenes por recorrido
+        self.router = BatteryRouter(graph)
+
+    def plan(self, depot, destinations):
+        # Recorridos para entregar en destinations (puede haber destinos repetidos).
+        nodes = [depot] + list(destinations)
+        dist, pred = self._trees(set(nodes))
+        self._nodes, self._dist, self._pred = nodes, dist, pred
+        self._walks = {}
+        self._repairs = {}   # (parada, parada, batería) -> tramo reparado (o None)
+
+        served, unserved = [], []
+        for i in range(1, len(nodes)):
+            if self._cost((i,)) < math.inf and self._feasible((i,)):
+                served.append(i)
+            else:
+                unserved.append(i - 1)
+        single = sum(self._distance((i,)) for i in served)
+
+        routes = self._savings(served)
+        self._improve(routes)
+        tours = []
+        for route in routes:
+            path, distance = self._walk(tuple(route))
+            tours.append(Tour(depot, [i - 1 for i in route], path, distance))
+        return TourPlan(depot, tours, unserved, single)
+
+    # ------------------------------------------------------------------
+    # Construcción y mejora
+    # ------------------------------------------------------------------
+    def _savings(self, served):
+        # Clarke-Wright: une recorridos por los extremos en orden de ahorro.
+        d = self._d
+        route_of = {i: [i] for i in served}
+        savings = []
+        for a, i in enumerate(served):
+            for j in served[a + 1:]:
+                saving = d(0, i) + d(j, 0) - d(i, j)
+                if saving > 0:
+                    savings.append((-saving, i, j))
+        savings.sort()
+        for _, i, j in savings:
+            first, second = route_of[i], route_of[j]
+            if first is second or len(first) + len(second) > self.capacity:
+                continue
+            # i debe quedar al final de su recorrido y j al comienzo del suyo.
+            if first[-1] != i:
+                if first[0] != i:
+                    continue
+                first = first[::-1]
+            if second[0] != j:
+                if second[-1] != j:
+                    continue
+                second = second[::-1]
+            merged = first + second
+            # (first y second pueden estar invertidos: la distancia de referencia es la de los originales)
+            if (not self._feasible(tuple(merged))
+                    or self._distance(merged) >= self._distance(route_of[i]) + self._distance(route_of[j])):
+                continue
+            for k in merged:
+                route_of[k] = merged
+        unique = {id(route): route for route in route_of.values()}
+        return list(unique.values())
+
+    def _improve(self, routes):
+        # 2-opt y or-opt hasta que ningún movimiento mejore la distancia total.
+        improved = True
+        while improved:
+            improved = False
+            for r, route in enumerate(routes):
+                better = self._two_opt(route)
+                if better is not None:
+                    routes[r] = better
+                    improved = True
+            if self._or_opt(routes):
+                improved = True
+            routes[:] = [route for route in routes if route]
+
+    def _two_opt(self, route):
+        # Primer 2-opt que mejora el recorrido (invierte route[a:b]); None si no hay.
+        d = self._d
+        tour = [0] + route + [0]
+        for a in range(1, len(tour) - 2):
+            for b in range(a + 1, len(tour) - 1):
+                delta = (d(tour[a - 1], tour[b]) + d(tour[a], tour[b + 1])
+                         - d(tour[a - 1], tour[a]) - d(tour[b], tour[b + 1]))
+                if delta < -1e-9:
+                    candidate = route[:a - 1] + route[a - 1:b][::-1] + route[b:]
+                    if (self._feasible(tuple(candidate))
+                            and self._distance(candidate) < self._distance(route) - 1e-9):
+                        return candidate
+        return None
+
+    def _or_opt(self, routes):
+        # Mueve un tramo de 1 a 3 paradas a la mejor posición (en su recorrido o en otro).
+        # Aplica el primer movimiento que mejora y devuelve True; False si no hay.
+        cost = self._cost
+        for r, route in enumerate(routes):
+            for length in (1, 2, 3):
+                for start in range(len(route) - length + 1):
+                    segment = route[start:start + length]
+                    rest = route[:start] + route[start + length:]
+                    before = cost(route)
+                    removed = before - cost(rest)
+                    rest_ok = not rest or self._feasible(tuple(rest))
+                    for t, target in enumerate(routes):
+                        base = rest if t == r else target
+                        if t != r and (len(target) + length > self.capacity or not rest_ok):
+                            continue
+                        base_cost = cost(base)
+                        for pos in range(len(base) + 1):
+                            for seg in (segment, segment[::-1]):
+                                candidate = base[:pos] + seg + base[pos:]
+                                if t == r and candidate == route:
+                                    continue
+                                added = cost(candidate) - base_cost
+                                if (added < removed - 1e-9 and self._feasible(tuple(candidate))
+                                        and self._improves(routes, r, t, rest, candidate)):
+                                    if t == r:
+                                        routes[r] = candidate
+                                    else:
+                                        routes[r], routes[t] = rest, candidate
+                                    return True
+        return False
+
+    def _improves(self, routes, r, t, rest, candidate):
+        # Si el movimiento de or-opt baja la distancia real (con desvíos de recarga).
+        distance = self._distance
+        if t == r:
+            return distance(candidate) < distance(routes[r]) - 1e-9
+        return distance(rest) + distance(candidate) < distance(routes[r]) + distance(routes[t]) - 1e-9
+
+    # ------------------------------------------------------------------
+    # Distancias, caminos y batería
+    # ------------------------------------------------------------------
+    def _trees(self, sources):
+        # Dijkstra desde cada nodo de sources hasta asentar todos: distancias y predecesores.
+        dist, pred = {}, {}
+        for source in sources:
+            pending = set(sources)
+            best = {source: 0}
+            parent = {source: None}
+            done = {}
+            heap = [(0, source)]
+            while heap and pending:
+                d, node = heapq.heappop(heap)
+                if node in done:
+                    continue
+                done[node] = d
+                pending.discard(node)
+                for neighbor, weight in self.graph.get_neighbors(node):
+                    if d + weight < best.get(neighbor, math.inf):
+                        best[neighbor] = d + weight
+                        parent[neighbor] = node
+                        heapq.heappush(heap, (d + weight, neighbor))
+            dist[source], pred[source] = done, parent
+        return dist, pred
+
+    def _d(self, i, j):
+        # Distancia mínima entre las paradas i y j (0 es el depósito).
+        return self._dist[self._nodes[i]].get(self._nodes[j], math.inf)
+
+    def _cost(self, route):
+        # Distancia mínima del recorrido depósito -> route -> depósito (0 si route está
+        # vacío), sin contar desvíos de recarga: cota inferior de _distance.
+        d = self._d
+        total, previous = 0, 0
+        for i in route:
+            total += d(previous, i)
+            previous = i
+        return total + d(previous, 0)
+
+    def _leg(self, a, b):
+        # Camino mínimo (sin batería) de la parada a a la parada b.
+        nodes, pred = self._nodes, self._pred
+        leg = []
+        node, source = nodes[b], nodes[a]
+        while node != source:
+            leg.append(node)
+            node = pred[source][node]
+        leg.append(source)
+        leg.reverse()
+        return leg
+
+    def _bound(self, b):
+        # Cota para el A* de una reparación hacia la parada b: la distancia desde b si
+        # quedó asentada en su Dijkstra y, si no, el radio que alcanzó (ninguna es menor).
+        dist = self._dist[self._nodes[b]]
+        radius = max(dist.values())
+        return lambda node: dist.get(node, radius)
+
+    def _walk(self, route):
+        """
+        (camino, distancia) del recorrido volado tramo a tramo con la batería
+        que queda (ver la clase), o None si es infactible. Con caché por recorrido.
+        """
+        if route in self._walks:
+            return self._walks[route]
+        nodes = self._nodes
+        path, total, battery = [nodes[0]], 0, self.battery_limit
+        result = None
+        for a, b in zip((0,) + route, route + (0,)):
+            leg = self._leg(a, b)
+            cost = self._d(a, b)
+            end = self._drain(leg, battery)
+            if end is None:
+                key = (nodes[a], nodes[b], battery)
+                if key not in self._repairs:
+                    self._repairs[key] = self.router.route(nodes[a], nodes[b], self.battery_limit, battery,
+                                                           self._bound(b))
+                leg, cost = self._repairs[key]
+                if leg is None:
+                    break
+                end = self._drain(leg, battery)
+            path.extend(leg[1:])
+            total += cost
+            battery = end
+        else:
+            result = (path, total)
+        self._walks[route] = result
+        return result
+
+    def _feasible(self, route):
+        return self._walk(route) is not None
+
+    def _distance(self, route):
+        # Distancia real de un recorrido factible (0 si está vacío).
+        return self._walk(tuple(route))[1] if route else 0
+
+    def _drain(self, path, battery):
+        # Batería al final de path saliendo con battery (None si no alcanza).
+        graph, limit = self.graph, self.battery_limit
+        for u, v in zip(path, path[1:]):
+            battery -= graph.vertices[u].neighbors[v]
+            if battery < 0:
+                if graph.get_role(v) != "recharge":
+                    return None
+                battery = limit
+        return battery
@@ -33,7 +33,7 @@ class ReportGenerator:
         pdf.ln(4)
         # Rutas más usadas
         pdf.cell(0, 8, "Rutas más usadas", ln=True)
-        for route, freq in self.sim.get_route_frequencies()[:5]:
+        for route, freq in self.sim.get_top_routes(5):
             pdf.cell(0, 6, f"{route} - {freq} veces", ln=True)
         pdf.ln(4)
         # Gráficos
@@ -0,0 +1,158 @@
+import time
+
+import numpy as np
+
+
+class WorkloadModel:
+    """
+    Modelo de demanda reproducible para generar órdenes.
+
+    Los destinos son nodos cliente con popularidad tipo Zipf (pocos clientes
+    concentran muchas órdenes, como en una ciudad real); el origen de cada
+    orden es el depósito más cercano al destino (Graph.depot_partition). La
+    misma semilla produce siempre la misma secuencia de órdenes.
+    """
+
+    def __init__(self, graph, seed=None, zipf=1.1):
+        self.graph = graph
+        self.rng = np.random.default_rng(seed)
+        clients = sorted(id for id, vertex in graph.vertices.items() if vertex.role == "client")
+        self.destinations = clients or sorted(graph.vertices)
+        # Popularidad: el cliente en la posición r (orden aleatorio) tiene peso 1 / r^zipf.
+        weights = 1.0 / np.arange(1, len(self.destinations) + 1) ** zipf
+        self.weights = self.rng.permutation(weights / weights.sum())
+        self.partition = graph.depot_partition()
+
+    def sample(self, n):
+        # Devuelve n pares (origen, destino); el origen es None si ningún depósito alcanza el destino.
+        picks = self.rng.choice(len(self.destinations), size=n, p=self.weights)
+        destinations = self.destinations
+        depot_of = self.partition.depot_of
+        return [(depot_of(destinations[i]), destinations[i]) for i in picks.tolist()]
+
+
+class BatchRunner:
+    """
+    Ejecuta una simulación sin interfaz: genera N órdenes con un WorkloadModel,
+    las rutea con la misma política que Simulation.create_order y las registra
+    en la Simulation.
+
+    Las órdenes se procesan por lotes: dentro de un lote se agrupan por
+    depósito de origen y cada depósito obtiene las rutas candidatas de todos
+    sus destinos con Simulation.candidate_routes_from (una sola búsqueda para
+    las primeras rutas, caché de rutas y RechargeOverlay). Cada orden elige su
+    ruta entre las candidatas con Simulation.select_best_route, que depende de
+    las frecuencias del momento. Las candidatas ya calculadas se reutilizan en
+    los lotes siguientes mientras el grafo no cambie.
+
+    El progreso se informa con eventos a las funciones registradas con
+    add_listener: ("progress", hechas, total), ("order_failed", origen,
+    destino, motivo) y ("finished", resumen).
+    """
+
+    def __init__(self, sim, workload=None, seed=None, battery_limit=50, batch_size=5000):
+        self.sim = sim
+        self.workload = workload if workload is not None else WorkloadModel(sim.graph, seed)
+        self.battery_limit = battery_limit
+        self.batch_size = batch_size
+        self._routes = {}          # (origen, destino) -> [(ruta, costo), ...] candidatas
+        self._routes_version = sim.graph.version
+        self._listeners = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, *args):
+        for callback in self._listeners:
+            callback(event, *args)
+
+    def run(self, n_orders):
+        """
+        Genera, rutea y registra n_orders órdenes. Devuelve un resumen con
+        rendimiento (órdenes por segundo), distribución de costos y rutas fallidas.
+        """
+        sim = self.sim
+        costs = []
+        failed = {}
+        start = time.perf_counter()
+        done = 0
+        while done < n_orders:
+            batch = self.workload.sample(min(self.batch_size, n_orders - done))
+            self._route_batch(batch)
+            for origin, destination in batch:
+                candidates = self._routes.get((origin, destination))
+                if not candidates:
+                    failed[(origin, destination)] = failed.get((origin, destination), 0) + 1
+                    reason = "sin depósito alcanzable" if origin is None else "sin ruta factible"
+                    self._notify("order_failed", origin, destination, reason)
+                    continue
+                path, cost = sim.select_best_route(list(candidates))
+                sim.register_order(origin, destination, path, cost)
+                costs.append(cost)
+            done += len(batch)
+            self._notify("progress", done, n_orders)
+        elapsed = time.perf_counter() - start
+
+        summary = self._summary(n_orders, costs, failed, elapsed)
+        self._notify("finished", summary)
+        return summary
+
+    def _route_batch(self, batch):
+        # Calcula las candidatas que falten del lote, agrupadas por depósito de origen.
+        if self.sim.graph.version != self._routes_version:
+            self._routes = {}
+            self._routes_version = self.sim.graph.version
+        routes = self._routes
+        pending = {}
+        for origin, destination in batch:
+            if (origin, destination) not in routes:
+                if origin is None:
+                    routes[(origin, destination)] = []
+                else:
+                    pending.setdefault(origin, set()).add(destination)
+        for origin, destinations in pending.items():
+            found = self.sim.candidate_routes_from(origin, destinations, battery_limit=self.battery_limit)
+            for destination in destinations:
+                routes[(origin, destination)] = found[destination]
+
+    def _summary(self, n_orders, costs, failed, elapsed):
+        created = len(costs)
+        summary = {
+            "orders_requested": n_orders,
+            "orders_created": created,
+            "orders_failed": n_orders - created,
+            "elapsed_s": elapsed,
+            "orders_per_sec": n_orders / elapsed if elapsed > 0 else float("inf"),
+            "failed_routes": sorted(failed.items(), key=lambda item: item[1], reverse=True)[:20],
+            "cost": None,
+        }
+        if costs:
+            values = np.asarray(costs, dtype=np.float64)
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            summary["cost"] = {
+                "min": float(values.min()), "mean": float(values.mean()),
+                "p50": float(p50), "p90": float(p90), "p99": float(p99),
+                "max": float(values.max()), "total": float(values.sum()),
+            }
+        return summary
+
+
+if __name__ == "__main__":
+    # Uso: python -m sim.batch_runner [n_nodos] [n_aristas] [n_ordenes] [semilla]
+    import sys
+
+    from sim.init_simulation import SimulationInitializer
+    from sim.simulation import Simulation
+
+    n_nodes, m_edges, n_orders, seed = (list(map(int, sys.argv[1:])) + [10000, 30000, 100000, 42][len(sys.argv) - 1:])[:4]
+    graph = SimulationInitializer(n_nodes, m_edges, seed=seed).generate_large_graph()
+    runner = BatchRunner(Simulation(graph, load_clients=False), seed=seed)
+    runner.add_listener(lambda event, *args: print(f"{args[0]}/{args[1]} órdenes") if event == "progress" else None)
+    result = runner.run(n_orders)
+    print(f"{result['orders_created']} creadas, {result['orders_failed']} fallidas, "
+          f"{result['orders_per_sec']:.0f} órdenes/s")
+    print("costo:", result["cost"])
@@ -0,0 +1,477 @@
+"""
+Checkpoints de una Simulation: instantánea completa + registro de cambios.
+
+Archivos (little-endian, secciones alineadas a 8 bytes):
+
+    path          instantánea completa. Se escribe en path.tmp, se hace fsync y
+                  se reemplaza con os.replace: un corte deja la anterior intacta.
+    path.delta    registros incrementales que se agregan al final (órdenes
+                  nuevas, órdenes modificadas, rutas y clientes nuevos).
+
+Cada archivo es una secuencia de registros: cabecera RECORD_FORMAT (magic,
+versión, secciones, generación, número de registro, largo y CRC32 del
+contenido) y luego las secciones, cada una con SECTION_FORMAT (nombre, tipo
+numpy o "json"/"raw", largo) y sus bytes. La generación identifica la
+instantánea: los registros de cambios de otra generación (quedan si el
+proceso se corta entre la instantánea y el vaciado de path.delta) se ignoran,
+y un registro incompleto al final (corte a mitad de escritura) se descarta.
+
+Las órdenes se guardan por columnas. Al restaurar quedan en un OrderArchive
+(arreglos numpy) y cada Order se arma recién cuando se la pide
+(Simulation.get_order), así restaurar un millón de órdenes no crea un millón
+de objetos.
+"""
+import datetime
+import json
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from domain.client import Client
+from domain.order import Order
+from model.csr_graph import CSRGraph
+from model.snapshot import dump_csr, load_csr_buffer
+from sim.simulation import Simulation
+from tda.route_store import RouteStore
+from tda.route_tree import RouteTree
+
+SNAPSHOT_MAGIC = b"DRSIMCK\0"
+DELTA_MAGIC = b"DRDELTA\0"
+FORMAT_VERSION = 1
+# magic, versión, cantidad de secciones, generación, número de registro, largo del contenido, crc32
+RECORD_FORMAT = "<8sIIQQQI4x"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+# nombre, tipo (dtype de numpy, "json" o "raw"), largo en bytes
+SECTION_FORMAT = "<24s8sQ"
+SECTION_SIZE = struct.calcsize(SECTION_FORMAT)
+
+# Columnas de las órdenes: nombre de sección -> dtype.
+ORDER_COLUMNS = {
+    "o_id": "<i8",         # id de la orden (ordenadas por id)
+    "o_origin": "<i4",     # índice en la tabla de nodos
+    "o_dest": "<i4",
+    "o_route": "<i4",      # id de ruta en el RouteStore
+    "o_cost": "<i8",       # int64, o float64 si algún costo no es entero
+    "o_priority": "<i8",
+    "o_status": "<i1",     # índice en la tabla de estados
+    "o_created": "<f8",    # timestamp
+    "o_delivered": "<f8",  # timestamp, NaN si no se entregó
+}
+ROUTE_ARRAYS = ("parent", "code", "first_child", "next_sibling", "route_ids", "through_offsets", "through")
+
+
+def _pad(size):
+    return (-size) % 8
+
+
+def _pack(magic, generation, sequence, sections):
+    # Bytes de un registro. sections: nombre -> arreglo numpy, bytes o valor JSON.
+    parts = []
+    for name, value in sections.items():
+        if isinstance(value, np.ndarray):
+            kind, data = value.dtype.str, value.tobytes()
+        elif isinstance(value, (bytes, bytearray)):
+            kind, data = "raw", bytes(value)
+        else:
+            kind, data = "json", json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if len(name) > 24:
+            raise ValueError(f"Nombre de sección demasiado largo: {name}")
+        parts.append(struct.pack(SECTION_FORMAT, name.encode(), kind.encode(), len(data)))
+        parts.append(data)
+        parts.append(b"\0" * _pad(len(data)))
+    body = b"".join(parts)
+    header = struct.pack(RECORD_FORMAT, magic, FORMAT_VERSION, len(sections), generation, sequence,
+                         len(body), zlib.crc32(body))
+    return header + body
+
+
+def _unpack(data, offset, magic):
+    # Lee el registro que empieza en offset: (generación, número, secciones, fin). ValueError si está dañado.
+    if len(data) - offset < RECORD_SIZE:
+        raise ValueError("Registro truncado")
+    found, version, count, generation, sequence, length, checksum = struct.unpack_from(RECORD_FORMAT, data, offset)
+    if found != magic:
+        raise ValueError("El archivo no es un checkpoint de la simulación")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Versión de checkpoint no soportada: {version}")
+    start = offset + RECORD_SIZE
+    body = memoryview(data)[start:start + length]
+    if len(body) < length or zlib.crc32(body) != checksum:
+        raise ValueError("Registro incompleto o dañado")
+    sections = {}
+    position = 0
+    for _ in range(count):
+        name, kind, size = struct.unpack_from(SECTION_FORMAT, body, position)
+        position += SECTION_SIZE
+        raw = body[position:position + size]
+        name, kind = name.rstrip(b"\0").decode(), kind.rstrip(b"\0").decode()
+        if kind == "json":
+            sections[name] = json.loads(bytes(raw))
+        elif kind == "raw":
+            sections[name] = raw
+        else:
+            sections[name] = np.frombuffer(raw, dtype=kind)
+        position += size + _pad(size)
+    return generation, sequence, sections, start + length
+
+
+def _timestamp(date):
+    return date.timestamp() if date is not None else float("nan")
+
+
+class OrderArchive:
+    """
+    Órdenes restauradas de un checkpoint, guardadas por columnas (numpy) y
+    ordenadas por id. take(id) arma la Order la primera vez que se la pide y
+    la marca como tomada: desde ahí vive en el HashMap de la Simulation y el
+    archivo ya no la devuelve.
+    """
+
+    def __init__(self, columns, nodes, statuses, route_store, changes):
+        self.columns = columns          # nombre -> arreglo (ver ORDER_COLUMNS)
+        self.nodes = nodes              # índice -> id de nodo
+        self.statuses = statuses        # índice -> estado
+        self.route_store = route_store
+        self.changes = changes
+        self.taken = np.zeros(len(columns["o_id"]), dtype=bool)
+        self._remaining = len(self.taken)
+
+    def __len__(self):
+        # Órdenes que todavía no se tomaron.
+        return self._remaining
+
+    def take(self, order_id):
+        # Arma y devuelve la orden order_id (None si no está o ya se tomó).
+        ids = self.columns["o_id"]
+        row = int(np.searchsorted(ids, order_id))
+        if row == len(ids) or ids[row] != order_id or self.taken[row]:
+            return None
+        self.taken[row] = True
+        self._remaining -= 1
+        return self._orders([row])[0]
+
+    def take_all(self):
+        # Arma todas las órdenes que faltan tomar.
+        rows = np.flatnonzero(~self.taken)
+        self.taken[rows] = True
+        self._remaining = 0
+        return self._orders(rows)
+
+    def ids_with_status(self, status):
+        # Ids de las órdenes sin tomar con el estado dado.
+        if status not in self.statuses:
+            return []
+        mask = (self.columns["o_status"] == self.statuses.index(status)) & ~self.taken
+        return self.columns["o_id"][mask].tolist()
+
+    def remaining_columns(self):
+        # Columnas de las órdenes sin tomar.
+        rows = ~self.taken
+        return {name: column[rows] for name, column in self.columns.items()}
+
+    def route_counts(self):
+        # Cantidad de órdenes sin tomar por id de ruta: (ids, cantidades).
+        return np.unique(self.columns["o_route"][~self.taken], return_counts=True)
+
+    def _orders(self, rows):
+        # Arma las Order de las filas dadas (las columnas se pasan a listas de una vez).
+        c = {name: column[rows].tolist() for name, column in self.columns.items()}
+        nodes, statuses = self.nodes, self.statuses
+        route_store, changes = self.route_store, self.changes
+        from_timestamp = datetime.datetime.fromtimestamp
+        restore = Order.restore
+        return [restore(order_id, nodes[origin], nodes[dest], route_id, cost, priority, statuses[status],
+                        from_timestamp(created), None if delivered != delivered else from_timestamp(delivered),
+                        route_store, changes)
+                for order_id, origin, dest, route_id, cost, priority, status, created, delivered
+                in zip(c["o_id"], c["o_origin"], c["o_dest"], c["o_route"], c["o_cost"], c["o_priority"],
+                       c["o_status"], c["o_created"], c["o_delivered"])]
+
+
+class Checkpointer:
+    """
+    Guarda y restaura el estado completo de una Simulation: red, clientes,
+    órdenes, RouteStore, route_log, frecuencias de origen/destino, recorridos
+    consolidados y el contador de ids.
+
+    checkpoint() agrega a path.delta solo lo que cambió desde el último
+    checkpoint (órdenes nuevas, órdenes con cambios de estado/prioridad/
+    entrega/ruta, rutas nuevas), así los checkpoints frecuentes son baratos.
+    Cuando los cambios acumulados superan compact_ratio veces el tamaño de la
+    instantánea, o si cambió la red, escribe una instantánea completa nueva.
+
+    Checkpointer.restore(path) arma la Simulation desde la instantánea y los
+    registros de cambios; las órdenes quedan en un OrderArchive y se crean a
+    medida que se piden.
+    """
+
+    def __init__(self, sim, path, compact_ratio=0.5):
+        self.sim = sim
+        self.path = path
+        self.delta_path = path + ".delta"
+        self.compact_ratio = compact_ratio
+        self.generation = None      # Generación de la última instantánea (None: todavía no hay)
+        self.sequence = 0           # Registros de cambios escritos en esta generación
+        self._snapshot_bytes = 0
+        self._delta_bytes = 0
+        self._mark()
+
+    def _mark(self):
+        # Recuerda hasta dónde llega lo ya guardado.
+        sim = self.sim
+        self._orders = sim.order_id
+        self._routes = len(sim.routes)
+        self._tours = len(sim.tour_routes)
+        self._graph_version = sim.graph.version
+        sim.order_changes.clear()
+
+    def checkpoint(self):
+        """
+        Guarda los cambios desde el último checkpoint. Devuelve "snapshot" o
+        "delta" según lo que se escribió.
+        """
+        if (self.generation is None or self.sim.graph.version != self._graph_version
+                or self._delta_bytes > self.compact_ratio * self._snapshot_bytes):
+            self.snapshot()
+            return "snapshot"
+        self._append_delta()
+        return "delta"
+
+    def snapshot(self):
+        # Escribe una instantánea completa (atómica) y vacía el registro de cambios.
+        sim = self.sim
+        generation = time.time_ns()
+        vertex_ids, route_arrays = sim.routes.to_arrays()
+        log = sim.route_log.inorder()
+        nodes, statuses, columns = self._all_order_columns()
+        sections = {
+            "meta": {
+                "order_id": sim.order_id,
+                "origin_freq": sim.origin_freq,
+                "dest_freq": sim.dest_freq,
+                "tour_routes": sim.tour_routes,
+                "clients": self._clients(),
+                "nodes": list(nodes),
+                "statuses": list(statuses),
+                "vertex_ids": vertex_ids,
+            },
+            "graph": dump_csr(CSRGraph.from_graph(sim.graph)),
+            "log_keys": np.array([key for key, _ in log], dtype="<i4"),
+            "log_freq": np.array([freq for _, freq in log], dtype="<i8"),
+        }
+        for name in ROUTE_ARRAYS:
+            sections["rs_" + name] = np.frombuffer(route_arrays[name], dtype=np.int32).astype("<i4")
+        sections.update(columns)
+        data = _pack(SNAPSHOT_MAGIC, generation, 0, sections)
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        _fsync_dir(self.path)
+        with open(self.delta_path, "wb") as f:
+            os.fsync(f.fileno())
+        self.generation, self.sequence = generation, 0
+        self._snapshot_bytes, self._delta_bytes = len(data), 0
+        self._mark()
+
+    def _append_delta(self):
+        # Agrega al registro las órdenes nuevas y modificadas, rutas, recorridos y clientes.
+        sim = self.sim
+        new_ids = range(self._orders, sim.order_id)
+        changed = sorted(i for i in sim.order_changes if i < self._orders)
+        nodes, statuses = {}, {}
+        columns = _encode([sim.orders.get(i) for i in new_ids], nodes, statuses)
+        changed_orders = [sim.get_order(i) for i in changed]
+        sections = {"meta": None}
+        sections.update(columns)
+        if changed_orders:
+            sections["c_id"] = np.array(changed, dtype="<i8")
+            sections["c_status"] = np.array([_index(statuses, o.status) for o in changed_orders], dtype="<i1")
+            sections["c_priority"] = np.array([o.priority for o in changed_orders], dtype="<i8")
+            sections["c_delivered"] = np.array([_timestamp(o.delivery_date) for o in changed_orders], dtype="<f8")
+            sections["c_route"] = np.array([o.route_id for o in changed_orders], dtype="<i4")
+            costs = [o.cost for o in changed_orders]
+            sections["c_cost"] = np.array(costs, dtype="<i8" if all(isinstance(c, int) for c in costs) else "<f8")
+        sections["meta"] = {
+            "order_id": sim.order_id,
+            "routes": [sim.routes.path(route_id) for route_id in sim.routes.route_ids()[self._routes:]],
+            "tour_routes": sim.tour_routes[self._tours:],
+            "clients": self._clients(),
+            "nodes": list(nodes),
+            "statuses": list(statuses),
+        }
+        self.sequence += 1
+        data = _pack(DELTA_MAGIC, self.generation, self.sequence, sections)
+        with open(self.delta_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._delta_bytes += len(data)
+        self._mark()
+
+    def _clients(self):
+        return [[c.id, c.name, c.node_id, c.priority, c.total_orders] for _, c in self.sim.get_clients()]
+
+    def _all_order_columns(self):
+        # Tablas de nodos y estados y columnas de todas las órdenes (OrderArchive + HashMap), por id.
+        sim = self.sim
+        archive = sim.archived_orders
+        nodes, statuses, parts = {}, {}, []
+        if archive is not None and len(archive):
+            nodes = {node: i for i, node in enumerate(archive.nodes)}
+            statuses = {status: i for i, status in enumerate(archive.statuses)}
+            parts.append(archive.remaining_columns())
+        parts.append(_encode([order for _, order in sim.orders.items()], nodes, statuses))
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in ORDER_COLUMNS}
+        order = np.argsort(columns["o_id"], kind="stable")
+        return nodes, statuses, {name: column[order] for name, column in columns.items()}
+
+    @classmethod
+    def restore(cls, path, compact_ratio=0.5):
+        """
+        Restaura la Simulation guardada en path (instantánea + registros de
+        cambios válidos). Devuelve el Checkpointer, con la simulación en .sim,
+        listo para seguir guardando. Lanza ValueError si la instantánea está dañada.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        generation, _, snapshot, _ = _unpack(data, 0, SNAPSHOT_MAGIC)
+        meta = snapshot["meta"]
+        graph = load_csr_buffer(snapshot["graph"]).to_graph()
+        sim = Simulation(graph, load_clients=False)
+        sim.routes = RouteStore.from_arrays(meta["vertex_ids"], {name: snapshot["rs_" + name] for name in ROUTE_ARRAYS})
+
+        # Registros de cambios de esta generación, en orden; se corta en el primero inválido.
+        deltas = []
+        delta_path = path + ".delta"
+        valid_end = 0
+        if os.path.exists(delta_path):
+            with open(delta_path, "rb") as f:
+                log = f.read()
+            offset = 0
+            while offset < len(log):
+                try:
+                    record_generation, sequence, sections, end = _unpack(log, offset, DELTA_MAGIC)
+                except ValueError:
+                    break
+                if record_generation != generation or sequence != len(deltas) + 1:
+                    break
+                deltas.append(sections)
+                offset = valid_end = end
+            if valid_end < len(log):
+                with open(delta_path, "r+b") as f:
+                    f.truncate(valid_end)
+
+        # Órdenes: columnas de la instantánea + las de cada registro, con tablas de nodos y estados comunes.
+        nodes = {node: i for i, node in enumerate(meta["nodes"])}
+        statuses = {status: i for i, status in enumerate(meta["statuses"])}
+        parts = [{name: snapshot[name] for name in ORDER_COLUMNS}]
+        tour_routes = list(meta["tour_routes"])
+        clients = meta["clients"]
+        order_id = meta["order_id"]
+        changes = []
+        for sections in deltas:
+            delta_meta = sections["meta"]
+            for route in delta_meta["routes"]:
+                sim.routes.intern(route)
+            node_map = np.array([_index(nodes, node) for node in delta_meta["nodes"]], dtype="<i4")
+            status_map = np.array([_index(statuses, status) for status in delta_meta["statuses"]], dtype="<i1")
+            part = {name: sections[name] for name in ORDER_COLUMNS}
+            if len(part["o_id"]):
+                part["o_origin"] = node_map[part["o_origin"]]
+                part["o_dest"] = node_map[part["o_dest"]]
+                part["o_status"] = status_map[part["o_status"]]
+                parts.append(part)
+            if "c_id" in sections:
+                changes.append((sections["c_id"], status_map[sections["c_status"]], sections["c_priority"],
+                                sections["c_delivered"], sections["c_route"], sections["c_cost"]))
+            tour_routes.extend(delta_meta["tour_routes"])
+            clients = delta_meta["clients"]
+            order_id = delta_meta["order_id"]
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in ORDER_COLUMNS}
+        rerouted = []   # (rutas anteriores, rutas nuevas) de las órdenes que cambiaron de ruta
+        for ids, status, priority, delivered, route, cost in changes:
+            rows = np.searchsorted(columns["o_id"], ids)
+            columns["o_status"][rows] = status
+            columns["o_priority"][rows] = priority
+            columns["o_delivered"][rows] = delivered
+            rerouted.append((columns["o_route"][rows].copy(), route))
+            columns["o_route"][rows] = route
+            if cost.dtype.kind == "f" and columns["o_cost"].dtype.kind != "f":
+                columns["o_cost"] = columns["o_cost"].astype("<f8")
+            columns["o_cost"][rows] = cost
+
+        nodes, statuses = list(nodes), list(statuses)
+        sim.archived_orders = OrderArchive(columns, nodes, statuses, sim.routes, sim.order_changes)
+        sim.order_id = order_id
+        sim.tour_routes = tour_routes
+        for client_id, name, node_id, priority, total_orders in clients:
+            sim.clients.insert(client_id, Client(client_id, name, node_id, priority, total_orders))
+            sim.client_priority[node_id] = priority
+
+        # route_log y frecuencias: lo de la instantánea más lo que agregan las órdenes nuevas
+        # y lo que mueven las órdenes que cambiaron de ruta (por ejemplo a un recorrido consolidado).
+        counts = dict(zip(snapshot["log_keys"].tolist(), snapshot["log_freq"].tolist()))
+        origin_freq, dest_freq = dict(meta["origin_freq"]), dict(meta["dest_freq"])
+        for part in parts[1:]:
+            for key, count in zip(*np.unique(part["o_route"], return_counts=True)):
+                counts[int(key)] = counts.get(int(key), 0) + int(count)
+            for freq, column in ((origin_freq, "o_origin"), (dest_freq, "o_dest")):
+                for code, count in zip(*np.unique(part[column], return_counts=True)):
+                    freq[nodes[code]] = freq.get(nodes[code], 0) + int(count)
+        for old, new in rerouted:
+            for key in old.tolist():
+                counts[key] -= 1
+            for key in new.tolist():
+                counts[key] = counts.get(key, 0) + 1
+        sim.route_log = RouteTree.bulk_load(sorted(item for item in counts.items() if item[1] > 0))
+        sim.origin_freq, sim.dest_freq = origin_freq, dest_freq
+
+        checkpointer = cls(sim, path, compact_ratio)
+        checkpointer.generation, checkpointer.sequence = generation, len(deltas)
+        checkpointer._snapshot_bytes, checkpointer._delta_bytes = len(data), valid_end
+        return checkpointer
+
+
+def _index(table, value):
+    # Código de value en table (dict valor -> código); lo agrega si es nuevo.
+    code = table.get(value)
+    if code is None:
+        code = table[value] = len(table)
+    return code
+
+
+def _encode(orders, nodes, statuses):
+    # Columnas (ver ORDER_COLUMNS) de una lista de Order; nodos y estados se codifican con las tablas dadas.
+    costs = [o.cost for o in orders]
+    return {
+        "o_id": np.array([o.id for o in orders], dtype="<i8"),
+        "o_origin": np.array([_index(nodes, o.origin) for o in orders], dtype="<i4"),
+        "o_dest": np.array([_index(nodes, o.destination) for o in orders], dtype="<i4"),
+        "o_route": np.array([o.route_id for o in orders], dtype="<i4"),
+        "o_cost": np.array(costs, dtype="<i8" if all(isinstance(c, int) for c in costs) else "<f8"),
+        "o_priority": np.array([o.priority for o in orders], dtype="<i8"),
+        "o_status": np.array([_index(statuses, o.status) for o in orders], dtype="<i1"),
+        "o_created": np.array([_timestamp(o.creation_date) for o in orders], dtype="<f8"),
+        "o_delivered": np.array([_timestamp(o.delivery_date) for o in orders], dtype="<f8"),
+    }
+
+
+def _fsync_dir(path):
+    # Hace persistente el os.replace (la entrada del directorio), donde el sistema lo permite.
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
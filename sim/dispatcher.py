@@ -0,0 +1,294 @@
+import time
+
+import numpy as np
+
+from model.assignment import linear_assignment
+from tda.indexed_heap import IndexedHeap
+
+# Costo de un par dron-orden imposible (traslado no factible) en la matriz de asignación.
+UNREACHABLE = 1e12
+# Costo de dejar una orden sin dron (o un dron sin orden) en un tick. Es mayor que
+# cualquier suma de costos reales, así que primero se maximiza la cantidad de
+# órdenes despachadas y luego se minimiza el costo.
+UNMATCHED = 1e9
+
+
+class Dispatcher:
+    """
+    Despachador de órdenes de una FleetSimulation por prioridad y por lotes.
+
+    Las órdenes pendientes esperan en un IndexedHeap con clave
+    (plazo, -prioridad, id). El plazo es creación + sla / prioridad, de modo que
+    una orden urgente pasa adelante de las comunes, pero una orden vieja termina
+    superando a las nuevas: la clave combina prioridad, antigüedad y plazo. Se
+    puede fijar un plazo explícito al enviar la orden, y cambiar la prioridad o
+    cancelar órdenes pendientes en O(log n).
+
+    Cada interval segundos simulados (tick) se toman las órdenes más urgentes
+    (hasta lookahead por cada dron libre) y se asignan a los drones libres
+    resolviendo una asignación de costo mínimo (método húngaro). Para acotar el
+    tamaño de la asignación entran a ella a lo sumo unas batch órdenes por dron
+    libre (ver _select_orders), y cada depósito aporta como candidatos solo a
+    sus drones libres más cercanos, tantos como órdenes tiene; lo que esas podas
+    dejan sin asignar se intenta en otra ronda del mismo tick. El costo de un
+    par (orden, dron) es el tiempo de traslado de la base del dron al depósito
+    de origen de la orden más urgency por cada segundo que le falta a la orden
+    para su plazo: entre órdenes parecidas se prefieren las que tienen un dron
+    cerca, pero una orden vencida se despacha aunque haya que trasladar un
+    dron. Las órdenes que no reciben dron siguen en la cola. Los traslados son
+    caminos mínimos acotados al alcance de una carga (FleetSimulation.ferry_tree):
+    un dron solo se traslada a depósitos a los que llega sin recargar. Las
+    bases de los drones son siempre depósitos: prepare() (que llama
+    FleetSimulation.set_dispatcher) calcula las filas de todos ellos antes del
+    primer tick, y se reutilizan mientras el grafo no cambie.
+
+    Como los traslados cambian la base de los drones, un depósito puede quedar
+    fuera del alcance de toda la flota. Una orden cuyo depósito no está al
+    alcance de la base de ningún dron (libre u ocupado) durante patience ticks
+    seguidos se da por fallida (FleetSimulation.reject) en lugar de volver a
+    la cola para siempre; si además la flota está quieta (sin vuelos ni
+    órdenes por llegar) nada puede cambiar y se da por fallida en ese tick.
+
+    stats() informa latencia de las asignaciones (el primer tick aparte),
+    profundidad de la cola y espera hasta el despacho por prioridad.
+    """
+
+    def __init__(self, fleet, interval=60, sla=3600, lookahead=50, batch=2, urgency=1.0, patience=120):
+        self.fleet = fleet
+        self.interval = interval
+        self.sla = sla
+        self.lookahead = lookahead
+        self.batch = batch
+        self.urgency = urgency
+        self.patience = patience
+        self.queue = IndexedHeap()   # id de orden -> (plazo, -prioridad, id)
+        self.pending = {}            # id de orden -> (orden, origen, paradas, creación, plazo)
+        self._depot_index = {}       # depósito -> columna en las filas de costos
+        self._rows = {}              # base -> costos de traslado a cada depósito
+        self._version = None
+        self._latencies = []         # segundos reales de cada tick con asignación
+        self._depths = []            # órdenes pendientes al comenzar cada tick
+        self._batches = []           # órdenes asignadas en cada tick
+        self._waits = {}             # prioridad -> segundos simulados hasta el despacho
+        self._stalled = {}           # id de orden -> ticks seguidos fuera del alcance de la flota
+        self.rejected = 0
+
+    def prepare(self):
+        # Calcula las filas de traslado de todos los depósitos (las bases posibles).
+        self._check_version()
+        self._cost_rows(list(self._depot_index))
+
+    def submit(self, order, origin, steps, created, deadline=None):
+        # Agrega una orden pendiente (steps: plan de misión desde origin).
+        if deadline is None:
+            deadline = created + self.sla / max(1, order.priority)
+        self.pending[order.id] = (order, origin, steps, created, deadline)
+        self.queue.push(order.id, (deadline, -order.priority, order.id))
+
+    def set_priority(self, order_id, priority):
+        # Cambia la prioridad de una orden pendiente y recalcula su plazo.
+        order, origin, steps, created, _ = self.pending[order_id]
+        order.priority = priority
+        deadline = created + self.sla / max(1, priority)
+        self.pending[order_id] = (order, origin, steps, created, deadline)
+        self.queue.update(order_id, (deadline, -priority, order_id))
+
+    def cancel(self, order_id):
+        # Quita una orden pendiente; devuelve la orden (None si ya fue despachada).
+        if order_id not in self.queue:
+            return None
+        self.queue.remove(order_id)
+        self._stalled.pop(order_id, None)
+        return self.pending.pop(order_id)[0]
+
+    def tick(self, now):
+        """
+        Asigna las órdenes más urgentes a los drones libres y da por fallidas
+        las que llevan patience ticks fuera del alcance de la flota. Devuelve
+        la cantidad de órdenes despachadas.
+        """
+        fleet = self.fleet
+        depth = len(self.queue)
+        self._depths.append(depth)
+        idle = [drone for drones in fleet.idle.values() for drone in drones]
+        if not idle or not depth:
+            return 0
+        started = time.perf_counter()
+        # Las órdenes del lote se leen sin sacarlas de la cola: solo salen las
+        # despachadas y las rechazadas, las demás conservan su lugar.
+        batch = [self.pending[order_id] for order_id, _ in self.queue.smallest(self.lookahead * len(idle))]
+
+        homes = sorted({drone.home for drone in idle})
+        rows = self._cost_rows(homes)
+        columns = [self._depot_index[origin] for _, origin, _, _, _ in batch]
+        slack = np.maximum(0.0, np.array([deadline for *_, deadline in batch]) - now)
+        free = {home: list(fleet.idle[home]) for home in homes}
+        assigned, dispatched = set(), set()
+        # Cada ronda asigna entre las órdenes sin dron y los drones candidatos que
+        # siguen libres; otra ronda recupera lo que la poda de candidatos dejó afuera.
+        while True:
+            selected = self._select_orders(rows, columns, slack, free, homes, dispatched)
+            if not selected:
+                break
+            candidates, home_rows = self._candidates(homes, rows, [columns[i] for i in selected], free)
+            # cost[orden, dron] = segundos de traslado de la base del dron al origen
+            # de la orden + urgency x segundos que le faltan a la orden para su plazo.
+            cost = rows[np.ix_(home_rows, [columns[i] for i in selected])].T * (3600 / fleet.speed)
+            cost += self.urgency * slack[selected][:, None]
+            cost[~np.isfinite(cost)] = UNREACHABLE
+            matched = 0
+            for i, j in self._match(cost):
+                drone = candidates[j]
+                home = homes[home_rows[j]]
+                order, origin, steps, created, _ = batch[selected[i]]
+                if not fleet.assign(drone, order, origin, steps, created, now):
+                    continue
+                matched += 1
+                assigned.add(drone.id)
+                dispatched.add(selected[i])
+                free[home].remove(drone)
+                self.queue.remove(order.id)
+                del self.pending[order.id]
+                self._stalled.pop(order.id, None)
+                self._waits.setdefault(order.priority, []).append(now - created)
+            if not matched:
+                break
+        # Las órdenes sin dron siguen en la cola con su plazo original, salvo las que
+        # llevan patience ticks sin que la base de ningún dron llegue a su depósito
+        # (o ninguna la alcanza y ya no queda ningún evento que cambie las bases).
+        reachable = self._fleet_reach()
+        quiet = not assigned and not fleet.pending_events()
+        for i, (order, origin, steps, created, deadline) in enumerate(batch):
+            if i in dispatched:
+                continue
+            if reachable[self._depot_index[origin]]:
+                self._stalled.pop(order.id, None)
+                continue
+            self._stalled[order.id] = self._stalled.get(order.id, 0) + 1
+            if quiet or self._stalled[order.id] >= self.patience:
+                self.cancel(order.id)
+                self.rejected += 1
+                fleet.reject(order, "sin dron que llegue al depósito")
+        for home in homes:
+            fleet.idle[home] = [drone for drone in fleet.idle[home] if drone.id not in assigned]
+        self._latencies.append(time.perf_counter() - started)
+        self._batches.append(len(assigned))
+        return len(assigned)
+
+    def stats(self):
+        # Latencia de asignación (ms), profundidad de la cola y espera por prioridad (min).
+        # La latencia separa el primer tick con asignación (frío: arma los traslados de
+        # las primeras misiones) de los siguientes (calientes).
+        latencies = np.asarray(self._latencies[1:]) * 1000
+        return {
+            "ticks": len(self._depths),
+            "assignment_ticks": len(self._latencies),
+            "assigned": int(sum(self._batches)),
+            "rejected": self.rejected,
+            "max_batch": max(self._batches, default=0),
+            "latency_ms": ({"cold": self._latencies[0] * 1000,
+                            "warm": ({"mean": float(latencies.mean()), "p99": float(np.percentile(latencies, 99)),
+                                      "max": float(latencies.max())} if len(latencies) else None)}
+                           if self._latencies else None),
+            "queue_depth": {"mean": float(np.mean(self._depths)) if self._depths else 0.0,
+                            "max": max(self._depths, default=0)},
+            "wait_by_priority_min": {priority: float(np.mean(waits)) / 60
+                                     for priority, waits in sorted(self._waits.items())},
+        }
+
+    def _match(self, cost):
+        """
+        Pares (orden, dron) de la asignación de costo mínimo de cost (órdenes x
+        drones). La dimensión menor va en las filas y se agrega una columna
+        ficticia por fila con costo UNMATCHED ("quedar sin pareja"): así un dron
+        sin órdenes a su alcance no fuerza un par imposible, que además haría
+        muy largos los caminos de aumento del método húngaro.
+        """
+        n_orders, n_drones = cost.shape
+        transpose = n_orders > n_drones
+        matrix = cost.T if transpose else cost
+        rows, columns = matrix.shape
+        padded = np.hstack([matrix, np.full((rows, rows), UNMATCHED)])
+        pairs = []
+        for row, column in enumerate(linear_assignment(padded).tolist()):
+            if column < columns and matrix[row, column] < UNREACHABLE:
+                pairs.append((column, row) if transpose else (row, column))
+        return pairs
+
+    def _select_orders(self, rows, columns, slack, idle, homes, dispatched):
+        # Órdenes del lote (índices, en orden de urgencia) que entran a la asignación.
+        # De cada depósito, las más urgentes sin despachar, tantas como drones libres
+        # (idle: base -> drones) lo alcanzan; esto es exacto, porque en un mismo
+        # depósito el traslado cuesta lo mismo para cualquier orden y la más urgente
+        # es la más barata. Si aun así son más de batch por dron libre, cada base
+        # aporta solo las batch x (sus drones libres) órdenes más baratas para ella.
+        available = np.array([len(idle[home]) for home in homes])
+        reach = (np.isfinite(rows) * available[:, None]).sum(axis=0)
+        selected = []
+        for i, column in enumerate(columns):
+            if i not in dispatched and reach[column] > 0:
+                reach[column] -= 1
+                selected.append(i)
+        if len(selected) <= self.batch * available.sum():
+            return selected
+        bases = np.flatnonzero(available)
+        cost = (rows[np.ix_(bases, [columns[i] for i in selected])] * (3600 / self.fleet.speed)
+                + self.urgency * slack[selected])
+        keep = set()
+        for base, base_cost in zip(bases.tolist(), cost):
+            n = min(len(selected), self.batch * int(available[base]))
+            cheapest = np.argpartition(base_cost, n - 1)[:n]
+            keep.update(cheapest[np.isfinite(base_cost[cheapest])].tolist())
+        return [selected[k] for k in sorted(keep)]
+
+    def _candidates(self, homes, rows, columns, idle):
+        # Drones candidatos y la fila de su base en rows: por cada depósito de
+        # columns, los drones libres (idle: base -> drones) de las bases más
+        # cercanas que lo alcanzan, hasta cubrir sus órdenes. Los drones de una
+        # misma base son equivalentes.
+        needed = {}
+        for column in columns:
+            needed[column] = needed.get(column, 0) + 1
+        available = np.array([len(idle[home]) for home in homes])
+        take = np.zeros(len(homes), dtype=np.int64)   # drones que aporta cada base
+        for column, count in needed.items():
+            costs = np.where(available > 0, rows[:, column], np.inf)
+            reach = np.flatnonzero(np.isfinite(costs))
+            for h in reach[np.argsort(costs[reach], kind="stable")].tolist():
+                n = min(count, available[h])
+                take[h] = max(take[h], n)
+                count -= n
+                if count <= 0:
+                    break
+        candidates, home_rows = [], []
+        for h in np.flatnonzero(take).tolist():
+            candidates.extend(idle[homes[h]][:take[h]])
+            home_rows.extend([h] * int(take[h]))
+        return candidates, home_rows
+
+    def _fleet_reach(self):
+        # Por depósito: si la base de algún dron (libre u ocupado) llega a él con un traslado.
+        rows = self._cost_rows(sorted({drone.home for drone in self.fleet.drones}))
+        return np.isfinite(rows).any(axis=0)
+
+    def _cost_rows(self, homes):
+        # Matriz (bases x depósitos) de costos de traslado, con las filas en caché.
+        self._check_version()
+        depot_index = self._depot_index
+        for home in homes:
+            if home not in self._rows:
+                row = np.full(len(depot_index), np.inf)
+                for node, (d, _) in self.fleet.ferry_tree(home).items():
+                    if node in depot_index:
+                        row[depot_index[node]] = d
+                self._rows[home] = row
+        return np.array([self._rows[home] for home in homes])
+
+    def _check_version(self):
+        # Las filas dependen del grafo: se descartan si cambió.
+        graph = self.fleet.graph
+        if self._version != graph.version:
+            depots = sorted(graph.depot_partition().depots())
+            self._depot_index = {depot: i for i, depot in enumerate(depots)}
+            self._rows = {}
+            self._version = graph.version
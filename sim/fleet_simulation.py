@@ -0,0 +1,478 @@
+import datetime
+import heapq
+import itertools
+import time
+from collections import deque
+
+import numpy as np
+
+# Tipos de evento de la cola (enteros: se comparan rápido dentro del heap).
+ORDER_ARRIVAL = 0   # llega una orden a la simulación
+LEG_END = 1         # un dron termina un tramo de su misión
+CHARGE_END = 2      # un dron termina de cargar en una estación
+DRONE_READY = 3     # un dron terminó de cargar en su depósito y queda libre
+DISPATCH_TICK = 4   # el Dispatcher asigna órdenes pendientes a drones libres
+
+# Tipos de parada al final de un tramo.
+CHARGE = 0          # estación de recarga: espera un cargador libre (FIFO)
+DELIVER = 1         # destino de la orden: se entrega
+HOME = 2            # regreso al depósito
+DEPOT = 3           # depósito de paso (traslado con Dispatcher): carga en la base y sigue
+
+
+class SimClock:
+    # Reloj simulado: segundos desde start (no depende de la hora real).
+    def __init__(self, start=None):
+        self.start = start or datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.now = 0.0
+
+    def datetime(self):
+        # Fecha y hora simuladas actuales.
+        return self.start + datetime.timedelta(seconds=self.now)
+
+
+class Drone:
+    # Dron con base en un depósito; recorre el plan de su misión tramo a tramo.
+    __slots__ = ("id", "home", "battery", "order", "plan", "step",
+                 "created_at", "dispatched_at", "busy_time", "missions", "charge_wait")
+
+    def __init__(self, drone_id, home, battery):
+        self.id = drone_id
+        self.home = home
+        self.battery = battery
+        self.order = None          # Orden en curso (None si está libre)
+        self.plan = None           # Paradas de la misión: ver FleetSimulation._leg_steps
+        self.step = 0              # Índice de la parada hacia la que vuela
+        self.created_at = 0.0      # Segundo simulado en que se creó la orden en curso
+        self.dispatched_at = 0.0
+        self.busy_time = 0.0       # Segundos en misión (vuelo, esperas y cargas, incluida la de la base)
+        self.missions = 0
+        self.charge_wait = 0.0     # Segundos esperando cargador en estaciones
+
+
+class ChargingStation:
+    # Vértice de recarga con una cantidad fija de cargadores y una cola FIFO.
+    __slots__ = ("node", "slots", "busy", "queue", "served", "total_wait", "max_queue")
+
+    def __init__(self, node, slots):
+        self.node = node
+        self.slots = slots
+        self.busy = 0
+        self.queue = deque()       # (dron, instante de llegada)
+        self.served = 0
+        self.total_wait = 0.0
+        self.max_queue = 0
+
+
+class FleetSimulation:
+    """
+    Simulación de eventos discretos de una flota de drones.
+
+    El tiempo avanza de evento en evento (cola de prioridad por instante, sin
+    esperas reales): llegada de órdenes, fin de tramo, fin de carga y dron
+    libre. Cada dron tiene base en un depósito; una orden espera en la cola
+    FIFO de su depósito hasta que haya un dron libre, que vuela la ruta de la
+    orden (BatteryRouter), entrega, y vuelve al depósito por la mejor ruta con
+    la batería que le queda. La batería sigue la misma regla que el router: en
+    cada arista se descuenta su peso y, si queda negativa al llegar a un vértice
+    "recharge", el dron carga hasta llenar. Cada vértice de recarga tiene
+    charging_slots cargadores; si están ocupados el dron espera en una cola FIFO.
+    Al volver a su depósito el dron carga en su propia base antes de quedar libre.
+
+    Los tramos entre paradas (estaciones, destino, depósito) se simulan como un
+    solo evento: en los vértices intermedios no hay nada que compartir. Los
+    planes de misión se calculan una vez por par (origen, destino).
+
+    Las órdenes se registran en la Simulation con la fecha del reloj simulado, y
+    se marcan entregadas (complete_order) en el instante simulado de llegada.
+
+    Con set_dispatcher las órdenes no esperan en la cola de su depósito: van a
+    un Dispatcher que cada cierto intervalo las asigna por prioridad a los
+    drones libres de depósitos cercanos (el dron se traslada primero, con una
+    sola carga, al depósito de origen de la orden, que pasa a ser su base).
+
+    speed: unidades de peso de arista recorridas por hora.
+    charge_rate: unidades de batería cargadas por hora.
+    """
+
+    def __init__(self, sim, battery_limit=50, speed=60.0, charge_rate=120.0, charging_slots=2, start=None):
+        self.sim = sim
+        self.graph = sim.graph
+        self.router = sim.router
+        self.battery_limit = battery_limit
+        self.speed = speed
+        self.charge_rate = charge_rate
+        self.charging_slots = charging_slots
+        self.clock = SimClock(start)
+        self.drones = []
+        self.stations = {}         # vértice de recarga -> ChargingStation (se crean al usarse)
+        self.idle = {}             # depósito -> drones libres
+        self.waiting = {}          # depósito -> deque de órdenes esperando dron
+        self._events = []          # (instante, secuencia, tipo, dato)
+        self._seq = itertools.count()
+        self._plans = {}           # (origen, destino) -> (ruta, costo, paradas) o None
+        self._plans_version = self.graph.version
+        self._dispatch_waits = []  # Segundos entre creación y despacho de cada orden
+        self._lead_times = []      # Segundos entre creación y entrega de cada orden
+        self._failed = {}          # motivo -> cantidad
+        self._ferries = {}         # (base, depósito) -> paradas del traslado o None
+        self._ferry_trees = {}     # base -> caminos mínimos acotados (ver ferry_tree)
+        self.dispatcher = None
+        self.events_processed = 0
+
+    # ------------------------------------------------------------------
+    # Configuración
+    # ------------------------------------------------------------------
+    def add_drone(self, home):
+        # Agrega un dron con base en el depósito home, libre y con batería llena.
+        drone = Drone(len(self.drones), home, self.battery_limit)
+        self.drones.append(drone)
+        self.idle.setdefault(home, []).append(drone)
+        return drone
+
+    def add_fleet(self, n, demand=None):
+        """
+        Reparte n drones entre los depósitos. demand ({depósito: órdenes
+        esperadas}) reparte en proporción a la demanda (restos mayores); sin
+        demand se reparten por igual entre todos los depósitos. Si alcanzan,
+        cada depósito con demanda recibe al menos un dron.
+        """
+        if demand is None:
+            depots = sorted(self.graph.depot_partition().depots())
+            demand = {depot: 1 for depot in depots}
+        depots = sorted(depot for depot, weight in demand.items() if depot is not None and weight > 0)
+        if not depots:
+            return []
+        base = 1 if n >= len(depots) else 0
+        shares = np.array([demand[depot] for depot in depots], dtype=np.float64)
+        shares *= (n - base * len(depots)) / shares.sum()
+        counts = np.floor(shares).astype(np.int64)
+        remaining = n - base * len(depots) - int(counts.sum())
+        counts[np.argsort(counts - shares, kind="stable")[:remaining]] += 1
+        counts += base
+        return [self.add_drone(depot) for depot, count in zip(depots, counts.tolist()) for _ in range(count)]
+
+    def set_dispatcher(self, dispatcher):
+        # Usa un Dispatcher (sim.dispatcher) para asignar órdenes a drones.
+        # Los costos de traslado se calculan acá y no en el primer tick.
+        self.dispatcher = dispatcher
+        dispatcher.prepare()
+        self._push(self.clock.now, DISPATCH_TICK, None)
+
+    def schedule_order(self, at, origin, destination):
+        # Programa la llegada de una orden en el segundo simulado at (origin None: depósito más cercano).
+        self._push(at, ORDER_ARRIVAL, (origin, destination))
+
+    def schedule_orders(self, orders):
+        # Programa varias órdenes [(instante, origen, destino), ...] y precalcula
+        # sus planes con una búsqueda por depósito de origen.
+        partition = self.graph.depot_partition()
+        pending = {}
+        for at, origin, destination in orders:
+            if origin is None:
+                origin = partition.depot_of(destination)
+            self._push(at, ORDER_ARRIVAL, (origin, destination))
+            if origin is not None and (origin, destination) not in self._plans:
+                pending.setdefault(origin, set()).add(destination)
+        self._check_version()
+        for origin, destinations in pending.items():
+            found = self.router.routes_from(origin, destinations, self.battery_limit)
+            for destination in destinations:
+                route = found.get(destination)
+                self._plans[(origin, destination)] = self._mission(origin, destination, *route) if route else None
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+    def run(self, until=None):
+        """
+        Procesa eventos en orden de tiempo hasta vaciar la cola o pasar el
+        segundo simulado until. Devuelve el resumen de summary().
+        """
+        events, clock = self._events, self.clock
+        started = time.perf_counter()
+        processed = 0
+        while events:
+            if until is not None and events[0][0] > until:
+                clock.now = until
+                break
+            now, _, kind, data = heapq.heappop(events)
+            clock.now = now
+            processed += 1
+            if kind == LEG_END:
+                self._on_leg_end(data, now)
+            elif kind == ORDER_ARRIVAL:
+                self._on_order(data, now)
+            elif kind == CHARGE_END:
+                self._on_charge_end(data, now)
+            elif kind == DISPATCH_TICK:
+                self._on_tick(now)
+            else:
+                self._on_ready(data, now)
+        self.events_processed += processed
+        return self.summary(time.perf_counter() - started)
+
+    def summary(self, elapsed=None):
+        # Resumen de la corrida: órdenes, tiempos de espera y entrega, uso de drones y estaciones.
+        horizon = self.clock.now
+        result = {
+            "sim_time_h": horizon / 3600,
+            "events": self.events_processed,
+            "elapsed_s": elapsed,
+            "orders_delivered": len(self._lead_times),
+            "orders_waiting": (sum(len(queue) for queue in self.waiting.values())
+                               + (len(self.dispatcher.queue) if self.dispatcher else 0)),
+            "orders_in_flight": sum(1 for drone in self.drones if drone.order is not None),
+            "orders_failed": dict(self._failed),
+            "dispatch_wait_min": _percentiles(self._dispatch_waits),
+            "lead_time_min": _percentiles(self._lead_times),
+            "drone_utilization": (sum(drone.busy_time for drone in self.drones) / (horizon * len(self.drones))
+                                  if horizon > 0 and self.drones else 0.0),
+            "stations_used": len(self.stations),
+            "charges": sum(station.served for station in self.stations.values()),
+            "max_charging_queue": max((station.max_queue for station in self.stations.values()), default=0),
+            "charging_wait_min": (sum(station.total_wait for station in self.stations.values())
+                                  / max(1, sum(station.served for station in self.stations.values())) / 60),
+        }
+        if self.dispatcher is not None:
+            result["dispatcher"] = self.dispatcher.stats()
+        return result
+
+    def assign(self, drone, order, origin, steps, created, now):
+        """
+        Despacha un dron libre con una orden del depósito origin (la usa el
+        Dispatcher). Si el dron está en otro depósito primero se traslada y
+        carga allí; origin pasa a ser su base. Devuelve False si el traslado
+        no es factible.
+        """
+        if drone.home != origin:
+            ferry = self.ferry_steps(drone.home, origin)
+            if ferry is None:
+                return False
+            steps = ferry + steps
+            drone.home = origin
+        self._dispatch(drone, order, steps, created, now)
+        return True
+
+    def pending_events(self):
+        # Cantidad de eventos programados (vuelos, cargas, llegadas y ticks).
+        return len(self._events)
+
+    def reject(self, order, reason):
+        # Da por fallida una orden ya registrada que no se va a despachar (la usa el Dispatcher).
+        order.status = "Cancelled"
+        self._fail(reason)
+
+    def ferry_steps(self, home, depot):
+        # Paradas del traslado de un dron de su base a otro depósito (None si no es factible).
+        self._check_version()
+        key = (home, depot)
+        if key not in self._ferries:
+            tree = self.ferry_tree(home)
+            steps = None
+            if depot in tree:
+                path = [depot]
+                while path[-1] != home:
+                    path.append(tree[path[-1]][1])
+                path.reverse()
+                steps = tuple(self._leg_steps(path, self.battery_limit, DEPOT))
+            self._ferries[key] = steps
+        return self._ferries[key]
+
+    def ferry_tree(self, home):
+        """
+        Caminos mínimos desde home hasta distancia battery_limit (el alcance
+        de un traslado sin recargar): {nodo: (distancia, anterior)}. Es un
+        Dijkstra acotado, en caché por base mientras el grafo no cambie.
+        """
+        self._check_version()
+        tree = self._ferry_trees.get(home)
+        if tree is None:
+            tree = {}
+            heap = [(0, home, None)]
+            while heap:
+                d, node, parent = heapq.heappop(heap)
+                if node in tree:
+                    continue
+                tree[node] = (d, parent)
+                for neighbor, weight in self.graph.get_neighbors(node):
+                    if neighbor not in tree and d + weight <= self.battery_limit:
+                        heapq.heappush(heap, (d + weight, neighbor, node))
+            self._ferry_trees[home] = tree
+        return tree
+
+    # ------------------------------------------------------------------
+    # Eventos
+    # ------------------------------------------------------------------
+    def _on_order(self, data, now):
+        origin, destination = data
+        if origin is None:
+            origin = self.graph.depot_partition().depot_of(destination)
+            if origin is None:
+                return self._fail("sin depósito alcanzable")
+        plan = self._plan(origin, destination)
+        if plan is None:
+            return self._fail("sin ruta factible")
+        if origin not in self.idle and (self.dispatcher is None or not self.drones):
+            return self._fail("sin drones en el depósito")
+        path, cost, steps = plan
+        order = self.sim.register_order(origin, destination, path, cost, creation_date=self.clock.datetime())
+        if self.dispatcher is not None:
+            self.dispatcher.submit(order, origin, steps, now)
+            return
+        idle = self.idle[origin]
+        if idle:
+            self._dispatch(idle.pop(), order, steps, now, now)
+        else:
+            self.waiting.setdefault(origin, deque()).append((order, steps, now))
+
+    def _on_leg_end(self, drone, now):
+        duration, node, kind, battery, charge_time = drone.plan[drone.step]
+        drone.battery = battery
+        if kind == CHARGE:
+            station = self.stations.get(node)
+            if station is None:
+                station = self.stations[node] = ChargingStation(node, self.charging_slots)
+            if station.busy < station.slots:
+                station.busy += 1
+                station.served += 1
+                self._push(now + charge_time, CHARGE_END, drone)
+            else:
+                station.queue.append((drone, now))
+                if len(station.queue) > station.max_queue:
+                    station.max_queue = len(station.queue)
+        elif kind == DELIVER:
+            order = drone.order
+            order.complete_order(self.clock.datetime())
+            self._lead_times.append(now - drone.created_at)
+            self._next_leg(drone, now)
+        elif kind == DEPOT:
+            # Traslado terminado: carga en el depósito y sale con la orden.
+            drone.battery = self.battery_limit
+            drone.step += 1
+            self._push(now + charge_time + drone.plan[drone.step][0], LEG_END, drone)
+        else:
+            # De vuelta en el depósito: carga en su base y luego queda libre.
+            drone.order = None
+            drone.plan = None
+            self._push(now + charge_time, DRONE_READY, drone)
+
+    def _on_charge_end(self, drone, now):
+        drone.battery = self.battery_limit
+        station = self.stations[drone.plan[drone.step][1]]
+        if station.queue:
+            waiting, arrived = station.queue.popleft()
+            station.served += 1
+            station.total_wait += now - arrived
+            waiting.charge_wait += now - arrived
+            self._push(now + waiting.plan[waiting.step][4], CHARGE_END, waiting)
+        else:
+            station.busy -= 1
+        self._next_leg(drone, now)
+
+    def _on_ready(self, drone, now):
+        drone.battery = self.battery_limit
+        drone.busy_time += now - drone.dispatched_at
+        queue = self.waiting.get(drone.home)
+        if queue:
+            order, steps, created = queue.popleft()
+            self._dispatch(drone, order, steps, created, now)
+        else:
+            self.idle.setdefault(drone.home, []).append(drone)
+
+    def _on_tick(self, now):
+        self.dispatcher.tick(now)
+        # Sigue habiendo ticks mientras quede algo por ocurrir u órdenes pendientes
+        # (las que ningún dron alcanza terminan rechazadas por el Dispatcher).
+        if self._events or self.dispatcher.queue:
+            self._push(now + self.dispatcher.interval, DISPATCH_TICK, None)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _dispatch(self, drone, order, steps, created, now):
+        # Asigna la orden al dron y lo hace despegar hacia la primera parada.
+        self._dispatch_waits.append(now - created)
+        drone.order = order
+        drone.plan = steps
+        drone.step = 0
+        drone.created_at = created
+        drone.dispatched_at = now
+        drone.missions += 1
+        self._push(now + steps[0][0], LEG_END, drone)
+
+    def _next_leg(self, drone, now):
+        drone.step += 1
+        self._push(now + drone.plan[drone.step][0], LEG_END, drone)
+
+    def _push(self, at, kind, data):
+        heapq.heappush(self._events, (at, next(self._seq), kind, data))
+
+    def _fail(self, reason):
+        self._failed[reason] = self._failed.get(reason, 0) + 1
+
+    def _check_version(self):
+        # Los planes dependen del grafo: se descartan si cambió.
+        if self.graph.version != self._plans_version:
+            self._plans = {}
+            self._ferries = {}
+            self._ferry_trees = {}
+            self._plans_version = self.graph.version
+
+    def _plan(self, origin, destination):
+        # Plan de misión de (origen, destino), calculado una sola vez.
+        self._check_version()
+        key = (origin, destination)
+        if key not in self._plans:
+            path, cost = self.router.route(origin, destination, self.battery_limit)
+            self._plans[key] = self._mission(origin, destination, path, cost) if path else None
+        return self._plans[key]
+
+    def _mission(self, origin, destination, path, cost):
+        # (ruta, costo, paradas) de ida y vuelta; None si el dron no puede volver al depósito.
+        outbound = self._leg_steps(path, self.battery_limit, DELIVER)
+        if outbound is None:
+            return None
+        back_path, _ = self.router.route(destination, origin, self.battery_limit, battery=outbound[-1][3])
+        if back_path is None:
+            return None
+        back = self._leg_steps(back_path, outbound[-1][3], HOME)
+        if back is None:
+            return None
+        return path, cost, tuple(outbound + back)
+
+    def _leg_steps(self, path, battery, final_kind):
+        """
+        Recorre path con la regla de batería y lo divide en tramos. Cada parada
+        es (segundos de vuelo, vértice, tipo, batería al llegar, segundos de
+        carga); la última es final_kind (en HOME la carga es la de la base).
+        Devuelve None si la batería no alcanza.
+        """
+        graph, limit = self.graph, self.battery_limit
+        per_unit_flight = 3600 / self.speed
+        per_unit_charge = 3600 / self.charge_rate
+        steps = []
+        flight = 0
+        for u, v in zip(path, path[1:]):
+            weight = graph.vertices[u].neighbors[v]
+            flight += weight
+            battery -= weight
+            if battery < 0:
+                if graph.get_role(v) != "recharge":
+                    return None
+                # Llega con la batería agotada (el déficit no se carga): carga de 0 a limit.
+                steps.append((flight * per_unit_flight, v, CHARGE, 0, limit * per_unit_charge))
+                flight = 0
+                battery = limit
+        steps.append((flight * per_unit_flight, path[-1], final_kind, battery, (limit - battery) * per_unit_charge))
+        return steps
+
+
+def _percentiles(seconds):
+    # Media y percentiles (en minutos) de una lista de duraciones en segundos.
+    if not seconds:
+        return None
+    values = np.asarray(seconds, dtype=np.float64) / 60
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"mean": float(values.mean()), "p50": float(p50), "p90": float(p90),
+            "p99": float(p99), "max": float(values.max())}
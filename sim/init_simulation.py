@@ -1,11 +1,36 @@
 import random
+
+import numpy as np
+
+from model.csr_graph import CSRGraph, ROLES
+from model.geo import haversine_km_array
 from model.graph import Graph
 
+# Límites geográficos de Temuco para las coordenadas de los nodos.
+TEMUCO_BOUNDS = {
+    'lat_min': -38.77,
+    'lat_max': -38.70,
+    'lon_min': -72.65,
+    'lon_max': -72.55
+}
+
+
+def _sorted_unique(values):
+    # Valores únicos y ordenados de un arreglo de enteros (por ordenamiento).
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
 class SimulationInitializer:
-    def __init__(self, n_nodes, m_edges):
+    def __init__(self, n_nodes, m_edges, seed=None):
         # Inicializa el generador de simulaciones con la cantidad de nodos y aristas deseadas.
+        # seed: semilla opcional para obtener siempre la misma red.
         self.n_nodes = n_nodes
         self.m_edges = m_edges
+        self.seed = seed
+        self.rng = random.Random(seed)
         self.graph = Graph()  # Crea un grafo vacío
 
     def generate_connected_graph(self):
@@ -18,15 +43,9 @@ class SimulationInitializer:
 
     def _create_vertices(self):
         # Crea los vértices numerados del 0 al n_nodes-1 con coordenadas geográficas aleatorias en Temuco
-        TEMUCO_BOUNDS = {
-            'lat_min': -38.77,
-            'lat_max': -38.70,
-            'lon_min': -72.65,
-            'lon_max': -72.55
-        }
         for i in range(self.n_nodes):
-            lat = random.uniform(TEMUCO_BOUNDS['lat_min'], TEMUCO_BOUNDS['lat_max'])
-            lon = random.uniform(TEMUCO_BOUNDS['lon_min'], TEMUCO_BOUNDS['lon_max'])
+            lat = self.rng.uniform(TEMUCO_BOUNDS['lat_min'], TEMUCO_BOUNDS['lat_max'])
+            lon = self.rng.uniform(TEMUCO_BOUNDS['lon_min'], TEMUCO_BOUNDS['lon_max'])
             self.graph.add_vertex(str(i), lat=lat, lon=lon)
 
     def _assign_roles(self):
@@ -38,7 +57,7 @@ class SimulationInitializer:
         roles = (["storage"] * n_storage +
                  ["recharge"] * n_recharge +
                  ["client"] * n_clients)
-        random.shuffle(roles)  # Mezcla los roles para asignarlos aleatoriamente
+        self.rng.shuffle(roles)  # Mezcla los roles para asignarlos aleatoriamente
 
         for i, role in enumerate(roles):
             self.graph.vertices[str(i)].role = role  # Asigna el rol a cada nodo
@@ -46,16 +65,81 @@ class SimulationInitializer:
     def _create_spanning_tree(self):
         # Crea un árbol generador aleatorio para asegurar que el grafo sea conexo
         nodes = list(self.graph.vertices.keys())
-        random.shuffle(nodes)
+        self.rng.shuffle(nodes)
         for i in range(self.n_nodes - 1):
-            weight = random.randint(1, 20)  # Peso aleatorio para la arista
+            weight = self.rng.randint(1, 20)  # Peso aleatorio para la arista
             self.graph.add_edge(nodes[i], nodes[i + 1], weight)
 
     def _add_extra_edges(self):
         # Agrega aristas adicionales aleatorias hasta alcanzar el número deseado de aristas
+        # (edge_count es O(1), así que el bucle completo es O(m)).
         nodes = list(self.graph.vertices.keys())
-        while self.graph.edge_count() < self.m_edges:
-            u, v = random.sample(nodes, 2)
+        target = min(self.m_edges, self.n_nodes * (self.n_nodes - 1) // 2)
+        while self.graph.edge_count() < target:
+            u, v = self.rng.sample(nodes, 2)
             if not self.graph.has_edge(u, v):
-                weight = random.randint(1, 20)
+                weight = self.rng.randint(1, 20)
                 self.graph.add_edge(u, v, weight)
+
+    def generate_large_graph(self, distance_weights=False, as_csr=False, units_per_km=10):
+        """
+        Genera una red conexa grande (100k+ nodos, millones de aristas) con
+        muestreo vectorizado de coordenadas, roles y aristas.
+
+        distance_weights: si es True, el peso de cada arista es la distancia
+        haversine entre sus extremos en unidades de 1/units_per_km km (entero,
+        mínimo 1); si no, un entero aleatorio entre 1 y 20 como en
+        generate_connected_graph.
+        as_csr: si es True devuelve un CSRGraph; si no, un Graph.
+        La misma semilla produce siempre la misma red.
+        """
+        n = self.n_nodes
+        m = min(self.m_edges, n * (n - 1) // 2)
+        rng = np.random.default_rng(self.seed)
+
+        lats = rng.uniform(TEMUCO_BOUNDS['lat_min'], TEMUCO_BOUNDS['lat_max'], n)
+        lons = rng.uniform(TEMUCO_BOUNDS['lon_min'], TEMUCO_BOUNDS['lon_max'], n)
+        n_storage = int(n * 0.2)
+        n_recharge = int(n * 0.2)
+        roles = np.zeros(n, dtype=np.int8)
+        roles[:n_storage] = ROLES.index("storage")
+        roles[n_storage:n_storage + n_recharge] = ROLES.index("recharge")
+        rng.shuffle(roles)
+
+        # Árbol generador aleatorio: cada nodo (en orden aleatorio) se une a uno anterior.
+        order = rng.permutation(n)
+        if n > 1:
+            positions = np.arange(1, n)
+            parents = order[(rng.random(n - 1) * positions).astype(np.int64)]
+            src, dst = order[1:], parents
+        else:
+            src = dst = np.empty(0, dtype=np.int64)
+        keys = _sorted_unique(np.minimum(src, dst) * n + np.maximum(src, dst))
+
+        # Aristas extra muestreadas por lotes; se descartan lazos y duplicados.
+        while len(keys) < m:
+            missing = m - len(keys)
+            batch = int(missing * 1.1) + 16
+            u = rng.integers(0, n, batch)
+            v = rng.integers(0, n, batch)
+            u, v = u[u != v], v[u != v]
+            candidates = _sorted_unique(np.minimum(u, v) * n + np.maximum(u, v))
+            # keys está ordenado: una búsqueda binaria indica cuáles ya existen.
+            pos = np.minimum(np.searchsorted(keys, candidates), len(keys) - 1)
+            candidates = candidates[keys[pos] != candidates]
+            if len(candidates) > missing:
+                candidates = rng.choice(candidates, missing, replace=False)
+            keys = _sorted_unique(np.concatenate([keys, candidates]))
+        src, dst = keys // n, keys % n
+
+        if distance_weights:
+            km = haversine_km_array(lats[src], lons[src], lats[dst], lons[dst])
+            weights = np.maximum(1, np.rint(km * units_per_km)).astype(np.int64)
+        else:
+            weights = rng.integers(1, 21, len(src))
+
+        csr = CSRGraph.from_edge_arrays([str(i) for i in range(n)], src, dst, weights, roles, lats, lons)
+        if as_csr:
+            return csr
+        self.graph = csr.to_graph()
+        return self.graph
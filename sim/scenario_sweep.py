@@ -0,0 +1,233 @@
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Parámetros que definen una corrida; todos menos la semilla definen una configuración.
+SCENARIO_KEYS = ("n_nodes", "m_edges", "n_orders", "battery_limit", "seed")
+CONFIG_KEYS = SCENARIO_KEYS[:-1]
+# Métricas de cada corrida que se agregan por configuración.
+METRICS = ("success_rate", "cost_mean", "cost_p90", "orders_per_sec", "graph_s", "run_s")
+# Valores críticos de la t de Student (dos colas, 95 %) por grados de libertad;
+# a partir de 30 se usa la normal.
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+        9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131,
+        16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086, 21: 2.080, 22: 2.074,
+        23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045}
+
+
+def scenarios(n_nodes, m_edges, n_orders, battery_limits, seeds):
+    # Producto cartesiano de los parámetros: una corrida (dict) por combinación.
+    return [dict(zip(SCENARIO_KEYS, values))
+            for values in itertools.product(n_nodes, m_edges, n_orders, battery_limits, seeds)]
+
+
+class ScenarioSweep:
+    """
+    Barrido Monte-Carlo de escenarios: cada corrida genera su propia red con
+    SimulationInitializer y ejecuta el BatchRunner sin interfaz, con los
+    parámetros (n_nodes, m_edges, n_orders, battery_limit, seed). Las
+    corridas se reparten en un pool de procesos (workers=None usa
+    os.cpu_count(); workers=1 corre todo en este proceso).
+
+    Cada resultado se agrega al archivo JSONL results_path apenas termina
+    (una línea por corrida, con flush y fsync). Al volver a ejecutar el
+    barrido se leen las corridas ya guardadas y solo se corren las que
+    faltan, así que un barrido interrumpido continúa donde quedó.
+
+    aggregate() resume las corridas por configuración (todas las semillas):
+    media, desvío, percentiles e intervalo de confianza del 95 % de la media.
+    El progreso se informa a las funciones registradas con add_listener:
+    ("run", resultado, hechas, total), ("run_failed", escenario, motivo) y
+    ("finished", tabla).
+    """
+
+    def __init__(self, results_path, workers=None, zipf=1.1):
+        self.results_path = results_path
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.zipf = zipf
+        self._listeners = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, *args):
+        for callback in self._listeners:
+            callback(event, *args)
+
+    def run(self, runs):
+        """
+        Ejecuta las corridas de runs (dicts con SCENARIO_KEYS) que no estén en
+        el archivo de resultados. Devuelve la tabla agregada de todas las
+        corridas guardadas.
+        """
+        results = self.load()
+        done = {_key(result) for result in results}
+        pending = []
+        for scenario in runs:
+            if _key(scenario) not in done:
+                done.add(_key(scenario))
+                pending.append(scenario)
+        total, finished = len(pending), 0
+
+        self._truncate_partial_line()
+        with open(self.results_path, "a", encoding="utf-8") as out:
+            for scenario, result in self._execute(pending):
+                if isinstance(result, Exception):
+                    self._notify("run_failed", scenario, str(result))
+                    continue
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+                results.append(result)
+                finished += 1
+                self._notify("run", result, finished, total)
+
+        table = aggregate(results)
+        self._notify("finished", table)
+        return table
+
+    def load(self):
+        # Corridas guardadas. Una última línea incompleta (corte a mitad de escritura) se descarta.
+        if not os.path.exists(self.results_path):
+            return []
+        results = []
+        with open(self.results_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    results.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return results
+
+    def _truncate_partial_line(self):
+        # Quita una última línea sin salto final (corrida cortada a mitad de escritura).
+        if not os.path.exists(self.results_path):
+            return
+        with open(self.results_path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _execute(self, pending):
+        # Genera (escenario, resultado o excepción) a medida que terminan las corridas.
+        if self.workers <= 1 or len(pending) <= 1:
+            for scenario in pending:
+                try:
+                    yield scenario, run_scenario(scenario, self.zipf)
+                except Exception as e:
+                    yield scenario, e
+            return
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(pending))) as pool:
+            futures = {pool.submit(run_scenario, scenario, self.zipf): scenario for scenario in pending}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+
+
+def run_scenario(scenario, zipf=1.1):
+    # Una corrida completa (en el proceso del pool): red, simulación y carga de órdenes.
+    from sim.batch_runner import BatchRunner, WorkloadModel
+    from sim.init_simulation import SimulationInitializer
+    from sim.simulation import Simulation
+
+    seed = scenario["seed"]
+    start = time.perf_counter()
+    graph = SimulationInitializer(scenario["n_nodes"], scenario["m_edges"], seed=seed).generate_large_graph()
+    graph_s = time.perf_counter() - start
+    sim = Simulation(graph, load_clients=False)
+    runner = BatchRunner(sim, WorkloadModel(graph, seed, zipf), battery_limit=scenario["battery_limit"])
+    summary = runner.run(scenario["n_orders"])
+    cost = summary["cost"] or {}
+    result = {key: scenario[key] for key in SCENARIO_KEYS}
+    result.update({
+        "success_rate": summary["orders_created"] / summary["orders_requested"] if summary["orders_requested"] else 0.0,
+        "cost_mean": cost.get("mean"),
+        "cost_p90": cost.get("p90"),
+        "orders_per_sec": summary["orders_per_sec"],
+        "graph_s": graph_s,
+        "run_s": summary["elapsed_s"],
+    })
+    return result
+
+
+def aggregate(results, metrics=METRICS):
+    """
+    Tabla por configuración (CONFIG_KEYS), ordenada por sus parámetros: una
+    fila con la cantidad de corridas y, por métrica, media, desvío, p5, p50,
+    p95 e intervalo de confianza del 95 % de la media (t de Student).
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault(tuple(result[key] for key in CONFIG_KEYS), []).append(result)
+    table = []
+    for config in sorted(groups):
+        runs = groups[config]
+        row = dict(zip(CONFIG_KEYS, config))
+        row["runs"] = len(runs)
+        for metric in metrics:
+            values = np.array([r[metric] for r in runs if r.get(metric) is not None], dtype=np.float64)
+            row[metric] = _describe(values)
+        table.append(row)
+    return table
+
+
+def _describe(values):
+    # Media, desvío, percentiles e IC 95 % de la media (None si no hay valores).
+    n = len(values)
+    if n == 0:
+        return None
+    mean = float(values.mean())
+    std = float(values.std(ddof=1)) if n > 1 else 0.0
+    half = T_95.get(n - 1, 1.96) * std / math.sqrt(n) if n > 1 else math.inf
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {"mean": mean, "std": std, "p5": float(p5), "p50": float(p50), "p95": float(p95),
+            "ci95": (mean - half, mean + half)}
+
+
+def _key(scenario):
+    return tuple(scenario[key] for key in SCENARIO_KEYS)
+
+
+def format_table(table, metrics=("success_rate", "cost_mean", "orders_per_sec")):
+    # Tabla de texto: una fila por configuración con media ± semiancho del IC 95 %.
+    header = ["nodos", "aristas", "órdenes", "batería", "corridas"] + list(metrics)
+    lines = ["  ".join(f"{h:>22}" if i >= 5 else f"{h:>8}" for i, h in enumerate(header))]
+    for row in table:
+        cells = [f"{row[key]:>8}" for key in CONFIG_KEYS] + [f"{row['runs']:>8}"]
+        for metric in metrics:
+            stats = row[metric]
+            if stats is None:
+                cells.append(f"{'-':>22}")
+            else:
+                low, high = stats["ci95"]
+                cells.append(f"{stats['mean']:>12.3f} ± {(high - low) / 2:<7.3f}")
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Uso: python -m sim.scenario_sweep resultados.jsonl [semillas] [workers]
+    # Barre tamaños de red y límites de batería; al repetir el comando continúa el barrido.
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "scenario_sweep.jsonl"
+    n_seeds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    runs = scenarios(n_nodes=[1000, 5000], m_edges=[3000, 15000], n_orders=[10000],
+                     battery_limits=[30, 50], seeds=range(n_seeds))
+    runs = [run for run in runs if run["m_edges"] >= run["n_nodes"]]
+    sweep = ScenarioSweep(path, workers)
+    sweep.add_listener(lambda event, *args: print(f"{args[1]}/{args[2]} corridas") if event == "run" else
+                       print("falló", args[0], args[1]) if event == "run_failed" else None)
+    print(format_table(sweep.run(runs)))
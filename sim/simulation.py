@@ -1,23 +1,47 @@
+import gc
+from itertools import islice
+
 from tda.route_tree import RouteTree
+from tda.route_store import RouteStore
 from tda.hash_map import HashMap
 from domain.order import Order
 from domain.client import Client
 from database import Session, Cliente, Orden
-from collections import deque
-import streamlit as st
+from model.battery_router import BatteryRouter
+from model.k_shortest import KShortestRoutes
+from model.recharge_overlay import RechargeOverlay
+from model.route_cache import RouteCache
+from model.tour_planner import TourPlanner
 
 class Simulation:
-    def __init__(self, graph):
+    def __init__(self, graph, load_clients=True):
         # Inicializa la simulación con un grafo dado.
         # Crea estructuras para órdenes, clientes, registro de rutas y frecuencias.
+        # load_clients: si es False no se consulta la base de datos (ejecución sin interfaz).
         self.graph = graph
         self.orders = HashMap()
+        self.order_changes = set()  # Ids de órdenes modificadas desde el último checkpoint
+        # OrderArchive de un checkpoint restaurado: órdenes guardadas por columnas que
+        # se pasan al HashMap (como Order) recién cuando se piden.
+        self.archived_orders = None
         self.clients = HashMap()
-        self.route_log = RouteTree()
+        self.client_priority = {}  # nodo -> prioridad del cliente ubicado ahí
+        self.routes = RouteStore()  # Rutas internadas: órdenes y registro guardan solo el id
+        self.route_log = RouteTree()  # Frecuencia por id de ruta
+        self.tour_routes = []  # Ids de ruta de los recorridos consolidados (consolidate_orders), sin repetir
+        self.router = BatteryRouter(graph)
+        self.alternatives = KShortestRoutes(graph)  # Rutas alternativas (Yen) para elegir por frecuencia
+        self.overlay = None  # RechargeOverlay opcional para rutas largas
+        self.route_cache = RouteCache()  # Caché LRU de rutas, invalidada por graph.version
         self.order_id = 0
         self.origin_freq = {}
         self.dest_freq = {}
-        
+        # Funciones que se llaman con (evento, *datos): ("order_created", orden) y
+        # ("order_failed", origen, destino, motivo). La interfaz se suscribe con add_listener.
+        self._listeners = []
+
+        if not load_clients:
+            return
         # Cargar clientes existentes desde la base de datos
         session = Session()
         try:
@@ -29,6 +53,19 @@ class Simulation:
         finally:
             session.close()
 
+    def add_listener(self, callback):
+        # Registra una función que recibe los eventos de la simulación.
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        # Deja de notificar a una función registrada con add_listener.
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, *args):
+        for callback in self._listeners:
+            callback(event, *args)
+
     def add_client(self, client_id, client_name, node_id, priority):
         """Agrega un nuevo cliente al sistema y a la base de datos"""
         # Verificar si el nodo existe
@@ -40,6 +77,7 @@ class Simulation:
         
         # Agregar a la estructura en memoria
         self.clients.insert(client_id, client)
+        self.client_priority[node_id] = priority
         
         # Agregar a la base de datos
         session = Session()
@@ -65,26 +103,101 @@ class Simulation:
 
     def create_order(self, origin, destination):
         # Crea una orden entre dos nodos si ambos existen y hay ruta posible.
+        # Si origin es None la orden sale del depósito más cercano al destino.
+        if origin is None:
+            origin = self.nearest_depot(destination)
+            if origin is None:
+                self._notify("order_failed", None, destination,
+                             f"ningún depósito alcanza el nodo '{destination}'")
+                return None
         if origin not in self.graph.vertices or destination not in self.graph.vertices:
-            st.error(f"No se pudo crear la orden: el nodo '{origin}' o '{destination}' no existe.")
+            self._notify("order_failed", origin, destination,
+                         f"el nodo '{origin}' o '{destination}' no existe")
             return None
-        path, cost = self.calculate_route(origin, destination)
+        candidates = self.candidate_routes(origin, destination)
+        path, cost = self.select_best_route(candidates) if candidates else (None, None)
         if path:
-            self._register_order(origin, destination, path, cost)
-            return self.orders.get(self.order_id - 1)
-        st.error(f"No se pudo crear la orden: no existe ruta de {origin} a {destination}")
+            return self.register_order(origin, destination, path, cost)
+        self._notify("order_failed", origin, destination, f"no existe ruta de {origin} a {destination}")
         return None
 
-    def _register_order(self, origin, destination, path, cost):
-        # Registra una orden, la almacena y actualiza frecuencias y el árbol AVL de rutas.
-        st.success(f"ORDEN CREADA: {origin} → {destination} | Ruta: {' → '.join(path)} | Costo: {cost}")
-        order = Order(self.order_id, origin, destination, path, cost)
+    def register_order(self, origin, destination, path, cost, creation_date=None, priority=None):
+        # Registra una orden ya ruteada, la almacena y actualiza frecuencias y el árbol AVL de rutas.
+        # creation_date: fecha de creación (la del reloj simulado en FleetSimulation).
+        # priority: por defecto la del cliente ubicado en el destino (1 si no hay cliente).
+        if priority is None:
+            priority = self.client_priority.get(destination, 1)
+        order = Order(self.order_id, origin, destination, path, cost, priority, route_store=self.routes,
+                      creation_date=creation_date, changes=self.order_changes)
         self.orders.insert(self.order_id, order)
         self.order_id += 1
-        route_key = " → ".join(path)
-        self.route_log.insert(route_key)
+        self.route_log.insert(order.route_id)
         self.origin_freq[origin] = self.origin_freq.get(origin, 0) + 1
         self.dest_freq[destination] = self.dest_freq.get(destination, 0) + 1
+        self._notify("order_created", order)
+        return order
+
+    def consolidate_orders(self, orders=None, battery_limit=50, capacity=5):
+        """
+        Agrupa órdenes pendientes que salen del mismo depósito en recorridos de
+        varias paradas (TourPlanner) de hasta capacity órdenes cada uno.
+
+        orders: por defecto las órdenes "In Progress" que todavía no están en un
+        recorrido. Cada orden de un recorrido pasa a esa ruta (Order.reroute,
+        con la distancia del recorrido como costo) y en route_log su ruta
+        anterior se cambia por la del recorrido, así que volver a consolidar
+        no agrega entradas. Devuelve los recorridos, las órdenes sin recorrido
+        factible y la distancia total frente a despachar cada orden por
+        separado (ida y vuelta).
+        """
+        known = set(self.tour_routes)
+        if orders is None:
+            if self.archived_orders is not None:
+                for order_id in self.archived_orders.ids_with_status("In Progress"):
+                    self.get_order(order_id)
+            orders = [order for _, order in self.orders.items()
+                      if order.status == "In Progress" and order.route_id not in known]
+        by_depot = {}
+        for order in orders:
+            by_depot.setdefault(order.origin, []).append(order)
+
+        planner = TourPlanner(self.graph, battery_limit, capacity)
+        tours, unserved = [], []
+        single = consolidated = 0
+        for depot, batch in by_depot.items():
+            plan = planner.plan(depot, [order.destination for order in batch])
+            for tour in plan.tours:
+                route_id = self.routes.intern(tour.path)
+                if route_id not in known:
+                    known.add(route_id)
+                    self.tour_routes.append(route_id)
+                for i in tour.stops:
+                    order = batch[i]
+                    if order.route_id != route_id:
+                        self.route_log.decrement(order.route_id)
+                        self.route_log.insert(route_id)
+                        order.reroute(route_id, tour.distance)
+                tours.append({
+                    "depot": depot,
+                    "orders": [batch[i].id for i in tour.stops],
+                    "route": self.routes.key(route_id),
+                    "distance": tour.distance,
+                })
+            unserved.extend(batch[i].id for i in plan.unserved)
+            single += plan.single_distance
+            consolidated += plan.distance
+        return {
+            "tours": tours,
+            "unserved": unserved,
+            "single_distance": single,
+            "consolidated_distance": consolidated,
+            "saved": single - consolidated,
+            "saved_pct": 100 * (single - consolidated) / single if single else 0.0,
+        }
+
+    def nearest_depot(self, node):
+        # Depósito (nodo storage) más cercano a node según la partición de la red, en O(1).
+        return self.graph.depot_partition().depot_of(node)
 
     def calculate_route(self, origin, destination, battery_limit=50):
         """
@@ -92,79 +205,215 @@ class Simulation:
         - Límite de batería
         - Puntos de recarga
         - Distancia total
+
+        Usa un BatteryRouter: búsqueda por prioridad sobre estados
+        (nodo, batería restante) que se detiene al llegar al destino.
+        Si hay un overlay de estaciones para ese límite de batería, la consulta
+        se resuelve sobre el overlay (mismo costo óptimo).
         """
-        if origin not in self.graph.vertices or destination not in self.graph.vertices:
-            return None, None
-
-        # (nodo, ruta, costo_total, batería_restante)
-        queue = deque([(origin, [origin], 0, battery_limit)])
-        visited = set()  # (nodo, batería_restante)
-        all_routes = []
-
-        while queue:
-            current, path, total_cost, battery = queue.popleft()
-
-            # Si llegamos al destino, guardamos la ruta
-            if current == destination:
-                all_routes.append((path, total_cost))
-                continue
-
-            # Explorar vecinos
-            for next_node, edge_cost in self.graph.get_neighbors(current):
-                if next_node in path:  # Evitar ciclos
-                    continue
-
-                # Calcular nueva batería y costo
-                new_battery = battery - edge_cost
-                new_total_cost = total_cost + edge_cost
-
-                # Si no hay suficiente batería pero es un punto de recarga
-                if new_battery < 0 and self.graph.vertices[next_node].role == "recharge":
-                    new_battery = battery_limit  # Recargar completamente
-
-                # Si hay suficiente batería o es un punto de recarga
-                if new_battery >= 0:
-                    state = (next_node, new_battery)
-                    if state not in visited:
-                        visited.add(state)
-                        new_path = path + [next_node]
-                        queue.append((next_node, new_path, new_total_cost, new_battery))
-
-        if not all_routes:
-            return None, None
-
-        # Seleccionar la mejor ruta (la más corta)
-        best_route = min(all_routes, key=lambda x: x[1])
-        return best_route
-
-    def _select_best_route(self, all_routes):
+        return self.find_route(origin, destination, "battery", battery_limit)
+
+    def find_route(self, origin, destination, algorithm="battery", battery_limit=50):
+        """
+        Calcula una ruta con el algoritmo indicado ('battery', 'dijkstra' o
+        'floyd_warshall') y guarda el resultado en la caché de rutas.
+        Devuelve (ruta, costo) o (None, None).
+        """
+        if algorithm != "battery":
+            battery_limit = None  # Los caminos mínimos no dependen de la batería.
+        key = (origin, destination, battery_limit, algorithm)
+        version = self.graph.version
+        cached = self.route_cache.get(key, version)
+        if cached is not None:
+            path, cost = cached
+            return (list(path) if path else None), cost
+
+        if algorithm == "battery":
+            if self.overlay is not None and battery_limit in self.overlay.legs:
+                path, cost = self.overlay.route(origin, destination, battery_limit)
+                # El overlay puede devolver una ruta que repite nodos (ida y vuelta
+                # a una estación); en ese caso manda la ruta simple del router.
+                if path and len(set(path)) != len(path):
+                    path, cost = self.router.route(origin, destination, battery_limit)
+            else:
+                path, cost = self.router.route(origin, destination, battery_limit)
+        elif algorithm == "dijkstra":
+            path, cost = self.graph.dijkstra(origin, destination)
+        elif algorithm == "floyd_warshall":
+            path = self.graph.reconstruct_fw_path(origin, destination)
+            cost = self.graph.distance(origin, destination) if path else None
+        else:
+            raise ValueError(f"Algoritmo de ruta desconocido: {algorithm}")
+
+        self.route_cache.put(key, (tuple(path) if path else None, cost), version)
+        return path, cost
+
+    def candidate_routes(self, origin, destination, k=5, battery_limit=50):
+        """
+        Devuelve hasta k rutas alternativas [(ruta, costo), ...] ordenadas por
+        costo (Yen con la regla de batería). La primera sale de find_route (caché
+        de rutas y RechargeOverlay si está activo); la lista queda en la caché.
+        """
+        key = (origin, destination, battery_limit, "k_shortest", k)
+        version = self.graph.version
+        cached = self.route_cache.get(key, version)
+        if cached is None:
+            first = self.find_route(origin, destination, "battery", battery_limit)
+            routes = self.alternatives.routes(origin, destination, k, battery_limit, first)
+            cached = tuple((tuple(path), cost) for path, cost in routes)
+            self.route_cache.put(key, cached, version)
+        return [(list(path), cost) for path, cost in cached]
+
+    def candidate_routes_from(self, origin, destinations, k=5, battery_limit=50):
+        """
+        candidate_routes para varios destinos desde el mismo origen. Devuelve
+        {destino: [(ruta, costo), ...]} (lista vacía si no hay ruta). Las
+        primeras rutas que no están en la caché salen de una sola búsqueda
+        (BatteryRouter.routes_from), o de find_route si el RechargeOverlay está
+        activo para ese límite de batería.
+        """
+        version = self.graph.version
+        result = {}
+        missing = []
+        for destination in destinations:
+            cached = self.route_cache.get((origin, destination, battery_limit, "k_shortest", k), version)
+            if cached is None:
+                missing.append(destination)
+            else:
+                result[destination] = [(list(path), cost) for path, cost in cached]
+        if not missing:
+            return result
+
+        if self.overlay is not None and battery_limit in self.overlay.legs:
+            firsts = {destination: self.find_route(origin, destination, "battery", battery_limit)
+                      for destination in missing}
+        else:
+            found = self.router.routes_from(origin, missing, battery_limit)
+            firsts = {}
+            for destination in missing:
+                path, cost = found.get(destination, (None, None))
+                self.route_cache.put((origin, destination, battery_limit, "battery"),
+                                     (tuple(path) if path else None, cost), version)
+                firsts[destination] = (path, cost)
+        for destination in missing:
+            routes = self.alternatives.routes(origin, destination, k, battery_limit, firsts[destination])
+            cached = tuple((tuple(path), cost) for path, cost in routes)
+            self.route_cache.put((origin, destination, battery_limit, "k_shortest", k), cached, version)
+            result[destination] = [(list(path), cost) for path, cost in cached]
+        return result
+
+    def enable_recharge_overlay(self, battery_limits=(50,)):
+        # Precalcula el overlay de estaciones para los límites de batería dados.
+        if self.overlay is None:
+            self.overlay = RechargeOverlay(self.graph, battery_limits)
+        else:
+            for limit in battery_limits:
+                self.overlay.add_battery_limit(limit)
+        return self.overlay
+
+    def select_best_route(self, all_routes):
         # Selecciona la mejor ruta: primero la más frecuente, luego la de menor costo.
+        # all_routes es el conjunto acotado de candidate_routes (k rutas).
         def route_frequency(route):
-            key = " → ".join(route)
-            node = self.route_log.root
-            while node:
-                if key == node.key:
-                    return node.frequency
-                elif key < node.key:
-                    node = node.left
-                else:
-                    node = node.right
-            return 0
+            route_id = self.routes.find(route)
+            return self.route_log.get_route_frequency(route_id) if route_id is not None else 0
         all_routes.sort(key=lambda x: (-route_frequency(x[0]), x[1]))
         return all_routes[0]
 
     def get_order(self, order_id):
-        # Devuelve una orden por su ID.
-        return self.orders.get(order_id)
+        # Devuelve una orden por su ID (si quedó en el archivo de un checkpoint, la arma ahora).
+        order = self.orders.get(order_id)
+        if order is None and self.archived_orders is not None:
+            order = self.archived_orders.take(order_id)
+            if order is not None:
+                self.orders.insert(order_id, order)
+        return order
 
     def get_orders(self):
         # Devuelve todas las órdenes registradas.
+        self._load_archived_orders()
         return self.orders.items()
 
+    def _load_archived_orders(self):
+        # Pasa al HashMap las órdenes que quedan en el archivo de un checkpoint restaurado.
+        if self.archived_orders is None:
+            return
+        self.orders.reserve(len(self.orders) + len(self.archived_orders))
+        # Son muchos objetos nuevos de una vez: el recolector cíclico no los libera y
+        # recorrerlos repetidamente triplica el tiempo, así que se pausa mientras tanto.
+        gc.disable()
+        try:
+            for order in self.archived_orders.take_all():
+                self.orders.insert(order.id, order)
+        finally:
+            gc.enable()
+        self.archived_orders = None
+
     def get_clients(self):
         # Devuelve todos los clientes registrados.
         return self.clients.items()
 
+    def rebuild_route_log(self):
+        # Reconstruye el registro de rutas desde las órdenes guardadas (las consolidadas
+        # cuentan en la ruta de su recorrido): cuenta cada id de ruta y arma el AVL
+        # balanceado en O(n) con bulk_load.
+        counts = {}
+        for _, order in self.orders.items():
+            counts[order.route_id] = counts.get(order.route_id, 0) + 1
+        if self.archived_orders is not None:
+            for route_id, count in zip(*self.archived_orders.route_counts()):
+                counts[int(route_id)] = counts.get(int(route_id), 0) + int(count)
+        self.route_log = RouteTree.bulk_load(sorted(counts.items()))
+        return self.route_log
+
     def get_route_frequencies(self):
-        # Devuelve la frecuencia de todas las rutas registradas (inorder del AVL).
-        return self.route_log.inorder()
+        # Devuelve la frecuencia de todas las rutas registradas [("A → B", frecuencia), ...].
+        return self._route_keys(self.route_log.inorder())
+
+    def get_top_routes(self, k=5):
+        # Devuelve las k rutas más frecuentes [(ruta, frecuencia), ...] en O(k).
+        return self._route_keys(self.route_log.get_most_frequent_routes(k))
+
+    def get_routes_with_min_frequency(self, frequency):
+        # Rutas usadas al menos frequency veces, de la más a la menos frecuente.
+        return self._route_keys(self.route_log.get_routes_with_min_frequency(frequency))
+
+    def get_routes_between(self, start=None, end=None, offset=0, limit=None):
+        """
+        Rutas registradas entre las secuencias de nodos start y end (inclusive,
+        ordenadas nodo a nodo; None deja el extremo abierto), paginadas con
+        offset y limit. Devuelve (cantidad, frecuencia total, [("A → B", frecuencia), ...]);
+        cantidad y frecuencia salen del índice ordenado del RouteTree en O(log n).
+        """
+        index = self.route_log.ordered(self.routes.sort_key)
+        low = tuple(start) if start is not None else None
+        high = tuple(end) if end is not None else None
+        routes = islice(index.items_between(low, high), offset, None if limit is None else offset + limit)
+        return (index.count_between(low, high), index.frequency_between(low, high),
+                [(" → ".join(path), freq) for path, freq in routes])
+
+    def get_routes_with_prefix(self, prefix, offset=0, limit=None):
+        # Rutas registradas que empiezan con la secuencia de nodos prefix: un rango del
+        # índice ordenado (todas quedan entre prefix y prefix seguido del mayor carácter).
+        prefix = tuple(prefix)
+        return self.get_routes_between(prefix, prefix + ("\U0010FFFF",), offset, limit)
+
+    def get_routes_from(self, origin):
+        # Rutas registradas que salen de origin, en orden [("A → B", frecuencia), ...].
+        return self.get_routes_with_prefix([origin])[2]
+
+    def get_frequency_from(self, origin):
+        # Total de órdenes registradas cuya ruta sale de origin, en O(log n).
+        return self.get_routes_with_prefix([origin], limit=0)[1]
+
+    def get_routes_through(self, node):
+        # Rutas registradas que pasan por node (vía el índice invertido). El índice
+        # conserva las rutas que quedaron sin órdenes al reagruparlas en tours, así
+        # que se omiten las de frecuencia 0.
+        routes = ((route_id, self.route_log.get_route_frequency(route_id))
+                  for route_id in self.routes.routes_through(node))
+        return self._route_keys((route_id, freq) for route_id, freq in routes if freq > 0)
+
+    def _route_keys(self, routes):
+        # Convierte pares (id de ruta, frecuencia) en ("A → B → C", frecuencia).
+        return [(self.routes.key(route_id), freq) for route_id, freq in routes]
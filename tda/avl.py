@@ -1,40 +1,164 @@
+from itertools import accumulate
+
+
 class AVLNode:
+    # __slots__: sin diccionario por nodo (menos memoria y acceso más rápido a los campos).
+    __slots__ = ("key", "frequency", "left", "right", "height", "size", "total")
+
     def __init__(self, key, frequency=1):
         # Nodo del árbol AVL. Almacena la clave (key), frecuencia de inserción,
         # referencias a hijos izquierdo y derecho, y la altura del nodo.
+        # size y total son la cantidad de claves y la suma de frecuencias del
+        # subárbol (para rank/select y sumas por rango en O(log n)).
         self.key = key
         self.frequency = frequency
         self.left = None
         self.right = None
         self.height = 1
+        self.size = 1
+        self.total = frequency
 
 class AVLTree:
+    # Clase de los nodos que crea insert (las subclases pueden usar un nodo extendido).
+    node_class = AVLNode
+
     def __init__(self):
         # Inicializa el árbol AVL con la raíz vacía.
         self.root = None
 
+    @classmethod
+    def bulk_load(cls, sorted_items):
+        """
+        Construye un árbol perfectamente balanceado en O(n) a partir de pares
+        (clave, frecuencia) ordenados por clave y sin claves repetidas.
+        """
+        tree = cls()
+        make_node = tree.node_class
+        nodes = [make_node(key, frequency) for key, frequency in sorted_items]
+        for i in range(1, len(nodes)):
+            if not nodes[i - 1].key < nodes[i].key:
+                raise ValueError("bulk_load necesita claves ordenadas y sin repetir")
+        # prefix[i]: suma de frecuencias de los primeros i nodos
+        prefix = list(accumulate((node.frequency for node in nodes), initial=0))
+        tree.root = tree._build_balanced(nodes, prefix)
+        tree._loaded(nodes)
+        return tree
+
+    def _build_balanced(self, nodes, prefix):
+        # Enlaza los nodos (ordenados) tomando el del medio de cada rango como raíz.
+        # Altura, tamaño y suma dependen solo del rango, así que se asignan al bajar.
+        root = None
+        stack = [(0, len(nodes), None, False)] if nodes else []
+        while stack:
+            low, high, parent, is_left = stack.pop()
+            middle = (low + high) // 2
+            node = nodes[middle]
+            node.size = high - low
+            node.height = node.size.bit_length()
+            node.total = prefix[high] - prefix[low]
+            if parent is None:
+                root = node
+            elif is_left:
+                parent.left = node
+            else:
+                parent.right = node
+            if low < middle:
+                stack.append((low, middle, node, True))
+            if middle + 1 < high:
+                stack.append((middle + 1, high, node, False))
+        return root
+
+    def _loaded(self, nodes):
+        # Se llama después de bulk_load con los nodos en orden (para índices de subclases).
+        pass
+
     def insert(self, key):
-        # Inserta una clave en el árbol AVL.
-        self.root = self._insert(self.root, key)
+        # Inserta una clave en el árbol AVL (iterativo: guarda el camino desde la raíz).
+        # Devuelve el nodo de la clave.
+        path = []
+        node = self.root
+        while node:
+            if key == node.key:
+                node.frequency += 1  # Si la clave ya existe, incrementa la frecuencia.
+                node.total += 1
+                for ancestor in path:
+                    ancestor.total += 1
+                return node
+            path.append(node)
+            node = node.left if key < node.key else node.right
 
-    def _insert(self, node, key):
-        # Inserta recursivamente una clave en el árbol.
-        if not node:
-            return AVLNode(key)
-        elif key == node.key:
-            node.frequency += 1  # Si la clave ya existe, incrementa la frecuencia.
-            return node
-        elif key < node.key:
-            node.left = self._insert(node.left, key)
+        node = inserted = self.node_class(key)
+        # Sube por el camino actualizando alturas, tamaños y sumas, y balanceando.
+        while path:
+            parent = path.pop()
+            if key < parent.key:
+                parent.left = node
+            else:
+                parent.right = node
+            self._update(parent)
+            node = self._balance(parent)
+        self.root = node
+        return inserted
+
+    def decrement(self, key):
+        # Resta 1 a la frecuencia de key y, si llega a 0, quita la clave del árbol.
+        # Devuelve el nodo de la clave (None si no estaba).
+        path = []
+        node = self.root
+        while node and key != node.key:
+            path.append(node)
+            node = node.left if key < node.key else node.right
+        if node is None:
+            return None
+        node.frequency -= 1
+        if node.frequency > 0:
+            node.total -= 1
+            for ancestor in path:
+                ancestor.total -= 1
         else:
-            node.right = self._insert(node.right, key)
+            self.root = self._remove(self.root, key)
+        return node
 
-        # Actualiza la altura del nodo.
-        node.height = 1 + max(self._get_height(node.left),
-                              self._get_height(node.right))
-        # Balancea el árbol si es necesario.
+    def _remove(self, node, key):
+        # Quita key del subárbol de node; devuelve la nueva raíz del subárbol.
+        # (Recursivo: la profundidad es la altura del AVL, O(log n).)
+        if key < node.key:
+            node.left = self._remove(node.left, key)
+        elif node.key < key:
+            node.right = self._remove(node.right, key)
+        else:
+            if node.left is None or node.right is None:
+                return node.left or node.right
+            # Dos hijos: el sucesor (mínimo del subárbol derecho) ocupa su lugar.
+            successor, right = self._remove_min(node.right)
+            successor.left, successor.right = node.left, right
+            node = successor
+        self._update(node)
         return self._balance(node)
 
+    def _remove_min(self, node):
+        # Separa el mínimo del subárbol: (nodo mínimo, nueva raíz del subárbol).
+        if node.left is None:
+            return node, node.right
+        smallest, node.left = self._remove_min(node.left)
+        self._update(node)
+        return smallest, self._balance(node)
+
+    def _update(self, node):
+        # Recalcula altura, tamaño y suma de frecuencias a partir de los hijos.
+        left, right = node.left, node.right
+        node.height = 1 + max(left.height if left else 0, right.height if right else 0)
+        node.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+        node.total = node.frequency + (left.total if left else 0) + (right.total if right else 0)
+
+    def __len__(self):
+        # Cantidad de claves distintas (O(1)).
+        return self.root.size if self.root else 0
+
+    def total_frequency(self):
+        # Suma de las frecuencias de todas las claves (O(1)).
+        return self.root.total if self.root else 0
+
     def _get_height(self, node):
         # Devuelve la altura de un nodo (0 si es None).
         return node.height if node else 0
@@ -94,11 +218,9 @@ class AVLTree:
         y.left = z
         z.right = T2
 
-        # Actualiza alturas
-        z.height = 1 + max(self._get_height(z.left),
-                           self._get_height(z.right))
-        y.height = 1 + max(self._get_height(y.left),
-                           self._get_height(y.right))
+        # Actualiza alturas, tamaños y sumas (primero z, que ahora es hijo de y)
+        self._update(z)
+        self._update(y)
 
         return y
 
@@ -110,38 +232,104 @@ class AVLTree:
         y.right = z
         z.left = T3
 
-        # Actualiza alturas
-        z.height = 1 + max(self._get_height(z.left),
-                           self._get_height(z.right))
-        y.height = 1 + max(self._get_height(y.left),
-                           self._get_height(y.right))
+        # Actualiza alturas, tamaños y sumas (primero z, que ahora es hijo de y)
+        self._update(z)
+        self._update(y)
 
         return y
 
     def inorder(self):
         # Devuelve una lista de tuplas (clave, frecuencia) en orden ascendente.
-        result = []
-        self._inorder(self.root, result)
-        return result
-
-    def _inorder(self, node, result):
-        # Recorrido inorder recursivo.
-        if node:
-            self._inorder(node.left, result)
-            result.append((node.key, node.frequency))
-            self._inorder(node.right, result)
+        return list(self.items_between())
 
     def search(self, key):
         # Busca la frecuencia de una clave en el árbol.
-        return self._search(self.root, key)
+        node = self._find(key)
+        return node.frequency if node else None
 
-    def _search(self, node, key):
-        # Búsqueda recursiva de una clave.
-        if not node:
-            return None
-        if key == node.key:
-            return node.frequency
-        elif key < node.key:
-            return self._search(node.left, key)
-        else:
-            return self._search(node.right, key)
+    def _find(self, key):
+        # Devuelve el nodo con la clave dada, o None.
+        node = self.root
+        while node and key != node.key:
+            node = node.left if key < node.key else node.right
+        return node
+
+    def rank(self, key):
+        # Cantidad de claves menores que key (la posición de key si está en el árbol).
+        rank = 0
+        node = self.root
+        while node:
+            if key <= node.key:
+                node = node.left
+            else:
+                rank += 1 + (node.left.size if node.left else 0)
+                node = node.right
+        return rank
+
+    def select(self, index):
+        # Devuelve (clave, frecuencia) de la clave en la posición index (desde 0) en orden.
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Posición fuera del árbol")
+        node = self.root
+        while True:
+            left_size = node.left.size if node.left else 0
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key, node.frequency
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def items_between(self, low=None, high=None):
+        """
+        Genera los pares (clave, frecuencia) con low <= clave <= high en orden
+        ascendente, sin armar listas (None deja el extremo abierto).
+        """
+        stack = []
+        node = self.root
+        while stack or node:
+            if node:
+                if low is not None and node.key < low:
+                    node = node.right  # Todo el subárbol izquierdo queda fuera del rango.
+                else:
+                    stack.append(node)
+                    node = node.left
+            else:
+                node = stack.pop()
+                if high is not None and node.key > high:
+                    return
+                yield node.key, node.frequency
+                node = node.right
+
+    def frequency_between(self, low=None, high=None):
+        # Suma de frecuencias de las claves con low <= clave <= high, en O(log n).
+        if low is not None and high is not None and low > high:
+            return 0
+        total = self._frequency_up_to(high) if high is not None else self.total_frequency()
+        if low is not None:
+            total -= self._frequency_up_to(low, inclusive=False)
+        return total
+
+    def count_between(self, low=None, high=None):
+        # Cantidad de claves con low <= clave <= high, en O(log n).
+        if low is not None and high is not None and low > high:
+            return 0
+        end = len(self) if high is None else self.rank(high) + (1 if self._find(high) else 0)
+        return end - (self.rank(low) if low is not None else 0)
+
+    def _frequency_up_to(self, key, inclusive=True):
+        # Suma de frecuencias de las claves menores (o iguales) que key.
+        total = 0
+        node = self.root
+        while node:
+            if key < node.key or (key == node.key and not inclusive):
+                node = node.left
+            else:
+                total += node.frequency + (node.left.total if node.left else 0)
+                if key == node.key:
+                    break
+                node = node.right
+        return total
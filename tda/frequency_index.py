@@ -0,0 +1,133 @@
+class FrequencyBucket:
+    # Grupo de claves con la misma frecuencia, enlazado con los grupos vecinos.
+    __slots__ = ("frequency", "keys", "lower", "higher")
+
+    def __init__(self, frequency):
+        self.frequency = frequency
+        self.keys = {}       # Claves del grupo en orden de llegada (dict como conjunto ordenado)
+        self.lower = None    # Grupo con la frecuencia inmediatamente menor
+        self.higher = None   # Grupo con la frecuencia inmediatamente mayor
+
+
+class FrequencyIndex:
+    """
+    Índice secundario por frecuencia: lista doblemente enlazada de grupos
+    (FrequencyBucket) ordenados por frecuencia, sin grupos vacíos.
+
+    Cada nodo indexado guarda en node.bucket el grupo donde está su clave, así
+    que subir la frecuencia en 1 es O(1): la clave pasa al grupo siguiente (que
+    se crea si no existe); bajarla en 1 o quitar la clave también es O(1).
+    Recorrer de mayor a menor frecuencia no requiere ordenar: los k más
+    frecuentes cuestan O(k + grupos recorridos).
+    Dentro de una misma frecuencia las claves quedan en el orden en que la alcanzaron.
+    """
+
+    def __init__(self):
+        self.lowest = None
+        self.highest = None
+
+    def add(self, node):
+        # Indexa un nodo nuevo con su frecuencia actual.
+        bucket = self.lowest
+        while bucket and bucket.frequency < node.frequency:
+            bucket = bucket.higher
+        if bucket is None or bucket.frequency != node.frequency:
+            bucket = self._new_bucket(node.frequency, bucket.lower if bucket else self.highest)
+        bucket.keys[node.key] = None
+        node.bucket = bucket
+
+    def bulk_add(self, nodes):
+        # Indexa de una vez los nodos de un índice vacío, en O(n + F log F) con F
+        # frecuencias distintas (dentro de cada grupo se respeta el orden de nodes).
+        if self.lowest is not None:
+            raise ValueError("bulk_add requiere un índice vacío")
+        groups = {}
+        for node in nodes:
+            groups.setdefault(node.frequency, []).append(node)
+        for frequency in sorted(groups):
+            bucket = self._new_bucket(frequency, self.highest)
+            keys = bucket.keys
+            for node in groups[frequency]:
+                keys[node.key] = None
+                node.bucket = bucket
+
+    def increment(self, node):
+        # Mueve el nodo al grupo de frecuencia + 1 (node.frequency ya fue incrementada).
+        bucket = node.bucket
+        target = bucket.higher
+        if target is None or target.frequency != node.frequency:
+            target = self._new_bucket(node.frequency, bucket)
+        del bucket.keys[node.key]
+        target.keys[node.key] = None
+        node.bucket = target
+        if not bucket.keys:
+            self._unlink(bucket)
+
+    def decrement(self, node):
+        # Mueve el nodo al grupo de frecuencia - 1 (node.frequency ya fue decrementada).
+        bucket = node.bucket
+        target = bucket.lower
+        if target is None or target.frequency != node.frequency:
+            target = self._new_bucket(node.frequency, target)
+        del bucket.keys[node.key]
+        target.keys[node.key] = None
+        node.bucket = target
+        if not bucket.keys:
+            self._unlink(bucket)
+
+    def remove(self, node):
+        # Quita el nodo del índice (su clave dejó de estar registrada).
+        bucket = node.bucket
+        del bucket.keys[node.key]
+        node.bucket = None
+        if not bucket.keys:
+            self._unlink(bucket)
+
+    def most_frequent(self):
+        # Genera (clave, frecuencia) de mayor a menor frecuencia.
+        bucket = self.highest
+        while bucket:
+            frequency = bucket.frequency
+            for key in bucket.keys:
+                yield key, frequency
+            bucket = bucket.lower
+
+    def at_least(self, frequency):
+        # Genera (clave, frecuencia) con frecuencia >= frequency, de mayor a menor.
+        for key, key_frequency in self.most_frequent():
+            if key_frequency < frequency:
+                return
+            yield key, key_frequency
+
+    def bucket_count(self):
+        # Cantidad de frecuencias distintas.
+        count, bucket = 0, self.lowest
+        while bucket:
+            count, bucket = count + 1, bucket.higher
+        return count
+
+    def _new_bucket(self, frequency, lower):
+        # Crea un grupo y lo enlaza justo encima de lower (None = al comienzo).
+        bucket = FrequencyBucket(frequency)
+        higher = lower.higher if lower else self.lowest
+        bucket.lower, bucket.higher = lower, higher
+        if lower:
+            lower.higher = bucket
+        else:
+            self.lowest = bucket
+        if higher:
+            higher.lower = bucket
+        else:
+            self.highest = bucket
+        return bucket
+
+    def _unlink(self, bucket):
+        # Quita un grupo vacío de la lista.
+        if bucket.lower:
+            bucket.lower.higher = bucket.higher
+        else:
+            self.lowest = bucket.higher
+        if bucket.higher:
+            bucket.higher.lower = bucket.lower
+        else:
+            self.highest = bucket.lower
@@ -1,65 +1,173 @@
+_EMPTY = object()    # Casilla nunca usada: corta la secuencia de sondeo
+_DELETED = object()  # Lápida: casilla borrada, la secuencia de sondeo sigue
+
+MIN_CAPACITY = 8
+MAX_LOAD = 2 / 3     # Se agranda cuando las casillas ocupadas (con lápidas) superan esta fracción
+MIN_LOAD = 1 / 8     # Se achica cuando los elementos quedan por debajo de esta fracción
+
+
 class HashMap:
+    """
+    Tabla hash con direccionamiento abierto.
+
+    Claves, valores y hashes se guardan en tres listas paralelas cuya capacidad
+    es una potencia de 2. Las colisiones se resuelven sondeando con la misma
+    secuencia pseudoaleatoria que usa el dict de CPython, de modo que todos los
+    bits del hash participan aunque la tabla sea chica.
+
+    - Al insertar, si las casillas ocupadas (elementos + lápidas) superan 2/3
+      de la capacidad la tabla se redimensiona.
+    - delete deja una lápida; al redimensionar las lápidas desaparecen. Si los
+      elementos bajan de 1/8 de la capacidad la tabla se achica.
+    - len es O(1) y keys()/values()/items() devuelven vistas perezosas.
+    """
+
     def __init__(self, capacity=100):
-        # Inicializa la tabla hash con una capacidad dada (por defecto 100)
-        # Cada posición es una lista para manejar colisiones (hashing con encadenamiento)
-        self.capacity = capacity
-        self.map = [[] for _ in range(capacity)]
+        # Inicializa la tabla con espacio para al menos capacity elementos sin redimensionar.
+        self.capacity = MIN_CAPACITY
+        while self.capacity * MAX_LOAD < capacity:
+            self.capacity *= 2
+        self._keys = [_EMPTY] * self.capacity
+        self._values = [None] * self.capacity
+        self._hashes = [0] * self.capacity
+        self._size = 0       # Elementos guardados
+        self._filled = 0     # Elementos + lápidas
+        self._changes = 0    # Cambios de estructura (para detectar modificaciones al iterar)
 
-    def _hash(self, key):
-        # Calcula el índice hash para una clave dada
-        return hash(key) % self.capacity
+    def _probe(self, key, key_hash):
+        # Recorre la secuencia de sondeo de key. Devuelve (índice de la clave o -1,
+        # primera casilla libre o lápida donde se podría insertar).
+        keys, hashes = self._keys, self._hashes
+        mask = self.capacity - 1
+        perturb = key_hash & 0xFFFFFFFFFFFFFFFF
+        index = key_hash & mask
+        free = -1
+        while True:
+            current = keys[index]
+            if current is _EMPTY:
+                return -1, (index if free < 0 else free)
+            if current is _DELETED:
+                if free < 0:
+                    free = index
+            elif hashes[index] == key_hash and (current is key or current == key):
+                return index, free
+            perturb >>= 5
+            index = (5 * index + 1 + perturb) & mask
 
     def insert(self, key, value):
-        # Inserta un par clave-valor en la tabla hash
-        index = self._hash(key)
-        for pair in self.map[index]:
-            if pair[0] == key:
-                pair[1] = value  # Si la clave ya existe, actualiza el valor
-                return
-        self.map[index].append([key, value])  # Si no existe, agrega el nuevo par
+        # Inserta un par clave-valor; si la clave ya existe actualiza el valor.
+        key_hash = hash(key)
+        index, free = self._probe(key, key_hash)
+        if index >= 0:
+            self._values[index] = value
+            return
+        if self._keys[free] is _EMPTY:
+            self._filled += 1
+        self._keys[free] = key
+        self._values[free] = value
+        self._hashes[free] = key_hash
+        self._size += 1
+        self._changes += 1
+        if self._filled > self.capacity * MAX_LOAD:
+            self._resize(self._size)
 
     def get(self, key):
-        # Obtiene el valor asociado a una clave, o None si no existe
-        index = self._hash(key)
-        for pair in self.map[index]:
-            if pair[0] == key:
-                return pair[1]
-        return None
+        # Obtiene el valor asociado a una clave, o None si no existe.
+        index, _ = self._probe(key, hash(key))
+        return self._values[index] if index >= 0 else None
 
     def delete(self, key):
-        # Elimina un par clave-valor por clave. Devuelve True si lo elimina, False si no existe
-        index = self._hash(key)
-        for i, pair in enumerate(self.map[index]):
-            if pair[0] == key:
-                del self.map[index][i]
-                return True
-        return False
+        # Elimina un par clave-valor por clave. Devuelve True si lo elimina, False si no existe.
+        index, _ = self._probe(key, hash(key))
+        if index < 0:
+            return False
+        self._keys[index] = _DELETED
+        self._values[index] = None
+        self._size -= 1
+        self._changes += 1
+        if self.capacity > MIN_CAPACITY and self._size < self.capacity * MIN_LOAD:
+            self._resize(self._size)
+        return True
+
+    def reserve(self, size):
+        # Agranda la tabla de una vez para guardar size elementos sin redimensionar al insertarlos.
+        if size * 2 > self.capacity:
+            self._resize(max(size, self._size))
+
+    def _resize(self, size):
+        # Reconstruye la tabla con la menor capacidad que deja size elementos por debajo de 1/2 de carga
+        # (y descarta las lápidas).
+        capacity = MIN_CAPACITY
+        while capacity < size * 2:
+            capacity *= 2
+        old = [(k, v, h) for k, v, h in zip(self._keys, self._values, self._hashes)
+               if k is not _EMPTY and k is not _DELETED]
+        self.capacity = capacity
+        self._keys = keys = [_EMPTY] * capacity
+        self._values = values = [None] * capacity
+        self._hashes = hashes = [0] * capacity
+        mask = capacity - 1
+        for key, value, key_hash in old:
+            perturb = key_hash & 0xFFFFFFFFFFFFFFFF
+            index = key_hash & mask
+            while keys[index] is not _EMPTY:
+                perturb >>= 5
+                index = (5 * index + 1 + perturb) & mask
+            keys[index] = key
+            values[index] = value
+            hashes[index] = key_hash
+        self._filled = len(old)
+        self._changes += 1
+
+    def _entries(self):
+        # Generador de los índices ocupados; falla si la tabla cambia durante la iteración.
+        changes = self._changes
+        keys = self._keys
+        for index in range(len(keys)):
+            if self._changes != changes:
+                raise RuntimeError("HashMap modificado durante la iteración")
+            key = keys[index]
+            if key is not _EMPTY and key is not _DELETED:
+                yield index
 
     def keys(self):
-        # Devuelve una lista con todas las claves almacenadas
-        keys = []
-        for bucket in self.map:
-            keys.extend([pair[0] for pair in bucket])
-        return keys
+        # Vista de las claves almacenadas (se recorre sin copiar la tabla).
+        return _HashMapView(self, lambda index: self._keys[index])
 
     def values(self):
-        # Devuelve una lista con todos los valores almacenados
-        values = []
-        for bucket in self.map:
-            values.extend([pair[1] for pair in bucket])
-        return values
+        # Vista de los valores almacenados.
+        return _HashMapView(self, lambda index: self._values[index])
 
     def items(self):
-        # Devuelve una lista de pares (clave, valor) almacenados
-        items = []
-        for bucket in self.map:
-            items.extend(bucket)
-        return items
+        # Vista de los pares (clave, valor) almacenados.
+        return _HashMapView(self, lambda index: (self._keys[index], self._values[index]))
+
+    def __iter__(self):
+        return iter(self.keys())
 
     def __contains__(self, key):
         # Permite usar 'in' para verificar si una clave está en el HashMap
-        return self.get(key) is not None
+        return self._probe(key, hash(key))[0] >= 0
 
     def __len__(self):
-        # Devuelve la cantidad total de elementos almacenados
-        return sum(len(bucket) for bucket in self.map)
+        # Devuelve la cantidad total de elementos almacenados (O(1))
+        return self._size
+
+
+class _HashMapView:
+    # Vista perezosa de claves, valores o pares de un HashMap (como dict.keys()).
+
+    def __init__(self, hash_map, extract):
+        self._map = hash_map
+        self._extract = extract
+
+    def __iter__(self):
+        extract = self._extract
+        for index in self._map._entries():
+            yield extract(index)
+
+    def __len__(self):
+        return len(self._map)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
@@ -0,0 +1,126 @@
+import heapq
+
+
+class IndexedHeap:
+    """
+    Cola de prioridad (min-heap binario) con índice de posiciones.
+
+    Cada elemento (hashable, por ejemplo el id de una orden) aparece a lo sumo
+    una vez y tiene una clave comparable; la menor clave sale primero. Además
+    del push/pop de un heap común, el índice elemento -> posición permite
+    cambiar la clave de un elemento (update) o quitarlo (remove) en O(log n)
+    sin recorrer el heap.
+    """
+
+    def __init__(self):
+        self._items = []      # heap de elementos
+        self._keys = []       # clave de cada posición (paralelo a _items)
+        self._position = {}   # elemento -> posición en el heap
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._position
+
+    def key(self, item):
+        # Clave actual de un elemento.
+        return self._keys[self._position[item]]
+
+    def push(self, item, key):
+        # Agrega un elemento nuevo, o cambia su clave si ya estaba.
+        if item in self._position:
+            self.update(item, key)
+            return
+        self._items.append(item)
+        self._keys.append(key)
+        self._position[item] = len(self._items) - 1
+        self._sift_up(len(self._items) - 1)
+
+    def peek(self):
+        # (elemento, clave) de menor clave, sin quitarlo.
+        if not self._items:
+            raise IndexError("peek en un heap vacío")
+        return self._items[0], self._keys[0]
+
+    def pop(self):
+        # Quita y devuelve (elemento, clave) de menor clave.
+        if not self._items:
+            raise IndexError("pop en un heap vacío")
+        item, key = self._items[0], self._keys[0]
+        self._remove_at(0)
+        return item, key
+
+    def smallest(self, k):
+        # Los k elementos de menor clave, en orden [(elemento, clave), ...], sin quitarlos.
+        # Recorre el heap desde la raíz con una frontera de hijos: O(k log k).
+        items, keys = self._items, self._keys
+        result = []
+        frontier = [(keys[0], 0)] if items else []
+        while frontier and len(result) < k:
+            key, i = heapq.heappop(frontier)
+            result.append((items[i], key))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(items):
+                    heapq.heappush(frontier, (keys[child], child))
+        return result
+
+    def update(self, item, key):
+        # Cambia la clave de un elemento y lo reubica.
+        i = self._position[item]
+        old = self._keys[i]
+        self._keys[i] = key
+        if key < old:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def remove(self, item):
+        # Quita un elemento cualquiera; devuelve su clave.
+        i = self._position[item]
+        key = self._keys[i]
+        self._remove_at(i)
+        return key
+
+    def _remove_at(self, i):
+        # Mueve el último elemento a la posición i y lo reubica.
+        items, keys, position = self._items, self._keys, self._position
+        del position[items[i]]
+        last_item, last_key = items.pop(), keys.pop()
+        if i == len(items):
+            return
+        items[i], keys[i] = last_item, last_key
+        position[last_item] = i
+        self._sift_down(i)
+        self._sift_up(i)
+
+    def _sift_up(self, i):
+        items, keys, position = self._items, self._keys, self._position
+        item, key = items[i], keys[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not key < keys[parent]:
+                break
+            items[i], keys[i] = items[parent], keys[parent]
+            position[items[i]] = i
+            i = parent
+        items[i], keys[i] = item, key
+        position[item] = i
+
+    def _sift_down(self, i):
+        items, keys, position = self._items, self._keys, self._position
+        n = len(items)
+        item, key = items[i], keys[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[child + 1] < keys[child]:
+                child += 1
+            if not keys[child] < key:
+                break
+            items[i], keys[i] = items[child], keys[child]
+            position[items[i]] = i
+            i = child
+        items[i], keys[i] = item, key
+        position[item] = i
@@ -0,0 +1,197 @@
+from array import array
+
+
+class RouteStore:
+    """
+    Tabla de rutas internadas: cada secuencia distinta de vértices recibe un
+    id entero y se guarda una sola vez.
+
+    Las rutas se guardan en un trie sobre códigos de vértice (cada vértice se
+    interna a su vez como un entero pequeño), de modo que los prefijos comunes
+    se comparten. El id de una ruta es el nodo del trie donde termina. El trie
+    vive en arreglos paralelos (padre, código, primer hijo, siguiente hermano):
+    cuatro enteros de 4 bytes por nodo, sin un objeto por nodo. Solo los hijos de
+    la raíz (el primer vértice) se buscan con un diccionario; más abajo la
+    cantidad de hijos está acotada por el grado del nodo y se recorre la lista
+    de hermanos.
+
+    Un índice invertido (código de vértice -> ids de ruta) responde qué rutas
+    pasan por un nodo sin recorrer todas.
+    """
+
+    def __init__(self):
+        self.vertex_codes = {}      # id de vértice -> código
+        self.vertex_ids = []        # código -> id de vértice
+        self._root_children = {}    # código -> nodo del trie que cuelga de la raíz
+        # Trie en arreglos paralelos; el nodo 0 es la raíz (ruta vacía).
+        self._parent = array('i', [-1])
+        self._code = array('i', [-1])
+        self._first_child = array('i', [-1])
+        self._next_sibling = array('i', [-1])
+        self._is_route = bytearray(1)
+        self._through = []          # código -> array de ids de ruta que pasan por el vértice
+        # id de ruta -> el mismo entero: intern devuelve siempre el mismo objeto int por
+        # ruta, así miles de órdenes con la misma ruta no crean un int cada una.
+        self._ids = {}
+
+    def __len__(self):
+        # Cantidad de rutas distintas internadas.
+        return len(self._ids)
+
+    def __contains__(self, path):
+        return self.find(path) is not None
+
+    def intern(self, path):
+        # Devuelve el id de la ruta (lista de ids de vértice), creándolo si es nueva.
+        if not path:
+            raise ValueError("No se puede internar una ruta vacía")
+        node = 0
+        codes = []
+        for vertex in path:
+            code = self.vertex_codes.get(vertex)
+            if code is None:
+                code = len(self.vertex_ids)
+                self.vertex_codes[vertex] = code
+                self.vertex_ids.append(vertex)
+                self._through.append(array('i'))
+            codes.append(code)
+            child = self._child(node, code)
+            node = child if child >= 0 else self._add_node(node, code)
+        if not self._is_route[node]:
+            self._is_route[node] = 1
+            self._ids[node] = node
+            for code in set(codes):
+                self._through[code].append(node)
+        return self._ids[node]
+
+    def find(self, path):
+        # Id de una ruta ya internada, o None (no agrega nada).
+        node = self._find_node(path)
+        return self._ids.get(node) if node else None
+
+    def path(self, route_id):
+        # Lista de ids de vértice de la ruta.
+        vertex_ids, parent, code = self.vertex_ids, self._parent, self._code
+        path = []
+        node = route_id
+        while node > 0:
+            path.append(vertex_ids[code[node]])
+            node = parent[node]
+        path.reverse()
+        return path
+
+    def key(self, route_id):
+        # Texto "A → B → C" de la ruta (para mostrar).
+        return " → ".join(self.path(route_id))
+
+    def sort_key(self, route_id):
+        # Tupla de vértices de la ruta: ordena las rutas nodo a nodo y deja contiguas
+        # las que comparten un prefijo.
+        return tuple(self.path(route_id))
+
+    def routes_with_prefix(self, prefix):
+        # Genera los ids de las rutas que empiezan con la secuencia prefix.
+        start = self._find_node(prefix)
+        if start is None:
+            return
+        first_child, next_sibling, is_route = self._first_child, self._next_sibling, self._is_route
+        if is_route[start]:
+            yield start
+        stack = [first_child[start]]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            stack.append(next_sibling[node])
+            if is_route[node]:
+                yield node
+            stack.append(first_child[node])
+
+    def routes_through(self, vertex):
+        # Ids de las rutas que pasan por vertex (en orden de creación).
+        code = self.vertex_codes.get(vertex)
+        return list(self._through[code]) if code is not None else []
+
+    def route_ids(self):
+        # Ids de ruta en el orden en que se crearon.
+        return list(self._ids)
+
+    def to_arrays(self):
+        """
+        Estado completo en arreglos, para guardarlo (from_arrays lo
+        reconstruye con los mismos ids): vertex_ids y un dict de array('i')
+        con el trie, los ids de ruta en orden de creación y el índice
+        invertido aplanado (through_offsets delimita las rutas de cada código).
+        """
+        through_offsets = array('i', [0])
+        through = array('i')
+        for routes in self._through:
+            through.extend(routes)
+            through_offsets.append(len(through))
+        return self.vertex_ids, {
+            "parent": self._parent,
+            "code": self._code,
+            "first_child": self._first_child,
+            "next_sibling": self._next_sibling,
+            "route_ids": array('i', self._ids),
+            "through_offsets": through_offsets,
+            "through": through,
+        }
+
+    @classmethod
+    def from_arrays(cls, vertex_ids, arrays):
+        # Reconstruye un RouteStore guardado con to_arrays (arreglos de enteros o vistas).
+        store = cls()
+        store.vertex_ids = list(vertex_ids)
+        store.vertex_codes = {vertex: code for code, vertex in enumerate(store.vertex_ids)}
+        store._parent = array('i', arrays["parent"])
+        store._code = array('i', arrays["code"])
+        store._first_child = array('i', arrays["first_child"])
+        store._next_sibling = array('i', arrays["next_sibling"])
+        store._root_children = {}
+        node = store._first_child[0]
+        while node >= 0:
+            store._root_children[store._code[node]] = node
+            node = store._next_sibling[node]
+        route_ids = array('i', arrays["route_ids"]).tolist()
+        store._ids = dict(zip(route_ids, route_ids))
+        store._is_route = bytearray(len(store._parent))
+        for route_id in route_ids:
+            store._is_route[route_id] = 1
+        offsets, through = arrays["through_offsets"], array('i', arrays["through"])
+        store._through = [through[offsets[i]:offsets[i + 1]] for i in range(len(store.vertex_ids))]
+        return store
+
+    def _find_node(self, path):
+        # Nodo del trie de la secuencia path (None si no existe); 0 para la secuencia vacía.
+        node = 0
+        for vertex in path:
+            code = self.vertex_codes.get(vertex)
+            if code is None:
+                return None
+            node = self._child(node, code)
+            if node < 0:
+                return None
+        return node
+
+    def _child(self, node, code):
+        # Hijo de node con el código dado, o -1.
+        if node == 0:
+            return self._root_children.get(code, -1)
+        child = self._first_child[node]
+        codes, next_sibling = self._code, self._next_sibling
+        while child >= 0 and codes[child] != code:
+            child = next_sibling[child]
+        return child
+
+    def _add_node(self, parent, code):
+        node = len(self._parent)
+        self._parent.append(parent)
+        self._code.append(code)
+        self._first_child.append(-1)
+        self._next_sibling.append(self._first_child[parent])
+        self._first_child[parent] = node
+        self._is_route.append(0)
+        if parent == 0:
+            self._root_children[code] = node
+        return node
@@ -1,31 +1,100 @@
+from itertools import islice
+
 from tda.avl import AVLTree, AVLNode
+from tda.frequency_index import FrequencyIndex
+
+class RouteNode(AVLNode):
+    __slots__ = ("bucket",)
+
+    def __init__(self, key, frequency=1):
+        # Nodo de ruta: además guarda su grupo en el índice por frecuencia.
+        # (Campos asignados directamente en lugar de llamar a super().__init__:
+        # es el constructor que más se llama al reconstruir el registro.)
+        self.key = key
+        self.frequency = frequency
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.size = 1
+        self.total = frequency
+        self.bucket = None
 
 class RouteTree(AVLTree):
+    """
+    Registro de rutas con su frecuencia. La clave es el id de la ruta en un
+    RouteStore (un entero: cada comparación del AVL es O(1)); también acepta
+    otras claves comparables, como el texto "A → B → C".
+
+    Hereda del AVL las consultas por orden en O(log n): rank(clave),
+    select(i), items_between(desde, hasta), frequency_between(desde, hasta)
+    y count_between(desde, hasta).
+
+    Además mantiene un FrequencyIndex (grupos por frecuencia) que se actualiza
+    en O(1) con cada insert: las rutas más frecuentes salen en O(k) sin ordenar.
+
+    Como los ids no siguen el orden de las rutas, las consultas por rango de
+    rutas usan un segundo AVL, ordered(sort_key), con las mismas frecuencias
+    pero ordenado por sort_key(id) (por ejemplo la secuencia de nodos de la
+    ruta). Se arma la primera vez que se pide y desde ahí insert lo mantiene.
+    """
+    node_class = RouteNode
+
     def __init__(self):
         super().__init__()
-        
+        self.by_frequency = FrequencyIndex()
+        self.by_order = None     # AVL ordenado por sort_key (se arma con ordered)
+        self._sort_key = None
+
+    def insert(self, key):
+        # Inserta la ruta en el AVL y actualiza su grupo de frecuencia y el índice ordenado.
+        node = super().insert(key)
+        if node.bucket is None:
+            self.by_frequency.add(node)
+        else:
+            self.by_frequency.increment(node)
+        if self.by_order is not None:
+            self.by_order.insert(self._sort_key(key))
+        return node
+
+    def decrement(self, key):
+        # Resta 1 a la frecuencia de la ruta (la quita si llega a 0) en los tres índices.
+        node = super().decrement(key)
+        if node is None:
+            return None
+        if node.frequency > 0:
+            self.by_frequency.decrement(node)
+        else:
+            self.by_frequency.remove(node)
+        if self.by_order is not None:
+            self.by_order.decrement(self._sort_key(key))
+        return node
+
+    def ordered(self, sort_key):
+        """
+        Índice de las rutas ordenado por sort_key(clave), con sus frecuencias:
+        un AVLTree cuyas consultas por rango (items_between, count_between,
+        frequency_between) siguen ese orden en O(log n). La primera llamada lo
+        arma en O(n log n); después cada insert lo actualiza.
+        """
+        if self.by_order is None or self._sort_key != sort_key:
+            self.by_order = AVLTree.bulk_load(sorted((sort_key(key), frequency)
+                                                     for key, frequency in self.items_between()))
+            self._sort_key = sort_key
+        return self.by_order
+
+    def _loaded(self, nodes):
+        # Después de bulk_load arma el índice por frecuencia de una sola vez.
+        self.by_frequency.bulk_add(nodes)
+
     def get_most_frequent_routes(self, n=5):
-        """Obtiene las n rutas más frecuentes"""
-        routes = []
-        self._inorder_frequency(self.root, routes)
-        return sorted(routes, key=lambda x: x[1], reverse=True)[:n]
-    
-    def _inorder_frequency(self, node, routes):
-        """Recorre el árbol en orden para obtener las rutas y sus frecuencias"""
-        if node:
-            self._inorder_frequency(node.left, routes)
-            routes.append((node.key, node.frequency))
-            self._inorder_frequency(node.right, routes)
-            
+        """Obtiene las n rutas más frecuentes, en O(n)"""
+        return list(islice(self.by_frequency.most_frequent(), n))
+
+    def get_routes_with_min_frequency(self, frequency):
+        """Rutas usadas al menos frequency veces, de la más a la menos frecuente"""
+        return list(self.by_frequency.at_least(frequency))
+
     def get_route_frequency(self, route_key):
         """Obtiene la frecuencia de una ruta específica"""
-        node = self._find(self.root, route_key)
+        node = self._find(route_key)
         return node.frequency if node else 0
-        
-    def _find(self, node, key):
-        """Busca un nodo por su clave"""
-        if not node or node.key == key:
-            return node
-        if key < node.key:
-            return self._find(node.left, key)
-        return self._find(node.right, key)
\ No newline at end of file
@@ -6,9 +6,11 @@ class AVLVisualizer:
     Clase para visualizar un árbol AVL usando NetworkX y Matplotlib.
     Permite mostrar gráficamente la estructura del árbol y la frecuencia de cada ruta.
     """
-    def __init__(self, avl_tree):
+    def __init__(self, avl_tree, key_label=str):
         # Guarda una referencia al árbol AVL que se va a visualizar
+        # key_label convierte cada clave en el texto a mostrar (p. ej. id de ruta -> "A → B")
         self.tree = avl_tree
+        self.key_label = key_label
 
     def draw(self):
         """
@@ -34,7 +36,7 @@ class AVLVisualizer:
         """
         if not node:
             return
-        G.add_node(node.key, label=f"{node.key}\nFreq: {node.frequency}")
+        G.add_node(node.key, label=f"{self.key_label(node.key)}\nFreq: {node.frequency}")
         if node.left:
             G.add_edge(node.key, node.left.key)
             self._add_edges(node.left, G)
@@ -1,12 +1,18 @@
 import folium
 from streamlit_folium import st_folium
 
+# Colores para las zonas de depósito (se repiten si hay más depósitos que colores)
+ZONE_COLORS = ['#e6194b', '#3cb44b', '#4363d8', '#f58231', '#911eb4', '#42d4f4',
+               '#f032e6', '#bfef45', '#469990', '#9a6324', '#800000', '#000075']
+
 # Visualizador de grafo sobre mapa real usando folium
-def draw_graph_on_map(graph, path=None, mst_edges=None, center_lat=-38.7359, center_lon=-72.5904, zoom_start=13):
+def draw_graph_on_map(graph, path=None, mst_edges=None, center_lat=-38.7359, center_lon=-72.5904, zoom_start=13,
+                      depot_partition=None):
     """
     Dibuja el grafo sobre un mapa real de Temuco (por defecto) usando folium.
     path: lista de nodos (ids) que representan la ruta a resaltar (opcional)
     mst_edges: lista de aristas (u, v, peso) del MST a resaltar (opcional)
+    depot_partition: DepotPartition para agregar una capa con la zona de cada depósito (opcional)
     """
     m = folium.Map(location=[center_lat, center_lon], zoom_start=zoom_start)
     color_map = {'storage': 'blue', 'recharge': 'green', 'client': 'orange'}
@@ -65,8 +71,32 @@ def draw_graph_on_map(graph, path=None, mst_edges=None, center_lat=-38.7359, cen
                 weight=5,
                 opacity=0.9
             ).add_to(m)
+    # Capa de zonas: cada nodo se pinta con el color de su depósito más cercano
+    if depot_partition is not None:
+        _add_depot_layer(m, graph, depot_partition)
+        folium.LayerControl().add_to(m)
     return m
 
-def show_graph_map(graph, path=None, mst_edges=None):
-    m = draw_graph_on_map(graph, path=path, mst_edges=mst_edges)
+def _add_depot_layer(m, graph, depot_partition):
+    layer = folium.FeatureGroup(name="Zonas de depósito")
+    depot_colors = {depot: ZONE_COLORS[i % len(ZONE_COLORS)]
+                    for i, depot in enumerate(sorted(depot_partition.depots()))}
+    for node_id, vertex in graph.vertices.items():
+        depot = depot_partition.depot_of(node_id)
+        if depot is None or vertex.lat is None or vertex.lon is None:
+            continue
+        folium.CircleMarker(
+            location=[vertex.lat, vertex.lon],
+            radius=12 if depot == node_id else 10,
+            color=depot_colors[depot],
+            weight=3 if depot == node_id else 1,
+            fill=True,
+            fill_color=depot_colors[depot],
+            fill_opacity=0.35,
+            popup=f"{node_id}: depósito {depot} ({depot_partition.distance_to_depot(node_id)})"
+        ).add_to(layer)
+    layer.add_to(m)
+
+def show_graph_map(graph, path=None, mst_edges=None, depot_partition=None):
+    m = draw_graph_on_map(graph, path=path, mst_edges=mst_edges, depot_partition=depot_partition)
     st_folium(m, width=700, height=500)